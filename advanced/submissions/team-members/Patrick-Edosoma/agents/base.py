@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 
 class Agent(ABC):
@@ -24,3 +24,21 @@ class Agent(ABC):
             Each agent should return JSON-serializable content.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def search(self, *args, **kwargs) -> List[Any]:
+        """Typed variant of :meth:`run` returning the validated models themselves.
+
+        Returns:
+            List[Any]: Pydantic models (e.g. FlightOption), unsorted.
+
+        Notes:
+            The planner uses this path so results are not dumped to dicts and
+            re-validated between the agent and the itinerary.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_async(self, *args, **kwargs) -> List[Any]:
+        """Async variant of :meth:`search` used by the planner."""
+        raise NotImplementedError
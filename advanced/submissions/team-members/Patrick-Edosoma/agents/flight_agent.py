@@ -1,9 +1,10 @@
 from __future__ import annotations
 from datetime import date
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .base import Agent
-from models import FlightOption
-from utils.search_providers import flight_search
+from models import FareCell, FlightOption
+from utils.search_providers import TOP_K, fare_grid_async, flight_search, flight_search_async
+from utils.deadline import Deadline
 
 
 class FlightAgent(Agent):
@@ -11,17 +12,64 @@ class FlightAgent(Agent):
 
     name = "flight_agent"
 
-    def run(self, origin: str, destination: str, start_date: date, end_date: date) -> Dict[str, Any]:
-        """Search and normalize flight options.
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+        limit: Optional[int] = TOP_K,
+    ) -> List[FlightOption]:
+        """Search flight options.
 
         Args:
             origin: Origin IATA code.
             destination: Destination IATA or city code.
             start_date: Outbound date.
             end_date: Return date.
+            deadline: Optional time budget for the provider call.
+            multi_airport: Also search the other airports serving both cities.
+            limit: Options returned; None for every option found.
+
+        Returns:
+            List[FlightOption]: Validated options, cheapest first.
+        """
+        return flight_search(
+            origin, destination, start_date, end_date, deadline=deadline, multi_airport=multi_airport, limit=limit
+        )
+
+    async def search_async(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+        limit: Optional[int] = TOP_K,
+    ) -> List[FlightOption]:
+        """Non-blocking :meth:`search`."""
+        return await flight_search_async(
+            origin, destination, start_date, end_date, deadline=deadline, multi_airport=multi_airport, limit=limit
+        )
+
+    async def fare_grid_async(
+        self,
+        origin: str,
+        destination: str,
+        dates: List[Tuple[date, date]],
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> List[FareCell]:
+        """Cheapest fare for each (depart, return) pair in ``dates``."""
+        return await fare_grid_async(origin, destination, dates, deadline=deadline, multi_airport=multi_airport)
+
+    def run(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Search and normalize flight options (arguments as :meth:`search`).
 
         Returns:
             Dict with key "flights" -> list of FlightOption dicts.
         """
-        flights = flight_search(origin, destination, start_date, end_date)
-        return {"flights": [f.model_dump() for f in flights]}
+        return {"flights": [f.model_dump() for f in self.search(*args, **kwargs)]}
@@ -1,15 +1,43 @@
 from __future__ import annotations
 from datetime import date
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from .base import Agent
 from models import HotelOption
-from utils.search_providers import hotel_search
+from utils.search_providers import TOP_K, hotel_candidates_async, hotel_search, hotel_search_async, select_hotels
+from utils.deadline import Deadline
+from utils.option_table import HotelTable
 
 class HotelAgent(Agent):
     """Agent responsible for hotel discovery and filtering."""
 
     name = "hotel_agent"
 
-    def run(self, city: str, check_in: date, check_out: date, max_rate: float) -> Dict[str, Any]:
-        hotels = hotel_search(city, check_in, check_out, max_rate)
+    def search(
+        self, city: str, check_in: date, check_out: date, max_rate: float, deadline: Optional[Deadline] = None,
+        limit: Optional[int] = TOP_K,
+    ) -> List[HotelOption]:
+        return hotel_search(city, check_in, check_out, max_rate, deadline=deadline, limit=limit)
+
+    async def search_async(
+        self, city: str, check_in: date, check_out: date, max_rate: float, deadline: Optional[Deadline] = None,
+        limit: Optional[int] = TOP_K,
+    ) -> List[HotelOption]:
+        return await hotel_search_async(city, check_in, check_out, max_rate, deadline=deadline, limit=limit)
+
+    async def candidates_async(
+        self, city: str, check_in: date, check_out: date, deadline: Optional[Deadline] = None
+    ) -> Optional[HotelTable]:
+        """Hotels for a stay before any budget is applied (see :meth:`select`); shared by batch plans."""
+        return await hotel_candidates_async(city, check_in, check_out, deadline=deadline)
+
+    def select(
+        self, candidates: Optional[HotelTable], city: str, check_in: date, check_out: date, max_rate: float
+    ) -> List[HotelOption]:
+        """What :meth:`search` returns for ``max_rate``, given the stay's candidates."""
+        return select_hotels(candidates, city, check_in, check_out, max_rate)
+
+    def run(
+        self, city: str, check_in: date, check_out: date, max_rate: float, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        hotels = self.search(city, check_in, check_out, max_rate, deadline=deadline)
         return {"hotels": [h.model_dump() for h in hotels]}
@@ -1,14 +1,21 @@
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import Agent
 from models import POI
-from utils.search_providers import poi_search
+from utils.search_providers import poi_search, poi_search_async
+from utils.deadline import Deadline
 
 class POIAgent(Agent):
     """Agent for activities / points of interest."""
 
     name = "poi_agent"
 
-    def run(self, city: str, interests: List[str]) -> Dict[str, Any]:
-        pois = poi_search(city, interests)
+    def search(self, city: str, interests: List[str], deadline: Optional[Deadline] = None) -> List[POI]:
+        return poi_search(city, interests, deadline=deadline)
+
+    async def search_async(self, city: str, interests: List[str], deadline: Optional[Deadline] = None) -> List[POI]:
+        return await poi_search_async(city, interests, deadline=deadline)
+
+    def run(self, city: str, interests: List[str], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        pois = self.search(city, interests, deadline=deadline)
         return {"pois": [p.model_dump() for p in pois]}
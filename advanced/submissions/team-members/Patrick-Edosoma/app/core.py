@@ -1,18 +1,236 @@
 from datetime import date, timedelta
-from typing import List, Dict, Any
-from controller.planner import Planner 
-from models import Itinerary  
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from controller.planner import Planner
+from models import FlexiblePlan, Itinerary, OptimizedPlan
+from utils.deadline import Deadline
+from utils.plan_cache import PLAN_CACHE_DISABLED, PlanCache, PlanKey, plan_key
+from utils.singleflight import AsyncSingleFlight, SingleFlight
 
-def plan_trip_core(origin: str, destination: str, start_date: date, end_date: date,
-                   budget_per_night: float, interests: List[str]) -> Dict[str, Any]:
-    planner = Planner()
-    it: Itinerary = planner.plan_trip(
+# Whole-itinerary results keyed on the normalized request; shared by the API and UIs.
+PLAN_CACHE: PlanCache[Itinerary] = PlanCache()
+_PLAN_INFLIGHT = SingleFlight()
+_PLAN_INFLIGHT_ASYNC = AsyncSingleFlight()
+
+
+def _cacheable(deadline: Deadline) -> bool:
+    # Plans that fell back to cached/sample provider data are served but not stored.
+    return not PLAN_CACHE_DISABLED and not deadline.degraded
+
+
+def plan_itinerary(origin: str, destination: str, start_date: date, end_date: date,
+                   budget_per_night: float, interests: List[str],
+                   deadline_s: Optional[float] = None, multi_airport: bool = False) -> Itinerary:
+    """Plan a trip, serving repeats from the plan cache.
+
+    Args:
+        origin: Origin IATA code.
+        destination: Destination IATA code.
+        start_date: Trip start.
+        end_date: Trip end.
+        budget_per_night: Nightly hotel budget in USD (whole dollars are used).
+        interests: Activity interests (order and case are ignored).
+        deadline_s: Overall time budget in seconds; None for no deadline.
+        multi_airport: Search flights between every airport serving both cities.
+
+    Returns:
+        Itinerary: A copy of the cached or freshly planned itinerary.
+
+    Notes:
+        Identical concurrent requests share one planning run (and the first
+        caller's deadline).
+    """
+    key = plan_key(origin, destination, start_date, end_date, budget_per_night, interests, multi_airport)
+    it = PLAN_CACHE.get(key)
+    if it is None:
+        it = _PLAN_INFLIGHT.do(repr(key), lambda: _plan(key, deadline_s))
+    return it.model_copy()
+
+
+def _plan(key: PlanKey, deadline_s: Optional[float]) -> Itinerary:
+    origin, destination, start, end, budget, interests, multi_airport = key
+    deadline = Deadline(deadline_s)
+    it = Planner().plan_trip(
         origin=origin,
         destination=destination,
+        start_date=date.fromisoformat(start),
+        end_date=date.fromisoformat(end),
+        budget_per_night=float(budget),
+        interests=list(interests),
+        deadline=deadline,
+        multi_airport=multi_airport,
+    )
+    if _cacheable(deadline):
+        PLAN_CACHE.set(key, it)
+    return it
+
+
+async def plan_itinerary_async(origin: str, destination: str, start_date: date, end_date: date,
+                               budget_per_night: float, interests: List[str],
+                               deadline_s: Optional[float] = None, multi_airport: bool = False) -> Itinerary:
+    """Async :func:`plan_itinerary` using the concurrent planner."""
+    key = plan_key(origin, destination, start_date, end_date, budget_per_night, interests, multi_airport)
+    it = PLAN_CACHE.get(key)
+    if it is None:
+        it = await _PLAN_INFLIGHT_ASYNC.do(repr(key), lambda: _plan_async(key, deadline_s))
+    return it.model_copy()
+
+
+async def _plan_async(key: PlanKey, deadline_s: Optional[float]) -> Itinerary:
+    origin, destination, start, end, budget, interests, multi_airport = key
+    deadline = Deadline(deadline_s)
+    it = await Planner().plan_trip_async(
+        origin=origin,
+        destination=destination,
+        start_date=date.fromisoformat(start),
+        end_date=date.fromisoformat(end),
+        budget_per_night=float(budget),
+        interests=list(interests),
+        deadline=deadline,
+        multi_airport=multi_airport,
+    )
+    if _cacheable(deadline):
+        PLAN_CACHE.set(key, it)
+    return it
+
+
+async def plan_itinerary_events(origin: str, destination: str, start_date: date, end_date: date,
+                                budget_per_night: float, interests: List[str],
+                                deadline_s: Optional[float] = None,
+                                multi_airport: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+    """Plan a trip, yielding each part as it becomes ready (see ``Planner.plan_trip_events``).
+
+    A cached plan yields its parts and the itinerary at once; a fresh plan is
+    stored in the plan cache like :func:`plan_itinerary_async` would. The final
+    ``("itinerary", Itinerary)`` event is the same itinerary ``POST /plan`` returns.
+    """
+    key = plan_key(origin, destination, start_date, end_date, budget_per_night, interests, multi_airport)
+    it = PLAN_CACHE.get(key)
+    if it is not None:
+        it = it.model_copy()
+        # The itinerary only keeps scheduled POIs; days repeat them as they rotate.
+        pois = list({(p.title, p.link): p for day in it.daily_plan for p in day.activities}.values())
+        for part, value in (("flights", it.flights), ("hotels", it.hotels), ("pois", pois)):
+            yield part, value
+        yield "itinerary", it
+        return
+
+    origin, destination, start, end, budget, interests, multi_airport = key
+    deadline = Deadline(deadline_s)
+    async for part, value in Planner().plan_trip_events(
+        origin=origin,
+        destination=destination,
+        start_date=date.fromisoformat(start),
+        end_date=date.fromisoformat(end),
+        budget_per_night=float(budget),
+        interests=list(interests),
+        deadline=deadline,
+        multi_airport=multi_airport,
+    ):
+        if part == "itinerary" and _cacheable(deadline):
+            PLAN_CACHE.set(key, value)
+            value = value.model_copy()
+        yield part, value
+
+
+async def plan_itineraries_async(trips: List[Dict[str, Any]]) -> List[Itinerary]:
+    """Plan a batch of trips, each given as :func:`plan_itinerary_async` keyword arguments.
+
+    Cached plans are served from the plan cache and repeated requests in the batch
+    are planned once; the rest go through ``Planner.plan_batch_async``, which runs
+    each distinct flight, hotel and POI search only once for the whole batch.
+
+    Returns:
+        List[Itinerary]: Copies, one per trip, in order.
+    """
+    keys = [
+        plan_key(t["origin"], t["destination"], t["start_date"], t["end_date"],
+                 t["budget_per_night"], t["interests"], t.get("multi_airport", False))
+        for t in trips
+    ]
+    found: Dict[PlanKey, Itinerary] = {}
+    todo: Dict[PlanKey, Deadline] = {}
+    for key, trip in zip(keys, trips):
+        if key in found or key in todo:
+            continue
+        it = PLAN_CACHE.get(key)
+        if it is None:
+            todo[key] = Deadline(trip.get("deadline_s"))
+        else:
+            found[key] = it
+
+    if todo:
+        plans = await Planner().plan_batch_async([
+            dict(
+                origin=origin,
+                destination=destination,
+                start_date=date.fromisoformat(start),
+                end_date=date.fromisoformat(end),
+                budget_per_night=float(budget),
+                interests=list(interests),
+                deadline=deadline,
+                multi_airport=multi_airport,
+            )
+            for (origin, destination, start, end, budget, interests, multi_airport), deadline in todo.items()
+        ])
+        for (key, deadline), it in zip(todo.items(), plans):
+            if _cacheable(deadline):
+                PLAN_CACHE.set(key, it)
+            found[key] = it
+    return [found[key].model_copy() for key in keys]
+
+
+async def plan_flexible_async(origin: str, destination: str, start_date: date, end_date: date,
+                              budget_per_night: float, interests: List[str],
+                              deadline_s: Optional[float] = None, multi_airport: bool = False,
+                              flex_days: int = 3, min_nights: Optional[int] = None,
+                              max_nights: Optional[int] = None) -> FlexiblePlan:
+    """Search fares around the requested dates, then plan the trip on the cheapest ones.
+
+    The fare grid gets half of ``deadline_s``; the itinerary for the chosen dates is
+    planned like :func:`plan_itinerary_async` (plan cache included) with what is
+    left, and with the response cache on, its flight search reuses the grid's results.
+    The requested dates are kept if no date in the window could be searched.
+    """
+    deadline = Deadline(deadline_s)
+    grid, best = await Planner().cheapest_dates_async(
+        origin, destination, start_date, end_date, flex_days, min_nights, max_nights,
+        deadline=deadline.child(0.5), multi_airport=multi_airport,
+    )
+    if best is not None:
+        start_date, end_date = best.depart_date, best.return_date
+    it = await plan_itinerary_async(
+        origin, destination, start_date, end_date, budget_per_night, interests,
+        deadline.remaining(), multi_airport,
+    )
+    return FlexiblePlan.model_construct(itinerary=it, best=best, grid=grid)
+
+
+async def plan_optimized_async(origin: str, destination: str, start_date: date, end_date: date,
+                               budget_per_night: float, interests: List[str],
+                               deadline_s: Optional[float] = None, multi_airport: bool = False,
+                               total_budget: float = 0.0, alternatives: int = 2) -> OptimizedPlan:
+    """Best-value itinerary within ``total_budget`` plus alternatives (``Planner.optimize_trip_async``).
+
+    Not cached in the plan cache: the result depends on the total budget, which
+    plain plans do not have; provider results are still shared through the response cache.
+    """
+    return await Planner().optimize_trip_async(
+        origin=origin.strip().upper(),
+        destination=destination.strip().upper(),
         start_date=start_date,
         end_date=end_date,
         budget_per_night=budget_per_night,
         interests=interests,
+        total_budget=total_budget,
+        alternatives=alternatives,
+        deadline=Deadline(deadline_s),
+        multi_airport=multi_airport,
     )
-    
+
+
+def plan_trip_core(origin: str, destination: str, start_date: date, end_date: date,
+                   budget_per_night: float, interests: List[str],
+                   deadline_s: Optional[float] = None, multi_airport: bool = False) -> Dict[str, Any]:
+    it = plan_itinerary(origin, destination, start_date, end_date, budget_per_night, interests, deadline_s, multi_airport)
     return it.model_dump()
+
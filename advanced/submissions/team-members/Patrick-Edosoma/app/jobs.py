@@ -0,0 +1,169 @@
+"""Background plan jobs: submit now, poll for progress and the result later."""
+from __future__ import annotations
+import asyncio
+import logging
+import math
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core import plan_itinerary_events
+from models import Itinerary
+from utils.admission import AdmissionControl, Overloaded
+
+logger = logging.getLogger(__name__)
+
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "8"))
+PLAN_JOB_QUEUE = int(os.getenv("PLAN_JOB_QUEUE", "256"))
+# How long finished jobs (and their results) can still be fetched.
+PLAN_JOB_TTL_S = float(os.getenv("PLAN_JOB_TTL_S", "600"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+_PARTS = ("flights", "hotels", "pois", "itinerary")
+
+
+class PlanJob:
+    __slots__ = ("id", "params", "status", "parts_done", "result", "error", "created", "finished")
+
+    def __init__(self, params: Dict[str, Any]) -> None:
+        self.id = secrets.token_urlsafe(12)
+        self.params = params
+        self.status = QUEUED
+        self.parts_done: List[str] = []
+        self.result: Optional[Itinerary] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    def view(self) -> Dict[str, Any]:
+        """Status document for ``GET /plan/jobs/{id}`` (``result`` is the /plan body once done)."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "parts_done": list(self.parts_done),
+            "progress": round(len(self.parts_done) / len(_PARTS), 2),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class PlanJobs:
+    """Bounded queue of plan jobs served by a fixed set of worker tasks.
+
+    Args:
+        workers: Plans computed at once.
+        max_queue: Jobs allowed to wait; submitting more raises ``Overloaded`` (429).
+        ttl_s: Seconds a finished job stays available.
+        admission: Admission control shared with the synchronous endpoints; each
+            running job holds one of its slots.
+
+    Notes:
+        Workers are asyncio tasks on the server's event loop running the async
+        planner, so a slow plan costs a coroutine rather than a thread or an open
+        HTTP connection. With ``admission``, jobs count against the same in-flight
+        limit as ``POST /plan``: a job stays queued until it gets a slot, without
+        using a place in the admission wait queue or counting as a rejected
+        request. Progress comes from the planner's per-part events. Jobs live in
+        this process only; with several workers, poll the one that
+        accepted the job (or use sticky routing).
+    """
+
+    def __init__(self, workers: int = PLAN_JOB_WORKERS, max_queue: int = PLAN_JOB_QUEUE,
+                 ttl_s: float = PLAN_JOB_TTL_S, admission: Optional[AdmissionControl] = None) -> None:
+        self.n_workers = max(workers, 1)
+        self.max_queue = max(max_queue, 1)
+        self.ttl_s = ttl_s
+        self._admission = admission
+        self._jobs: "OrderedDict[str, PlanJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._purged_at = 0.0
+        self._job_ewma: Optional[float] = None
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.n_workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers (jobs still queued or running are marked failed)."""
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                job.status, job.error, job.finished = FAILED, "server shutting down", time.time()
+
+    def _purge(self) -> None:
+        now = time.time()
+        if now - self._purged_at < 1.0:
+            return
+        self._purged_at = now
+        for job_id in [j.id for j in self._jobs.values() if j.finished and now - j.finished > self.ttl_s]:
+            del self._jobs[job_id]
+
+    def submit(self, params: Dict[str, Any]) -> PlanJob:
+        """Queue a plan (``plan_itinerary_events`` keyword arguments) and return its job.
+
+        Raises:
+            Overloaded: 429 when the job queue is full.
+        """
+        self._start()
+        self._purge()
+        job = PlanJob(params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            per_job = self._job_ewma or 1.0
+            retry = max(1, math.ceil(per_job * self._queue.qsize() / self.n_workers))
+            raise Overloaded(429, retry, "too many queued plan jobs") from None
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def _admit(self) -> Callable[[], None]:
+        """Wait for an admission slot; a job was already accepted, so it is never rejected here."""
+        if self._admission is None:
+            return lambda: None
+        return await self._admission.acquire(background=True)
+
+    async def _work(self) -> None:
+        while True:
+            job: PlanJob = await self._queue.get()
+            try:
+                release = await self._admit()
+            except asyncio.CancelledError:
+                self._queue.task_done()
+                raise
+            job.status = RUNNING
+            start = time.monotonic()
+            try:
+                async for part, value in plan_itinerary_events(**job.params):
+                    job.parts_done.append(part)
+                    if part == "itinerary":
+                        job.result = value
+                job.status = DONE
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Plan job %s failed: %s", job.id, e)
+                job.status, job.error = FAILED, str(e)
+            finally:
+                release()
+                job.finished = time.time()
+                took = time.monotonic() - start
+                self._job_ewma = took if self._job_ewma is None else 0.8 * self._job_ewma + 0.2 * took
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
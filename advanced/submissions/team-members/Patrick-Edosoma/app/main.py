@@ -1,14 +1,64 @@
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 
-from app.schemas import PlanRequest, PlanResponse
-from app.core import plan_trip_core
+from app.schemas import (
+    AirportSuggestion,
+    FlexiblePlanRequest,
+    FlexiblePlanResponse,
+    OptimizedPlanResponse,
+    OptimizePlanRequest,
+    PlanBatchRequest,
+    PlanJobStatus,
+    PlanRequest,
+    PlanResponse,
+)
+from app.core import (
+    plan_flexible_async,
+    plan_itineraries_async,
+    plan_itinerary_async,
+    plan_itinerary_events,
+    plan_optimized_async,
+)
+from app.responses import MSGPACK, itineraries_response, itinerary_response, json_response, sse_event
+from app.jobs import PlanJobs
+from app.metrics import render_metrics
+from utils.admission import AdmissionControl, Overloaded
+from utils.http_client import aclose_async_client, close_session
+from utils.circuit_breaker import breaker_snapshot
+from utils.airports import suggest_airports
+
+# .env only fills in variables the environment does not set.
+load_dotenv(override=False)
+
+# Server-side default for PlanRequest.deadline_ms (unset = no overall deadline).
+DEFAULT_DEADLINE_MS = int(os.getenv("PLAN_DEFAULT_DEADLINE_MS", "0")) or None
+# Most trips accepted by one POST /plan/batch.
+PLAN_BATCH_MAX = int(os.getenv("PLAN_BATCH_MAX", "100"))
+# Most (depart, return) pairs one POST /plan/flexible may search.
+FARE_GRID_MAX_CELLS = int(os.getenv("FARE_GRID_MAX_CELLS", "60"))
+
+# Bounds concurrent /plan work (PLAN_MAX_INFLIGHT) and its wait queue (PLAN_MAX_QUEUE).
+PLAN_ADMISSION = AdmissionControl()
+# Background plans for POST /plan/jobs (PLAN_JOB_QUEUE waiting); running jobs hold PLAN_ADMISSION slots.
+PLAN_JOBS = PlanJobs(admission=PLAN_ADMISSION)
+
 
-load_dotenv(override=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await PLAN_JOBS.stop()
+    close_session()
+    await aclose_async_client()
 
-app = FastAPI(title="TripSmith API", version="1.0.0")
+
+app = FastAPI(title="TripSmith API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,17 +72,157 @@ app.add_middleware(
 def health() -> dict:
     return {"status": "ok"}
 
-@app.post("/plan", response_model=PlanResponse)
-def plan(req: PlanRequest):
+@app.get("/providers/health")
+def providers_health() -> dict:
+    return breaker_snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    return render_metrics(PLAN_ADMISSION, PLAN_JOBS)
+
+@app.get("/airports/suggest", response_model=List[AirportSuggestion])
+def airports_suggest(
+    q: str = Query(..., min_length=1, max_length=64, description="Partial IATA code, airport name or city"),
+    limit: int = Query(8, ge=1, le=20),
+) -> list:
+    return [s._asdict() for s in suggest_airports(q, limit)]
+
+def _plan_params(req: PlanRequest) -> dict:
+    """Validate a plan request and map it to ``app.core`` keyword arguments."""
     if req.end_date <= req.start_date:
         raise HTTPException(status_code=400, detail="end_date must be after start_date")
-
-    data = plan_trip_core(
+    deadline_ms = req.deadline_ms or DEFAULT_DEADLINE_MS
+    return dict(
         origin=req.origin.upper(),
         destination=req.destination.upper(),
         start_date=req.start_date,
         end_date=req.end_date,
         budget_per_night=req.budget_per_night,
         interests=req.interests,
+        deadline_s=deadline_ms / 1000 if deadline_ms else None,
+        multi_airport=req.multi_airport,
     )
-    return data
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+
+@app.post("/plan", response_model=PlanResponse, responses={200: {"content": {MSGPACK: {}}}})
+async def plan(req: PlanRequest, accept: Optional[str] = Header(None)):
+    params = _plan_params(req)
+    try:
+        async with PLAN_ADMISSION.slot():
+            it = await plan_itinerary_async(**params)
+    except Overloaded as e:
+        raise _overloaded(e)
+    # Serialized once to bytes (JSON, or MessagePack if the Accept header asks for it).
+    return itinerary_response(it, accept)
+
+@app.post("/plan/batch", response_model=List[PlanResponse], responses={200: {"content": {MSGPACK: {}}}})
+async def plan_batch(req: PlanBatchRequest, accept: Optional[str] = Header(None)):
+    """Plan several trips at once; returns one itinerary per request, in order.
+
+    Searches shared by several trips (same route and dates for flights, same
+    destination and dates for hotels, same destination and interests for POIs)
+    run once for the whole batch. The batch takes one admission slot.
+    """
+    if len(req.requests) > PLAN_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"at most {PLAN_BATCH_MAX} requests per batch")
+    trips = [_plan_params(r) for r in req.requests]
+    try:
+        async with PLAN_ADMISSION.slot():
+            its = await plan_itineraries_async(trips)
+    except Overloaded as e:
+        raise _overloaded(e)
+    return itineraries_response(its, accept)
+
+@app.post("/plan/flexible", response_model=FlexiblePlanResponse)
+async def plan_flexible(req: FlexiblePlanRequest):
+    """Plan on the cheapest dates near the requested ones; also returns the fare grid searched.
+
+    Departures within ``flex_days`` of ``start_date`` and trip lengths from
+    ``min_nights`` to ``max_nights`` are searched concurrently (paced by the
+    provider rate limits), and the itinerary is planned on the cheapest pair.
+    """
+    params = _plan_params(req)
+    nights = (req.end_date - req.start_date).days
+    lo, hi = req.min_nights or nights, req.max_nights or nights
+    if hi < lo:
+        raise HTTPException(status_code=400, detail="max_nights must not be below min_nights")
+    cells = (2 * req.flex_days + 1) * (hi - lo + 1)
+    if cells > FARE_GRID_MAX_CELLS:
+        raise HTTPException(status_code=400, detail=f"{cells} date pairs requested; at most {FARE_GRID_MAX_CELLS}")
+    try:
+        async with PLAN_ADMISSION.slot():
+            plan = await plan_flexible_async(
+                **params, flex_days=req.flex_days, min_nights=req.min_nights, max_nights=req.max_nights
+            )
+    except Overloaded as e:
+        raise _overloaded(e)
+    return json_response(plan)
+
+@app.post("/plan/optimize", response_model=OptimizedPlanResponse)
+async def plan_optimize(req: OptimizePlanRequest):
+    """Choose flight, hotel and activities together for the most value within ``total_budget_usd``.
+
+    Returns the best itinerary plus up to ``alternatives`` runners-up (each with a
+    different hotel); ``within_budget`` is false if nothing fit and the cheapest
+    combinations were returned instead.
+    """
+    params = _plan_params(req)
+    try:
+        async with PLAN_ADMISSION.slot():
+            plan = await plan_optimized_async(
+                **params, total_budget=req.total_budget_usd, alternatives=req.alternatives
+            )
+    except Overloaded as e:
+        raise _overloaded(e)
+    return json_response(plan)
+
+@app.post("/plan/stream", responses={200: {"content": {"text/event-stream": {}}}})
+async def plan_stream(req: PlanRequest):
+    """Stream the plan as Server-Sent Events.
+
+    ``flights``, ``hotels`` and ``pois`` events are sent as each part is ready
+    (fastest provider first), then an ``itinerary`` event with the same body
+    ``POST /plan`` returns. A failure after the stream started ends it with an
+    ``error`` event.
+    """
+    params = _plan_params(req)
+    try:
+        release = await PLAN_ADMISSION.acquire()
+    except Overloaded as e:
+        raise _overloaded(e)
+
+    async def events():
+        try:
+            async for part, value in plan_itinerary_events(**params):
+                yield sse_event(part, value)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            release()
+
+    # The background task also frees the slot if the client leaves before streaming starts.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release),
+    )
+
+@app.post("/plan/jobs", status_code=202, response_model=PlanJobStatus)
+async def plan_job_submit(req: PlanRequest):
+    """Queue a plan and return its job id at once; poll ``GET /plan/jobs/{id}`` for the result."""
+    try:
+        job = PLAN_JOBS.submit(_plan_params(req))
+    except Overloaded as e:
+        raise _overloaded(e)
+    return json_response(job.view(), status_code=202, headers={"Location": f"/plan/jobs/{job.id}"})
+
+@app.get("/plan/jobs/{job_id}", response_model=PlanJobStatus)
+async def plan_job_status(job_id: str):
+    """Job progress (parts finished so far) and, once done, the same body ``POST /plan`` returns."""
+    job = PLAN_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return json_response(job.view())
@@ -0,0 +1,56 @@
+"""Prometheus text exposition for ``GET /metrics`` (no client library needed)."""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+from app.core import PLAN_CACHE
+from app.jobs import PlanJobs
+from utils.admission import AdmissionControl
+from utils.circuit_breaker import breaker_snapshot
+from utils.rate_limit import RATE_LIMITS
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _family(out: List[str], name: str, kind: str, help_: str, samples: List[Sample]) -> None:
+    out.append(f"# HELP {name} {help_}")
+    out.append(f"# TYPE {name} {kind}")
+    for metric, labels, value in samples:
+        tags = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        out.append(f"{metric}{{{tags}}} {value}" if tags else f"{metric} {value}")
+
+
+def render_metrics(admission: AdmissionControl, jobs: Optional[PlanJobs] = None) -> str:
+    """Admission, plan job, plan cache, provider breaker and rate limit metrics in Prometheus text format."""
+    a = admission.snapshot()
+    c = PLAN_CACHE.stats()
+    out: List[str] = []
+    _family(out, "tripsmith_plan_inflight", "gauge", "Plans being computed.", [("tripsmith_plan_inflight", {}, a["inflight"])])
+    _family(out, "tripsmith_plan_queued", "gauge", "Plan requests waiting for a slot.", [("tripsmith_plan_queued", {}, a["queued"])])
+    _family(out, "tripsmith_plan_max_inflight", "gauge", "Concurrent plan limit.", [("tripsmith_plan_max_inflight", {}, a["max_inflight"])])
+    _family(out, "tripsmith_plan_max_queue", "gauge", "Plan wait queue limit.", [("tripsmith_plan_max_queue", {}, a["max_queue"])])
+    _family(out, "tripsmith_plan_admitted_total", "counter", "Plan requests admitted.",
+            [("tripsmith_plan_admitted_total", {}, a["admitted_total"])])
+    _family(out, "tripsmith_plan_rejected_total", "counter", "Plan requests rejected by admission control.", [
+        ("tripsmith_plan_rejected_total", {"reason": "queue_full"}, a["rejected_queue_full_total"]),
+        ("tripsmith_plan_rejected_total", {"reason": "queue_timeout"}, a["rejected_queue_timeout_total"]),
+    ])
+    _family(out, "tripsmith_plan_service_seconds_avg", "gauge", "Moving average of admitted plan time.",
+            [("tripsmith_plan_service_seconds_avg", {}, a["service_seconds_avg"])])
+    if jobs is not None:
+        _family(out, "tripsmith_plan_jobs", "gauge", "Background plan jobs by status.", [
+            ("tripsmith_plan_jobs", {"status": status}, n) for status, n in jobs.stats().items()
+        ])
+    _family(out, "tripsmith_plan_cache_entries", "gauge", "Itineraries in the plan cache.", [("tripsmith_plan_cache_entries", {}, c["size"])])
+    _family(out, "tripsmith_plan_cache_requests_total", "counter", "Plan cache lookups.", [
+        ("tripsmith_plan_cache_requests_total", {"result": "hit"}, c["hits"]),
+        ("tripsmith_plan_cache_requests_total", {"result": "miss"}, c["misses"]),
+    ])
+    _family(out, "tripsmith_provider_circuit_open", "gauge", "1 while a provider's circuit breaker is not closed.", [
+        ("tripsmith_provider_circuit_open", {"provider": name}, 0 if s["state"] == "closed" else 1)
+        for name, s in breaker_snapshot().items()
+    ])
+    _family(out, "tripsmith_provider_rate_limited_total", "counter", "Provider calls delayed or refused by the rate limit.", [
+        ("tripsmith_provider_rate_limited_total", {"provider": name, "outcome": outcome}, b.snapshot()[outcome])
+        for name, b in RATE_LIMITS.items() for outcome in ("waited", "rejected")
+    ])
+    return "\n".join(out) + "\n"
@@ -0,0 +1,83 @@
+"""Itinerary response encoding for the API.
+
+Itineraries are serialized once, straight to bytes, by pydantic-core's compiled
+serializer for the model (no intermediate ``model_dump()`` dict and no second
+validation against ``PlanResponse``). Clients that send ``Accept: application/msgpack``
+get MessagePack instead when the ``msgpack`` package is installed. Streamed plans
+are sent as Server-Sent Events with the same serializers.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from models import POI, FlightOption, HotelOption, Itinerary
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON is always available
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+_ITINERARY = TypeAdapter(Itinerary)
+_ITINERARIES = TypeAdapter(List[Itinerary])
+_EVENT_ADAPTERS: Dict[str, TypeAdapter] = {
+    "flights": TypeAdapter(List[FlightOption]),
+    "hotels": TypeAdapter(List[HotelOption]),
+    "pois": TypeAdapter(List[POI]),
+    "itinerary": _ITINERARY,
+}
+_ANY = TypeAdapter(Any)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Whether the Accept header asks for MessagePack (and we can produce it)."""
+    if msgpack is None or not accept:
+        return False
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        if media.lower() not in _MSGPACK_TYPES:
+            continue
+        q = next((p[2:] for p in params if p.lower().startswith("q=")), "1")
+        try:
+            if float(q) > 0:
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+def itinerary_bytes(it: Itinerary, media_type: str = JSON) -> bytes:
+    """Encode an itinerary as JSON or MessagePack bytes."""
+    if media_type == MSGPACK:
+        return msgpack.packb(_ITINERARY.dump_python(it, mode="json"), use_bin_type=True)
+    return _ITINERARY.dump_json(it)
+
+
+def itinerary_response(it: Itinerary, accept: Optional[str] = None) -> Response:
+    """Response for ``it`` in the representation the client negotiated."""
+    media_type = MSGPACK if wants_msgpack(accept) else JSON
+    return Response(itinerary_bytes(it, media_type), media_type=media_type, headers={"Vary": "Accept"})
+
+
+def itineraries_response(its: List[Itinerary], accept: Optional[str] = None) -> Response:
+    """Like :func:`itinerary_response`, for a list of itineraries (``POST /plan/batch``)."""
+    if wants_msgpack(accept):
+        body = msgpack.packb(_ITINERARIES.dump_python(its, mode="json"), use_bin_type=True)
+        return Response(body, media_type=MSGPACK, headers={"Vary": "Accept"})
+    return Response(_ITINERARIES.dump_json(its), media_type=JSON, headers={"Vary": "Accept"})
+
+
+def sse_event(event: str, value: Any) -> bytes:
+    """One Server-Sent Event whose data is ``value`` as single-line JSON."""
+    data = _EVENT_ADAPTERS.get(event, _ANY).dump_json(value)
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+def json_response(value: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response for plain data that may contain models (e.g. a job view with its itinerary)."""
+    return Response(_ANY.dump_json(value), status_code=status_code, media_type=JSON, headers=headers)
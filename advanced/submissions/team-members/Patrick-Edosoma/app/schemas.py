@@ -39,6 +39,24 @@ class PlanRequest(BaseModel):
     end_date: date
     budget_per_night: float = 120.0
     interests: List[str] = ["museum", "food"]
+    deadline_ms: Optional[int] = Field(
+        None, gt=0, description="Overall time budget; slow parts fall back to cached or sample data"
+    )
+    multi_airport: bool = Field(
+        False, description="Also search the other airports serving the origin and destination cities"
+    )
+
+class FlexiblePlanRequest(PlanRequest):
+    flex_days: int = Field(3, ge=0, le=7, description="Search departures up to this many days either side of start_date")
+    min_nights: Optional[int] = Field(None, ge=1, le=30, description="Shortest trip searched (default: requested length)")
+    max_nights: Optional[int] = Field(None, ge=1, le=30, description="Longest trip searched (default: requested length)")
+
+class OptimizePlanRequest(PlanRequest):
+    total_budget_usd: float = Field(..., gt=0, description="Budget for flight, hotel and activities together")
+    alternatives: int = Field(2, ge=0, le=5, description="Runner-up itineraries to return")
+
+class PlanBatchRequest(BaseModel):
+    requests: List[PlanRequest] = Field(..., min_length=1, description="Trips to plan; one itinerary each, in order")
 
 class PlanResponse(BaseModel):
     origin: str
@@ -50,3 +68,38 @@ class PlanResponse(BaseModel):
     daily_plan: List[DayPlan]
     total_estimated_cost_usd: float
     rationale: str
+
+class FareCell(BaseModel):
+    depart_date: date
+    return_date: date
+    nights: int
+    price_usd: float
+    airline: str
+    duration_minutes: int
+    sample: bool = False
+
+class FlexiblePlanResponse(BaseModel):
+    itinerary: PlanResponse
+    best: Optional[FareCell] = None
+    grid: List[FareCell] = []
+
+class OptimizedPlanResponse(BaseModel):
+    itinerary: PlanResponse
+    alternatives: List[PlanResponse] = []
+    within_budget: bool = True
+
+class PlanJobStatus(BaseModel):
+    id: str
+    status: str = Field(..., description="queued, running, done or failed")
+    parts_done: List[str] = []
+    progress: float = 0.0
+    result: Optional[PlanResponse] = None
+    error: Optional[str] = None
+
+class AirportSuggestion(BaseModel):
+    iata: str
+    name: str
+    city: str
+    country: str
+    type: str
+    score: float
@@ -1,7 +1,7 @@
 # app_gradio.py
 from __future__ import annotations
 
-import os, json
+import os, json, atexit
 from datetime import date, datetime
 from typing import List, Optional
 
@@ -15,9 +15,10 @@ import google.generativeai as genai
 except Exception:
     GEMINI_AVAILABLE = False
 
-from controller.planner import Planner
-from utils.airports import normalize_to_iata
+from app.core import plan_itinerary
+from utils.airports import resolve_airport, suggest_airports
 from utils.logging_config import setup_logging
+from utils.http_client import close_session
 
 load_dotenv(dotenv_path=os.path.join(os.getcwd(), ".env"), override=True)
 setup_logging()
@@ -189,11 +190,14 @@ def plan(origin: str, destination: str, country_hint: str,
         return ("❌ Budget per night must be a non-negative number.", "", "", "", "", "", "", "")
     if end_date <= start_date:
         return ("❌ End date must be after start date.", "", "", "", "", "", "", "")
-    o = normalize_to_iata(origin)
-    d = normalize_to_iata(destination, country_hint or None)
+    o = resolve_airport(origin)
+    d = resolve_airport(destination, country_hint or None)
+    if not o or not d:
+        bad = origin if not o else destination
+        return (f"❌ Couldn't find an airport for “{bad}”. {airport_hint(bad)}", "", "", "", "", "", "", "")
     interests = interests_list or []
 
-    it = Planner().plan_trip(
+    it = plan_itinerary(
         origin=o, destination=d, start_date=start_date, end_date=end_date,
         budget_per_night=budget_val, interests=interests,
     )
@@ -221,12 +225,22 @@ def plan(origin: str, destination: str, country_hint: str,
 
     return ("", summary, overview, narrative, origin_mapping_text, flights_md, hotels_md, days_md)
 
+def airport_hint(text: str) -> str:
+    """One-line list of airport suggestions for partially typed input."""
+    hits = suggest_airports(text or "", limit=5) if (text or "").strip() else []
+    if not hits:
+        return ""
+    return "Did you mean: " + " · ".join(f"**{h.iata}** {h.name} ({h.city})" for h in hits)
+
 with gr.Blocks(title="TripSmith — Multi-Agent Travel Planner") as demo:
     gr.Markdown("# TripSmith — Multi-Agent Travel Planner")
 
     with gr.Row():
         origin = gr.Textbox(value="ABV", label="Origin (IATA or city)")
         destination = gr.Textbox(value="LOS", label="Destination (IATA or city)")
+    airport_hint_md = gr.Markdown()
+    origin.input(airport_hint, inputs=origin, outputs=airport_hint_md, show_progress="hidden")
+    destination.input(airport_hint, inputs=destination, outputs=airport_hint_md, show_progress="hidden")
 
     country_hint = gr.Textbox(value="Nigeria", label="(Optional) Destination country hint")
 
@@ -257,5 +271,7 @@ with gr.Blocks(title="TripSmith — Multi-Agent Travel Planner") as demo:
 
     demo.queue()
 
+atexit.register(close_session)
+
 if __name__ == "__main__":
     demo.launch(server_name="0.0.0.0", server_port=7860)
@@ -15,9 +15,9 @@ import google.generativeai as genai
 except Exception:
     GEMINI_AVAILABLE = False
 
-from controller.planner import Planner
+from app.core import plan_itinerary
 from utils.logging_config import setup_logging
-from utils.airports import normalize_to_iata 
+from utils.airports import resolve_airport, suggest_airports
 
 try:
     from babel.dates import format_date as _babel_format  
@@ -196,13 +196,19 @@ if submitted:
         st.error("End date must be after start date.")
         st.stop()
 
-    o = normalize_to_iata(origin)
-    d = normalize_to_iata(destination, country_hint or None)
+    o = resolve_airport(origin)
+    d = resolve_airport(destination, country_hint or None)
+    for typed, code in ((origin, o), (destination, d)):
+        if not code:
+            hits = suggest_airports(typed, limit=5) if typed.strip() else []
+            hint = " Did you mean: " + ", ".join(f"{h.iata} ({h.name}, {h.city})" for h in hits) if hits else ""
+            st.error(f"Couldn't find an airport for “{typed}”.{hint}")
+            st.stop()
     if o != origin or d != destination:
         st.info(f"Converted inputs → origin: {o}, destination: {d}")
 
     with st.spinner("Planning your trip…"):
-        it = Planner().plan_trip(
+        it = plan_itinerary(
             origin=o,
             destination=d,
             start_date=start_date,
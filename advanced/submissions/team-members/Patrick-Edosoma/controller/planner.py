@@ -1,15 +1,36 @@
 from __future__ import annotations
 from datetime import date, timedelta
-from typing import List, Tuple, Set
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+import asyncio
 import logging
+import os
 
-from models import FlightOption, HotelOption, Itinerary, DayPlan, POI
+from models import FareCell, FlightOption, HotelOption, Itinerary, DayPlan, OptimizedPlan, POI
+from agents.base import Agent
 from agents.flight_agent import FlightAgent
 from agents.hotel_agent import HotelAgent
 from agents.poi_agent import POIAgent
+from utils.search_providers import fare_dates, mock_flight_search, mock_hotel_search, mock_poi_search
+from utils.deadline import Deadline
+from utils.option_table import FlightTable, HotelTable
+from utils.trip_optimizer import Selection, optimize_trip
 
 logger = logging.getLogger(__name__)
 
+M = TypeVar("M")
+
+# Order in which parts that finish together are reported.
+_PARTS = ("flights", "hotels", "pois")
+
+AGENT_TIMEOUT_S = float(os.getenv("PLANNER_AGENT_TIMEOUT_S", "30"))
+# Time held back from a request deadline for ranking and itinerary assembly.
+ASSEMBLY_RESERVE_S = 0.05
+# Activities scheduled per day.
+POIS_PER_DAY = 2
+# Distinct provider sub-queries a batch plan runs at once.
+PLAN_BATCH_CONCURRENCY = int(os.getenv("PLAN_BATCH_CONCURRENCY", "8"))
+
 
 class Planner:
     """Central controller that queries agents and assembles an itinerary."""
@@ -19,18 +40,6 @@ class Planner:
         self.hotel_agent = HotelAgent()
         self.poi_agent = POIAgent()
 
-    def _dedupe_flights(self, flights: List[FlightOption]) -> List[FlightOption]:
-        """Drop near-duplicates by (airline, rounded price, duration)."""
-        seen: Set[Tuple[str, float, int]] = set()
-        out: List[FlightOption] = []
-        for f in flights:
-            key = (f.airline or "XX", round(float(f.price_usd or 0.0), 2), int(f.duration_minutes or 0))
-            if key in seen:
-                continue
-            seen.add(key)
-            out.append(f)
-        return out
-
     def _rotate_pois(self, pois: List[POI], days: int, per_day: int = 2) -> List[List[POI]]:
         """Distribute POIs across days, rotating so we don’t show the same 2 each day."""
         if not pois:
@@ -51,30 +60,458 @@ class Planner:
         end_date: date,
         budget_per_night: float,
         interests: List[str],
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> Itinerary:
+        """Produce a complete itinerary using centralized orchestration.
+
+        With a ``deadline``, the agents run one after another on shares of the
+        remaining time (a third for flights, half of what is left for hotels,
+        the rest for POIs); parts that run out fall back to cached or sample data
+        and are named in the rationale. ``multi_airport`` searches flights from and to
+        every airport serving the two cities.
+        """
+        deadline = deadline or Deadline()
+
+        flights = self.flight_agent.search(
+            origin, destination, start_date, end_date, deadline=deadline.child(1 / 3, ASSEMBLY_RESERVE_S),
+            multi_airport=multi_airport,
+        )
+        hotels = self.hotel_agent.search(
+            destination, start_date, end_date, budget_per_night, deadline=deadline.child(1 / 2, ASSEMBLY_RESERVE_S)
+        )
+        pois = self.poi_agent.search(destination, interests, deadline=deadline.child(1.0, ASSEMBLY_RESERVE_S))
+        return self._build_itinerary(origin, destination, start_date, end_date, flights, hotels, pois, deadline)
+
+    async def _run_agent(
+        self,
+        agent: Agent,
+        part: str,
+        deadline: Deadline,
+        timeout: float,
+        fallback: Callable[[], List[M]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> List[M]:
+        """Await an agent, substituting fallback data on timeout or error."""
+        return await self._guard(agent, part, deadline, timeout, fallback, partial(agent.search_async, *args, **kwargs))
+
+    async def _guard(
+        self,
+        agent: Agent,
+        part: str,
+        deadline: Deadline,
+        timeout: float,
+        fallback: Callable[[], M],
+        call: Callable[..., Awaitable[M]],
+    ) -> M:
+        """Await ``call(deadline=child)`` for ``agent``, substituting ``fallback()`` on timeout or error."""
+        child = deadline.child(1.0, ASSEMBLY_RESERVE_S)
+        left = child.remaining()
+        if left is not None:
+            # Providers give up at the child deadline and serve cached data; the
+            # reserve gives them time to do so before we cut the agent off.
+            timeout = min(timeout, left + ASSEMBLY_RESERVE_S / 2)
+        try:
+            return await asyncio.wait_for(call(deadline=child), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s timed out after %.2fs; using fallback data.", agent.name, timeout)
+            deadline.note_degraded(part, "timed out; used sample data")
+        except Exception as e:
+            logger.warning("%s failed (%s); using fallback data.", agent.name, e)
+            deadline.note_degraded(part, "agent error; used sample data")
+        return fallback()
+
+    async def plan_trip_async(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        budget_per_night: float,
+        interests: List[str],
+        agent_timeout: float = AGENT_TIMEOUT_S,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> Itinerary:
+        """Produce the same itinerary as :meth:`plan_trip`, querying all agents concurrently.
+
+        Args:
+            origin: Origin IATA code.
+            destination: Destination IATA code.
+            start_date: Outbound date.
+            end_date: Return date.
+            budget_per_night: Nightly hotel budget in USD.
+            interests: POI categories of interest.
+            agent_timeout: Seconds each agent may take before its fallback data is used.
+            deadline: Optional overall time budget; every agent may use all of it
+                (minus a small assembly reserve) since they run concurrently.
+            multi_airport: Search flights between every airport serving the two cities.
+
+        Returns:
+            Itinerary: Assembled from whichever agents answered in time; agents that
+            timed out or failed contribute cached or mock results instead, and are
+            named in the rationale.
+
+        Notes:
+            Latency is bounded by the slowest agent (or ``agent_timeout``) rather than
+            the sum of all three. Agents use the native async provider clients, so
+            no threadpool thread is held while waiting on providers.
+        """
+        it = None
+        async for part, value in self.plan_trip_events(
+            origin, destination, start_date, end_date, budget_per_night, interests,
+            agent_timeout=agent_timeout, deadline=deadline, multi_airport=multi_airport,
+        ):
+            if part == "itinerary":
+                it = value
+        return it
+
+    async def plan_trip_events(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        budget_per_night: float,
+        interests: List[str],
+        agent_timeout: float = AGENT_TIMEOUT_S,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Run the agents concurrently and yield each part as soon as it is ready.
+
+        Arguments are as for :meth:`plan_trip_async`.
+
+        Yields:
+            Tuple[str, Any]: ``("flights", List[FlightOption])``, ``("hotels",
+            List[HotelOption])`` and ``("pois", List[POI])`` in completion order
+            (flights and hotels already ranked as in the itinerary), then
+            ``("itinerary", Itinerary)``.
+
+        Notes:
+            Agents still running when the consumer stops iterating (e.g. a client
+            disconnects) are cancelled.
+        """
+        deadline = deadline or Deadline()
+        tasks = {
+            asyncio.ensure_future(self._run_agent(
+                self.flight_agent,
+                "flights",
+                deadline,
+                agent_timeout,
+                lambda: mock_flight_search(origin, destination, start_date, end_date),
+                origin, destination, start_date, end_date,
+                multi_airport=multi_airport,
+            )): "flights",
+            asyncio.ensure_future(self._run_agent(
+                self.hotel_agent,
+                "hotels",
+                deadline,
+                agent_timeout,
+                lambda: mock_hotel_search(destination, start_date, end_date, budget_per_night),
+                destination, start_date, end_date, budget_per_night,
+            )): "hotels",
+            asyncio.ensure_future(self._run_agent(
+                self.poi_agent,
+                "pois",
+                deadline,
+                agent_timeout,
+                lambda: mock_poi_search(destination, interests),
+                destination, interests,
+            )): "pois",
+        }
+        results: Dict[str, Any] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: _PARTS.index(tasks[t])):
+                    part = tasks[task]
+                    results[part] = task.result()
+                    if part == "flights":
+                        yield part, self._rank_flights(results[part])
+                    elif part == "hotels":
+                        yield part, self._rank_hotels(results[part])
+                    else:
+                        yield part, results[part]
+        finally:
+            for task in pending:
+                task.cancel()
+        yield "itinerary", self._build_itinerary(
+            origin, destination, start_date, end_date, results["flights"], results["hotels"], results["pois"], deadline
+        )
+
+    async def plan_batch_async(
+        self,
+        trips: Sequence[Dict[str, Any]],
+        agent_timeout: float = AGENT_TIMEOUT_S,
+        concurrency: int = PLAN_BATCH_CONCURRENCY,
+    ) -> List[Itinerary]:
+        """Plan many trips, running each distinct provider sub-query only once.
+
+        Args:
+            trips: One dict of :meth:`plan_trip_async` keyword arguments per trip
+                (``origin`` to ``interests``, optionally ``deadline`` and ``multi_airport``).
+            agent_timeout: Seconds each sub-query may take before its fallback data is used.
+            concurrency: Sub-queries in flight at once.
+
+        Returns:
+            List[Itinerary]: One per trip, in order, each as :meth:`plan_trip_async`
+            would build it.
+
+        Notes:
+            Flights are shared per (route, dates, multi_airport), hotel candidates per
+            (destination, dates) with each trip's budget applied afterwards, and POIs
+            per (destination, interests), so 50 trips to 5 destinations on the same
+            dates cost 5 hotel searches. A sub-query runs on the deadline of the first
+            trip that needs it; its degraded notes are copied to every trip using it.
+        """
+        sem = asyncio.Semaphore(max(concurrency, 1))
+        queries: Dict[Tuple[Any, ...], "asyncio.Future[Any]"] = {}
+        notes: Dict[Tuple[Any, ...], Deadline] = {}
+
+        def query(key: Tuple[Any, ...], deadline: Deadline, agent: Agent, fallback: Callable[[], Any],
+                  call: Callable[..., Awaitable[Any]]) -> None:
+            if key in queries:
+                return
+            # Own notes list, same time budget as the trip that asked first.
+            sub = notes[key] = Deadline(deadline.remaining())
+
+            async def run() -> Any:
+                async with sem:
+                    return await self._guard(agent, key[0], sub, agent_timeout, fallback, call)
+
+            queries[key] = asyncio.ensure_future(run())
+
+        plans = []
+        for trip in trips:
+            o, dst, start, end = trip["origin"], trip["destination"], trip["start_date"], trip["end_date"]
+            interests, multi = list(trip["interests"]), trip.get("multi_airport", False)
+            deadline = trip.get("deadline") or Deadline()
+            keys = (
+                ("flights", o, dst, start, end, multi),
+                ("hotels", dst, start, end),
+                ("pois", dst, tuple(interests)),
+            )
+            query(keys[0], deadline, self.flight_agent, partial(mock_flight_search, o, dst, start, end),
+                  partial(self.flight_agent.search_async, o, dst, start, end, multi_airport=multi))
+            query(keys[1], deadline, self.hotel_agent, lambda: None,
+                  partial(self.hotel_agent.candidates_async, dst, start, end))
+            query(keys[2], deadline, self.poi_agent, partial(mock_poi_search, dst, interests),
+                  partial(self.poi_agent.search_async, dst, interests))
+            plans.append((trip, deadline, keys))
+
+        try:
+            await asyncio.gather(*queries.values())
+        finally:
+            for task in queries.values():
+                task.cancel()
+
+        itineraries = []
+        for trip, deadline, (fkey, hkey, pkey) in plans:
+            for key in (fkey, hkey, pkey):
+                deadline.merge_degraded(notes[key])
+            hotels = self.hotel_agent.select(
+                queries[hkey].result(), trip["destination"], trip["start_date"], trip["end_date"], trip["budget_per_night"]
+            )
+            itineraries.append(self._build_itinerary(
+                trip["origin"], trip["destination"], trip["start_date"], trip["end_date"],
+                queries[fkey].result(), hotels, queries[pkey].result(), deadline,
+            ))
+        return itineraries
+
+    async def cheapest_dates_async(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        flex_days: int,
+        min_nights: Optional[int] = None,
+        max_nights: Optional[int] = None,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> Tuple[List[FareCell], Optional[FareCell]]:
+        """Search fares around the requested dates (the flexible-date mode).
+
+        Args:
+            origin: Origin IATA code.
+            destination: Destination IATA code.
+            start_date: Requested outbound date.
+            end_date: Requested return date.
+            flex_days: Departures up to this many days either side of ``start_date``.
+            min_nights: Shortest trip searched (default: the requested length).
+            max_nights: Longest trip searched (default: the requested length).
+            deadline: Optional time budget for the whole grid.
+            multi_airport: Search every airport serving the two cities.
+
+        Returns:
+            Tuple[List[FareCell], Optional[FareCell]]: The price grid (past departures
+            are skipped) and its best cell: cheapest provider fare, closest to the
+            requested dates on ties; None if the grid is empty.
+        """
+        dates = fare_dates(start_date, end_date, flex_days, min_nights, max_nights, earliest=date.today())
+        grid = await self.flight_agent.fare_grid_async(
+            origin, destination, dates, deadline=deadline, multi_airport=multi_airport
+        )
+        nights = (end_date - start_date).days
+        best = min(
+            grid,
+            key=lambda c: (c.sample, c.price_usd, abs((c.depart_date - start_date).days), abs(c.nights - nights)),
+            default=None,
+        )
+        return grid, best
+
+    async def optimize_trip_async(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        budget_per_night: float,
+        interests: List[str],
+        total_budget: float,
+        alternatives: int = 2,
+        agent_timeout: float = AGENT_TIMEOUT_S,
+        deadline: Optional[Deadline] = None,
+        multi_airport: bool = False,
+    ) -> OptimizedPlan:
+        """Choose flight, hotel and activities together to get the most out of ``total_budget``.
+
+        Args:
+            origin: Origin IATA code.
+            destination: Destination IATA code.
+            start_date: Outbound date.
+            end_date: Return date.
+            budget_per_night: Nightly hotel budget in USD (filters hotel candidates).
+            interests: POI categories of interest.
+            total_budget: Budget in USD for flight, hotel nights and activities together.
+            alternatives: Runner-up itineraries to return as well.
+            agent_timeout: Seconds each agent may take before its fallback data is used.
+            deadline: Optional overall time budget.
+            multi_airport: Search flights between every airport serving the two cities.
+
+        Returns:
+            OptimizedPlan: The best-scoring itinerary and up to ``alternatives`` more.
+
+        Notes:
+            Agents return every candidate they found (not just the top 5), and
+            :func:`utils.trip_optimizer.optimize_trip` scores all flight/hotel pairs
+            at once and fills each pair's leftover budget with the most valuable
+            activities (at most two a day, each at most once).
+        """
+        deadline = deadline or Deadline()
+        flights, hotels, pois = await asyncio.gather(
+            self._run_agent(
+                self.flight_agent, "flights", deadline, agent_timeout,
+                partial(mock_flight_search, origin, destination, start_date, end_date),
+                origin, destination, start_date, end_date, multi_airport=multi_airport, limit=None,
+            ),
+            self._run_agent(
+                self.hotel_agent, "hotels", deadline, agent_timeout,
+                partial(mock_hotel_search, destination, start_date, end_date, budget_per_night),
+                destination, start_date, end_date, budget_per_night, limit=None,
+            ),
+            self._run_agent(
+                self.poi_agent, "pois", deadline, agent_timeout,
+                partial(mock_poi_search, destination, interests),
+                destination, interests,
+            ),
+        )
+        flight_table, hotel_table = FlightTable(flights).dedupe(), HotelTable(hotels)
+        days = max((end_date - start_date).days, 0)
+        picks = optimize_trip(
+            flight_table, hotel_table, pois, days, days * POIS_PER_DAY, total_budget, interests, k=1 + alternatives
+        )
+        if not picks:
+            it = self._build_itinerary(origin, destination, start_date, end_date, flights, hotels, pois, deadline)
+            return OptimizedPlan.model_construct(itinerary=it, alternatives=[], within_budget=False)
+
+        its = [
+            self._optimized_itinerary(
+                origin, destination, start_date, end_date, flight_table, hotel_table, pois, pick, total_budget, deadline
+            )
+            for pick in picks
+        ]
+        return OptimizedPlan.model_construct(itinerary=its[0], alternatives=its[1:], within_budget=picks[0].within_budget)
+
+    def _optimized_itinerary(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        flights: FlightTable,
+        hotels: HotelTable,
+        pois: List[POI],
+        pick: Selection,
+        total_budget: float,
+        deadline: Deadline,
+    ) -> Itinerary:
+        """Itinerary for one optimizer pick: its flight and hotel first, its activities spread over the days."""
+        flight, hotel = flights.items[pick.flight], hotels.items[pick.hotel]
+        flights_kept = [flight] + [f for f in self._rank_flights(flights.items) if f is not flight][:4]
+        hotels_kept = [hotel] + [h for h in self._rank_hotels(hotels.items) if h is not hotel][:4]
+        chosen = [pois[i] for i in pick.pois]
+        daily = [
+            DayPlan.model_construct(
+                date=start_date + timedelta(days=d),
+                activities=chosen[d * POIS_PER_DAY:(d + 1) * POIS_PER_DAY],
+                free_time_minutes=240,
+            )
+            for d in range(max((end_date - start_date).days, 0))
+        ]
+        if pick.within_budget:
+            rationale = (
+                f"Best value within the ${total_budget:,.0f} budget: {flight.airline} flight at "
+                f"${flight.price_usd:,.0f} ({flight.duration_minutes // 60}h{flight.duration_minutes % 60:02d}), "
+                f"{hotel.name} (rated {hotel.rating:g}, ${hotel.nightly_rate_usd:,.0f}/night) and "
+                f"{len(chosen)} activities for ${pick.cost:,.0f} in total."
+            )
+        else:
+            rationale = (
+                f"Nothing fits the ${total_budget:,.0f} budget; this is the cheapest combination found "
+                f"(${pick.cost:,.0f}), with free activities only."
+            )
+        return self._itinerary(
+            origin, destination, start_date, end_date, flights_kept, hotels_kept, daily, rationale, deadline
+        )
+
+    @staticmethod
+    def _rank_flights(flights: List[FlightOption]) -> List[FlightOption]:
+        # Drop near-duplicates by (route, airline, price to the cent, duration), keep the cheapest.
+        return FlightTable(flights).dedupe().rank(5).models()
+
+    @staticmethod
+    def _rank_hotels(hotels: List[HotelOption]) -> List[HotelOption]:
+        return HotelTable(hotels).rank(5).models()
+
+    def _build_itinerary(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        flights: List[FlightOption],
+        hotels: List[HotelOption],
+        pois: List[POI],
+        deadline: Optional[Deadline] = None,
     ) -> Itinerary:
-        """Produce a complete itinerary using centralized orchestration."""
+        """Rank agent results and assemble them into an itinerary.
 
-        flights_payload = self.flight_agent.run(origin, destination, start_date, end_date)
-        flights = [FlightOption(**f) for f in flights_payload.get("flights", [])]
+        The options are already validated, so they are used as-is (day plans are
+        built with ``model_construct``) rather than dumped and re-validated.
+        """
         logger.info("Found %d flight options (raw)", len(flights))
 
-        flights = self._dedupe_flights(flights)
-        flights_sorted = sorted(flights, key=lambda x: (x.price_usd or 9e9, x.duration_minutes or 9e9))
-        flights_kept = flights_sorted[:5]
+        flights_kept = self._rank_flights(flights)
         logger.info("Keeping %d flight options (sorted)", len(flights_kept))
 
-        hotels_payload = self.hotel_agent.run(destination, start_date, end_date, budget_per_night)
-        hotels = [HotelOption(**h) for h in hotels_payload.get("hotels", [])]
         logger.info("Found %d hotel options (raw)", len(hotels))
 
-        hotels_sorted = sorted(
-            hotels,
-            key=lambda h: ((h.nightly_rate_usd or 9e9), -(h.rating or 0.0)),
-        )
-        hotels_kept = hotels_sorted[:5]
+        hotels_kept = self._rank_hotels(hotels)
         logger.info("Keeping %d hotel options (sorted)", len(hotels_kept))
-        poi_payload = self.poi_agent.run(destination, interests)
-        pois = [POI(**p) for p in poi_payload.get("pois", [])]
         logger.info("Found %d POIs", len(pois))
 
         days = max((end_date - start_date).days, 0)
@@ -82,16 +519,40 @@ class Planner:
         rotated = self._rotate_pois(pois, days=days, per_day=2)
         cur = start_date
         for idx in range(days):
-            daily.append(DayPlan(date=cur, activities=rotated[idx], free_time_minutes=240))
+            daily.append(DayPlan.model_construct(date=cur, activities=rotated[idx], free_time_minutes=240))
             cur += timedelta(days=1)
 
+        return self._itinerary(
+            origin, destination, start_date, end_date, flights_kept, hotels_kept, daily,
+            "Kept the top 5 cheapest flight options (deduped) and top 5 hotels "
+            "within budget tolerance; rotated POIs per day to avoid repetition.",
+            deadline,
+        )
+
+    def _itinerary(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        flights: List[FlightOption],
+        hotels: List[HotelOption],
+        daily: List[DayPlan],
+        rationale: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Itinerary:
+        """Itinerary around the first flight and hotel.
+
+        Activities are costed once each, and only if scheduled (rotation can show one on several days).
+        """
         est_cost = 0.0
-        if flights_kept:
-            est_cost += float(flights_kept[0].price_usd or 0.0)
+        if flights:
+            est_cost += float(flights[0].price_usd or 0.0)
         nights = max((end_date - start_date).days, 0)
-        if hotels_kept:
-            est_cost += nights * float(hotels_kept[0].nightly_rate_usd or 0.0)
-        est_cost += sum(float(p.price_estimate_usd or 0.0) for p in pois)
+        if hotels:
+            est_cost += nights * float(hotels[0].nightly_rate_usd or 0.0)
+        scheduled = {(p.title, p.link): p for day in daily for p in day.activities}
+        est_cost += sum(float(p.price_estimate_usd or 0.0) for p in scheduled.values())
         est_cost = round(est_cost, 2)
 
         it = Itinerary(
@@ -99,13 +560,12 @@ class Planner:
             destination=destination,
             start_date=start_date,
             end_date=end_date,
-            flights=flights_kept,
-            hotels=hotels_kept,
+            flights=flights,
+            hotels=hotels,
             daily_plan=daily,
             total_estimated_cost_usd=est_cost,
-            rationale=(
-                "Kept the top 5 cheapest flight options (deduped) and top 5 hotels "
-                "within budget tolerance; rotated POIs per day to avoid repetition."
-            ),
+            rationale=rationale,
         )
+        if deadline is not None and deadline.degraded:
+            it.rationale += " Degraded: " + "; ".join(deadline.degraded) + "."
         return it
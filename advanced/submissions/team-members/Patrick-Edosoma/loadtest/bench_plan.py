@@ -0,0 +1,306 @@
+"""Open-loop load test for ``POST /plan``.
+
+Starts ``app.main:app`` under uvicorn, backed either by the local provider
+stand-ins (``--providers fake``, see fake_providers.py) or by the built-in mocks
+(``--providers mock``). It then sends /plan requests at a fixed arrival rate and
+writes a JSON report: latency percentiles, throughput, error rate and server
+memory.
+
+    python -m loadtest.bench_plan --rate 20 --duration 30 --out results/main.json
+    python -m loadtest.bench_plan compare results/main.json results/branch.json
+
+Latency is measured from each request's scheduled send time, not from when a
+connection became free. A stalled server therefore shows up in the tail and is
+not hidden by a slower send rate.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX: Dict[str, Any] = {
+    "routes": [
+        ["ABV", "LOS"], ["LOS", "LHR"], ["LHR", "JFK"], ["JFK", "CDG"], ["CDG", "FCO"],
+        ["LAX", "NRT"], ["DXB", "LOS"], ["NBO", "JNB"], ["LOS", "ACC"], ["SFO", "LAX"],
+    ],
+    "interests": ["museum", "food", "nightlife", "beaches", "history", "shopping", "parks", "art"],
+    "max_interests": 3,
+    "budgets": [60, 120, 200, 350],
+    "lead_days": [7, 120],
+    "trip_days": [2, 7],
+}
+
+
+def make_payloads(mix: Dict[str, Any], n: int, seed: int) -> List[Dict[str, Any]]:
+    """Build ``n`` /plan bodies drawn from ``mix`` (routes, interests, budgets, date ranges)."""
+    r = random.Random(seed)
+    today = date.today()
+    out = []
+    for _ in range(n):
+        origin, destination = r.choice(mix["routes"])
+        start = today + timedelta(days=r.randint(*mix["lead_days"]))
+        end = start + timedelta(days=r.randint(*mix["trip_days"]))
+        k = r.randint(1, min(mix["max_interests"], len(mix["interests"])))
+        out.append({
+            "origin": origin,
+            "destination": destination,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "budget_per_night": r.choice(mix["budgets"]),
+            "interests": r.sample(mix["interests"], k),
+        })
+    return out
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    i = min(max(int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[i]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of ``pid`` in MiB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def _start(cmd: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout_s: float = 30.0) -> None:
+    t_end = time.monotonic() + timeout_s
+    while time.monotonic() < t_end:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process exited with {proc.returncode} before {url} was ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout_s}s")
+
+
+def server_env(args: argparse.Namespace, cache_path: str) -> Dict[str, str]:
+    """Environment for the app server; the app loads .env without overriding these settings."""
+    env = dict(os.environ)
+    env["PROVIDER_CACHE_PATH"] = cache_path
+    keys = ("AMADEUS_API_KEY", "AMADEUS_API_SECRET", "SERPAPI_API_KEY", "TAVILY_API_KEY")
+    if args.providers == "fake":
+        base = f"http://127.0.0.1:{args.fake_port}"
+        env.update({"AMADEUS_BASE_URL": base, "SERPAPI_BASE_URL": base, "TAVILY_BASE_URL": base})
+        env.update({k: "fake" for k in keys})
+        # The fake providers have no quota; measure the server, not the Amadeus test-tier pacing.
+        env.setdefault("AMADEUS_RATE_PER_S", "0")
+    else:
+        env.update({k: "" for k in keys})  # empty keys -> every search uses its mock
+    return env
+
+
+async def drive(
+    url: str, payloads: List[Dict[str, Any]], rate: float, concurrency: int, timeout_s: float, pid: int
+) -> Dict[str, Any]:
+    """Send ``payloads`` open-loop at ``rate`` req/s and collect per-request results."""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    degraded = 0
+    rss: List[float] = []
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout_s) as client:
+        t0 = time.perf_counter()
+
+        async def one(i: int, body: Dict[str, Any]) -> None:
+            nonlocal degraded
+            scheduled = t0 + i / rate
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0.0))
+            async with sem:
+                try:
+                    resp = await client.post(url, json=body)
+                    statuses[str(resp.status_code)] += 1
+                    if resp.status_code == 200 and "Degraded:" in resp.json().get("rationale", ""):
+                        degraded += 1
+                except httpx.TimeoutException:
+                    statuses["timeout"] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - scheduled)
+
+        async def sample_rss() -> None:
+            while True:
+                v = rss_mb(pid)
+                if v is not None:
+                    rss.append(v)
+                await asyncio.sleep(0.5)
+
+        sampler = asyncio.create_task(sample_rss())
+        await asyncio.gather(*(one(i, b) for i, b in enumerate(payloads)))
+        elapsed = time.perf_counter() - t0
+        sampler.cancel()
+
+    end_rss = rss_mb(pid)
+    lat_ms = sorted(x * 1000.0 for x in latencies)
+    n = len(payloads)
+    ok = statuses.get("200", 0)
+
+    def rnd(v: Optional[float]) -> Optional[float]:
+        return None if v is None else round(v, 2)
+
+    return {
+        "requests": n,
+        "ok": ok,
+        "error_rate": round((n - ok) / n, 4) if n else 0.0,
+        "degraded_share": round(degraded / ok, 4) if ok else 0.0,
+        "status_counts": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": rnd(percentile(lat_ms, 50)),
+            "p95": rnd(percentile(lat_ms, 95)),
+            "p99": rnd(percentile(lat_ms, 99)),
+            "max": rnd(lat_ms[-1] if lat_ms else None),
+            "mean": rnd(sum(lat_ms) / len(lat_ms) if lat_ms else None),
+        },
+        "rss_mb": {
+            "start": rnd(rss[0] if rss else None),
+            "peak": rnd(max(rss) if rss else None),
+            "end": rnd(end_rss),
+        },
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix) as f:
+            mix = {**DEFAULT_MIX, **json.load(f)}
+
+    procs: List[subprocess.Popen] = []
+    cache_dir = tempfile.mkdtemp(prefix="tripsmith-bench-")
+    cache_path = args.cache_path or os.path.join(cache_dir, "provider_cache.sqlite3")
+    try:
+        if args.providers == "fake":
+            fake = _start([sys.executable, "-m", "loadtest.fake_providers", "--port", str(args.fake_port)], dict(os.environ))
+            procs.append(fake)
+            _wait_ready(f"http://127.0.0.1:{args.fake_port}/_fake/stats", fake)
+        app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.app_port), "--log-level", "warning"]
+        app = _start(app_cmd, server_env(args, cache_path))
+        procs.append(app)
+        base = f"http://127.0.0.1:{args.app_port}"
+        _wait_ready(f"{base}/healthz", app)
+
+        if args.warmup:
+            warm = make_payloads(mix, args.warmup, args.seed + 1)
+            asyncio.run(drive(f"{base}/plan", warm, args.rate, args.concurrency, args.timeout, app.pid))
+
+        payloads = make_payloads(mix, max(int(args.rate * args.duration), 1), args.seed)
+        result = asyncio.run(drive(f"{base}/plan", payloads, args.rate, args.concurrency, args.timeout, app.pid))
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    return {
+        "label": args.label,
+        "git_commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "providers": args.providers,
+            "rate_rps": args.rate,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "warmup_requests": args.warmup,
+            "seed": args.seed,
+            "mix": args.mix or "default",
+        },
+        **result,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """Print headline metrics of two reports side by side."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    rows = [("throughput_rps", old["throughput_rps"], new["throughput_rps"]),
+            ("error_rate", old["error_rate"], new["error_rate"])]
+    rows += [(f"latency_ms.{k}", old["latency_ms"][k], new["latency_ms"][k]) for k in ("p50", "p95", "p99")]
+    rows += [("rss_mb.peak", old["rss_mb"]["peak"], new["rss_mb"]["peak"])]
+    print(f"{'metric':<18}{old.get('git_commit') or 'old':>12}{new.get('git_commit') or 'new':>12}{'change':>10}")
+    for name, a, b in rows:
+        change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else "n/a"
+        print(f"{name:<18}{a if a is not None else '-':>12}{b if b is not None else '-':>12}{change:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        if len(argv) != 3:
+            sys.exit("usage: python -m loadtest.bench_plan compare OLD.json NEW.json")
+        compare(argv[1], argv[2])
+        return
+
+    ap = argparse.ArgumentParser(description="Load-test POST /plan.")
+    ap.add_argument("--providers", choices=("fake", "mock"), default="fake",
+                    help="local provider stand-ins or built-in mocks (default: fake)")
+    ap.add_argument("--rate", type=float, default=10.0, help="target requests per second")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    ap.add_argument("--concurrency", type=int, default=200, help="max requests in flight")
+    ap.add_argument("--warmup", type=int, default=0, help="unmeasured requests sent first")
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout (s)")
+    ap.add_argument("--mix", help="JSON file overriding routes/interests/budgets/lead_days/trip_days")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--app-port", type=int, default=8099)
+    ap.add_argument("--fake-port", type=int, default=9100)
+    ap.add_argument("--cache-path", help="provider cache file (default: fresh temp file per run)")
+    ap.add_argument("--label", default="", help="free-form name stored in the report")
+    ap.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
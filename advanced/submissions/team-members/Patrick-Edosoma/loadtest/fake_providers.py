@@ -0,0 +1,206 @@
+"""Local stand-in for the Amadeus, SerpApi and Tavily endpoints TripSmith calls.
+
+Run it and point the app at it:
+
+    python -m loadtest.fake_providers --port 9100
+    AMADEUS_BASE_URL=http://127.0.0.1:9100 SERPAPI_BASE_URL=http://127.0.0.1:9100 \\
+    TAVILY_BASE_URL=http://127.0.0.1:9100 AMADEUS_API_KEY=x AMADEUS_API_SECRET=x \\
+    SERPAPI_API_KEY=x TAVILY_API_KEY=x uvicorn app.main:app
+
+Behaviour is set per provider (``amadeus``, ``serpapi``, ``tavily``) from env vars
+``FAKE_<PROVIDER>_<SETTING>``, falling back to ``FAKE_<SETTING>``:
+
+    LATENCY_MS       median response latency (default 50)
+    LATENCY_P99_MS   99th percentile latency; latencies are log-normal (default 4x median)
+    ERROR_RATE       share of requests answered with HTTP 500 (default 0)
+    RATE_LIMIT_RATE  share of requests answered with HTTP 429 (default 0)
+    HANG_RATE        share of requests that stall for HANG_S seconds (default 0, HANG_S 30)
+    ITEMS            flight offers / hotel properties / POI results per response
+
+Settings can also be changed while running with ``POST /_fake/config`` (same names,
+lower-case, e.g. ``{"tavily": {"error_rate": 0.2}}``); ``GET /_fake/stats`` returns
+request counts per provider and outcome.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import math
+import os
+import random
+import threading
+from collections import Counter
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+PROVIDERS = ("amadeus", "serpapi", "tavily")
+
+_DEFAULT_ITEMS = {"amadeus": 20, "serpapi": 15, "tavily": 5}
+_AIRLINES = ["W3", "P4", "KQ", "ET", "BA", "AF", "LH", "EK", "QR", "TK"]
+_Z99 = 2.326  # standard normal 99th percentile
+
+
+def _env(provider: str, name: str, default: float) -> float:
+    v = os.getenv(f"FAKE_{provider.upper()}_{name}") or os.getenv(f"FAKE_{name}")
+    return float(v) if v else default
+
+
+def _settings_from_env(provider: str) -> Dict[str, float]:
+    median = _env(provider, "LATENCY_MS", 50.0)
+    return {
+        "latency_ms": median,
+        "latency_p99_ms": _env(provider, "LATENCY_P99_MS", median * 4),
+        "error_rate": _env(provider, "ERROR_RATE", 0.0),
+        "rate_limit_rate": _env(provider, "RATE_LIMIT_RATE", 0.0),
+        "hang_rate": _env(provider, "HANG_RATE", 0.0),
+        "hang_s": _env(provider, "HANG_S", 30.0),
+        "items": _env(provider, "ITEMS", _DEFAULT_ITEMS[provider]),
+    }
+
+
+SETTINGS: Dict[str, Dict[str, float]] = {p: _settings_from_env(p) for p in PROVIDERS}
+STATS: Counter = Counter()
+_lock = threading.Lock()
+_rng = random.Random(int(os.getenv("FAKE_SEED", "0")) or None)
+
+
+def sample_latency_s(median_ms: float, p99_ms: float) -> float:
+    """Draw a log-normal latency with the given median and 99th percentile."""
+    if median_ms <= 0:
+        return 0.0
+    sigma = math.log(max(p99_ms, median_ms) / median_ms) / _Z99
+    return _rng.lognormvariate(math.log(median_ms), sigma) / 1000.0
+
+
+async def _respond(provider: str, body: Dict[str, Any]) -> JSONResponse:
+    cfg = SETTINGS[provider]
+    await asyncio.sleep(sample_latency_s(cfg["latency_ms"], cfg["latency_p99_ms"]))
+    roll = _rng.random()
+    if roll < cfg["hang_rate"]:
+        outcome = "hang"
+        await asyncio.sleep(cfg["hang_s"])
+        resp = JSONResponse({"error": "upstream stalled"}, status_code=504)
+    elif roll < cfg["hang_rate"] + cfg["error_rate"]:
+        outcome = "error"
+        resp = JSONResponse({"error": "injected failure"}, status_code=500)
+    elif roll < cfg["hang_rate"] + cfg["error_rate"] + cfg["rate_limit_rate"]:
+        outcome = "rate_limited"
+        resp = JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+    else:
+        outcome = "ok"
+        resp = JSONResponse(body)
+    with _lock:
+        STATS[f"{provider}.{outcome}"] += 1
+    return resp
+
+
+def _seed(*parts: Any) -> random.Random:
+    # Same query -> same payload, so cached and live answers agree across runs.
+    return random.Random("|".join(str(p) for p in parts))
+
+
+def flight_offers(origin: str, destination: str, n: int) -> Dict[str, Any]:
+    """Amadeus flight-offers body with ``n`` offers (fields read by ``_parse_flights``)."""
+    r = _seed("flights", origin, destination)
+    data: List[Dict[str, Any]] = []
+    for i in range(n):
+        h, m = r.randint(1, 18), r.choice((0, 5, 10, 15, 20, 30, 40, 45, 50))
+        data.append({
+            "type": "flight-offer",
+            "id": str(i + 1),
+            "price": {"currency": "USD", "total": "", "grandTotal": f"{r.uniform(90, 1400):.2f}"},
+            "itineraries": [{"duration": f"PT{h}H{m}M"}, {"duration": f"PT{h}H{m}M"}],
+            "validatingAirlineCodes": [r.choice(_AIRLINES)],
+        })
+    return {"meta": {"count": n}, "data": data}
+
+
+def hotel_properties(q: str, n: int) -> Dict[str, Any]:
+    """SerpApi google_hotels body with ``n`` properties (fields read by ``_parse_hotels``)."""
+    r = _seed("hotels", q)
+    props = []
+    for i in range(n):
+        rate = round(r.uniform(35, 420))
+        props.append({
+            "type": "hotel",
+            "name": f"{q.split(',')[0]} Hotel {i + 1}",
+            "overall_rating": round(r.uniform(3.0, 5.0), 1),
+            "rate_per_night": {"lowest": f"${rate}", "extracted_lowest": rate},
+            "price_per_night": {"lowest": rate, "extracted": rate},
+            "link": f"https://example.com/hotels/{i + 1}",
+        })
+    return {"search_metadata": {"status": "Success"}, "properties": props}
+
+
+def poi_results(query: str, n: int) -> Dict[str, Any]:
+    """Tavily search body with ``n`` results (fields read by ``_parse_pois``)."""
+    r = _seed("pois", query)
+    return {
+        "query": query,
+        "results": [
+            {
+                "title": f"Attraction {i + 1}",
+                "url": f"https://example.com/poi/{i + 1}",
+                "content": "x" * r.randint(200, 800),
+                "score": round(r.random(), 3),
+            }
+            for i in range(n)
+        ],
+    }
+
+
+app = FastAPI(title="TripSmith fake providers")
+
+
+@app.post("/v1/security/oauth2/token")
+async def amadeus_token() -> JSONResponse:
+    return await _respond("amadeus", {"access_token": "fake-token", "token_type": "Bearer", "expires_in": 1799})
+
+
+@app.get("/v2/shopping/flight-offers")
+async def amadeus_flights(originLocationCode: str = "", destinationLocationCode: str = "") -> JSONResponse:
+    n = int(SETTINGS["amadeus"]["items"])
+    return await _respond("amadeus", flight_offers(originLocationCode, destinationLocationCode, n))
+
+
+@app.get("/search.json")
+async def serpapi_hotels(q: str = "") -> JSONResponse:
+    return await _respond("serpapi", hotel_properties(q, int(SETTINGS["serpapi"]["items"])))
+
+
+@app.post("/search")
+async def tavily_search(request: Request) -> JSONResponse:
+    body = await request.json()
+    return await _respond("tavily", poi_results(body.get("query", ""), int(SETTINGS["tavily"]["items"])))
+
+
+@app.get("/_fake/stats")
+def fake_stats() -> Dict[str, int]:
+    with _lock:
+        return dict(STATS)
+
+
+@app.post("/_fake/config")
+def fake_config(update: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Update settings for one or more providers, e.g. ``{"serpapi": {"latency_ms": 400}}``."""
+    for provider, values in update.items():
+        if provider in SETTINGS:
+            SETTINGS[provider].update({k: float(v) for k, v in values.items() if k in SETTINGS[provider]})
+    with _lock:
+        STATS.clear()
+    return SETTINGS
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    args = ap.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
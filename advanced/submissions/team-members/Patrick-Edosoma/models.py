@@ -62,6 +62,28 @@ class HotelOption(BaseModel):
         return v
 
 
+class FareCell(BaseModel):
+    """Cheapest fare for one (depart, return) pair of a flexible-date search.
+
+    Args:
+        depart_date: Outbound date.
+        return_date: Return date.
+        nights: Trip length in nights.
+        price_usd: Cheapest total price in USD.
+        airline: Airline of the cheapest offer.
+        duration_minutes: Duration of the cheapest offer.
+        sample: True when no provider fare was available and sample data was used.
+    """
+
+    depart_date: date
+    return_date: date
+    nights: int
+    price_usd: float
+    airline: str
+    duration_minutes: int
+    sample: bool = False
+
+
 class POI(BaseModel):
     """Point of Interest / activity.
 
@@ -111,3 +133,31 @@ class Itinerary(BaseModel):
         if covered < total_nights:
             raise ValueError("Hotel nights do not cover the full trip")
         return v
+
+
+class FlexiblePlan(BaseModel):
+    """Itinerary planned on the cheapest dates of a flexible-date search.
+
+    Args:
+        itinerary: Plan for the chosen dates.
+        best: The chosen fare (None if no date in the window could be searched).
+        grid: Cheapest fare per (depart, return) pair searched, by date.
+    """
+
+    itinerary: Itinerary
+    best: Optional[FareCell] = None
+    grid: List[FareCell] = []
+
+
+class OptimizedPlan(BaseModel):
+    """Best-value itinerary under a total budget, with runners-up.
+
+    Args:
+        itinerary: Highest-scoring itinerary.
+        alternatives: Next best itineraries, each with a different hotel.
+        within_budget: False if nothing fit the budget and the cheapest trips were returned.
+    """
+
+    itinerary: Itinerary
+    alternatives: List[Itinerary] = []
+    within_budget: bool = True
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import utils.airports as airports
+from agents import flight_agent, hotel_agent, poi_agent
+from app.core import PLAN_CACHE
+from utils.search_providers import mock_flight_search, mock_hotel_search, mock_poi_search
+
+
+CSV = """id,ident,type,name,latitude_deg,longitude_deg,elevation_ft,continent,iso_country,iso_region,municipality,scheduled_service,gps_code,iata_code,local_code,home_link,wikipedia_link,keywords
+1,EGLL,large_airport,London Heathrow Airport,51.47,-0.46,83,EU,GB,GB-ENG,London,yes,EGLL,LHR,,,,
+2,EGKK,large_airport,London Gatwick Airport,51.14,-0.19,202,EU,GB,GB-ENG,London,yes,EGKK,LGW,,,,
+3,EGLC,medium_airport,London City Airport,51.50,0.05,19,EU,GB,GB-ENG,London,yes,EGLC,LCY,,,,
+4,KJFK,large_airport,John F Kennedy International Airport,40.63,-73.77,13,NA,US,US-NY,New York,yes,KJFK,JFK,,,,
+5,DNMM,large_airport,Murtala Muhammed International Airport,6.57,3.32,135,AF,NG,NG-LA,Lagos,yes,DNMM,LOS,,,,
+"""
+
+
+@pytest.fixture
+def sample_airports(tmp_path, monkeypatch):
+    csv_path = tmp_path / "airports.csv"
+    csv_path.write_text(CSV)
+    monkeypatch.setattr(airports, "DATA_PATH", str(csv_path))
+    monkeypatch.setattr(airports, "INDEX_PATH", str(tmp_path / "airports.idx"))
+    monkeypatch.setattr(airports, "_index", None)
+    monkeypatch.setattr(airports, "_derived_cache", {})
+    return airports
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Replace the provider searches behind the agents with stubs over the sample data.
+
+    ``calls`` counts searches per kind, ``cancelled`` those cancelled mid-call,
+    ``spans`` records ``(kind, start, end)`` of each completed call, ``delay`` holds seconds per kind to sleep before answering, and destinations in
+    ``failing`` make their POI search raise.
+    """
+    stub = SimpleNamespace(calls=Counter(), cancelled=Counter(), spans=[], delay={}, failing=set())
+
+    async def answer(kind, destination, result):
+        stub.calls[kind] += 1
+        start = time.monotonic()
+        try:
+            await asyncio.sleep(stub.delay.get(kind, 0))
+        except asyncio.CancelledError:
+            stub.cancelled[kind] += 1
+            raise
+        stub.spans.append((kind, start, time.monotonic()))
+        if kind == "pois" and destination in stub.failing:
+            raise ConnectionError(f"POI provider down for {destination}")
+        return result()
+
+    async def flights(origin, destination, start, end, **kwargs):
+        return await answer("flights", destination, lambda: mock_flight_search(origin, destination, start, end))
+
+    async def hotels(city, check_in, check_out, max_rate, **kwargs):
+        return await answer("hotels", city, lambda: mock_hotel_search(city, check_in, check_out, max_rate))
+
+    async def hotel_candidates(city, check_in, check_out, **kwargs):
+        return await answer("hotels", city, lambda: None)  # no table: each trip gets the sample hotels
+
+    async def pois(city, interests, **kwargs):
+        return await answer("pois", city, lambda: mock_poi_search(city, interests))
+
+    monkeypatch.setattr(flight_agent, "flight_search_async", flights)
+    monkeypatch.setattr(hotel_agent, "hotel_search_async", hotels)
+    monkeypatch.setattr(hotel_agent, "hotel_candidates_async", hotel_candidates)
+    monkeypatch.setattr(poi_agent, "poi_search_async", pois)
+    PLAN_CACHE.clear()
+    yield stub
+    PLAN_CACHE.clear()
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from utils.admission import AdmissionControl, Overloaded
+
+
+def test_queue_full_gets_429_and_slow_queue_gets_503():
+    async def scenario():
+        ac = AdmissionControl(max_inflight=1, max_queue=1, queue_timeout_s=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with ac.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert ac.snapshot()["inflight"] == 1 and ac.snapshot()["queued"] == 1
+
+        with pytest.raises(Overloaded) as full:
+            async with ac.slot():
+                pass
+        assert full.value.status_code == 429 and full.value.retry_after_s >= 1
+
+        with pytest.raises(Overloaded) as slow:
+            await waiter
+        assert slow.value.status_code == 503
+
+        release.set()
+        await holder
+        async with ac.slot():
+            assert ac.inflight == 1
+        return ac.snapshot()
+
+    snap = asyncio.run(scenario())
+    assert snap["admitted_total"] == 2 and snap["inflight"] == 0 and snap["queued"] == 0
+    assert snap["rejected_queue_full_total"] == 1 and snap["rejected_queue_timeout_total"] == 1
@@ -0,0 +1,42 @@
+from utils.airport_index import AirportIndex, encode_index, open_index, write_index
+
+BY_IATA = {
+    "LHR": {"iata": "LHR", "city": "London", "country": "United Kingdom", "name": "Heathrow", "type": "large_airport"},
+    "YXU": {"iata": "YXU", "city": "London", "country": "Canada", "name": "London Intl", "type": "medium_airport"},
+    "ZRH": {"iata": "ZRH", "city": "Zürich", "country": "Switzerland", "name": "Zürich", "type": "large_airport"},
+}
+CITY_TO_IATA = {"london, united kingdom": "LHR", "zürich, switzerland": "ZRH", "london, canada": "YXU"}
+
+
+def test_lookups_match_source_dicts(tmp_path):
+    path = tmp_path / "airports.idx"
+    write_index(str(path), encode_index(BY_IATA, CITY_TO_IATA, stamp=(1, 2)))
+    idx = AirportIndex.open(str(path))
+    assert len(idx) == 3 and idx.stamp == (1, 2)
+    assert {k: v for k, v in idx.lookup("zrh").items() if k in BY_IATA["ZRH"]} == BY_IATA["ZRH"]
+    assert idx.lookup("XXX") is None
+    assert idx.city_iata("london, canada") == "YXU"
+
+
+def test_open_index_rebuilds_when_csv_changes(tmp_path):
+    csv_path = tmp_path / "airports.csv"
+    idx_path = tmp_path / "airports.idx"
+    csv_path.write_text("v1")
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        return BY_IATA, CITY_TO_IATA
+
+    open_index(str(csv_path), str(idx_path), load)
+    open_index(str(csv_path), str(idx_path), load)
+    assert len(loads) == 1
+    csv_path.write_text("v2 is longer")
+    assert open_index(str(csv_path), str(idx_path), load).lookup("LHR")["city"] == "London"
+    assert len(loads) == 2
+
+
+def test_missing_csv_gives_empty_index(tmp_path):
+    idx = open_index(str(tmp_path / "none.csv"), str(tmp_path / "none.idx"), lambda p: (BY_IATA, CITY_TO_IATA))
+    assert len(idx) == 0 and idx.lookup("LHR") is None
+    assert not (tmp_path / "none.idx").exists()
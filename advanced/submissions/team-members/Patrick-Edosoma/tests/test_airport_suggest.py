@@ -0,0 +1,33 @@
+from utils.airport_suggest import SuggestIndex
+
+AIRPORTS = [
+    {"iata": "LHR", "name": "London Heathrow Airport", "city": "London", "country": "United Kingdom", "type": "large_airport"},
+    {"iata": "LCY", "name": "London City Airport", "city": "London", "country": "United Kingdom", "type": "medium_airport"},
+    {"iata": "LOS", "name": "Murtala Muhammed International Airport", "city": "Lagos", "country": "Nigeria", "type": "large_airport"},
+    {"iata": "JFK", "name": "John F Kennedy International Airport", "city": "New York", "country": "United States", "type": "large_airport"},
+    {"iata": "XXX", "name": "Old Strip", "city": "Lagos", "country": "Nigeria", "type": "closed"},
+]
+
+
+def codes(idx, q, limit=8):
+    return [s.iata for s in idx.suggest(q, limit)]
+
+
+def test_code_city_and_name_prefixes():
+    idx = SuggestIndex(AIRPORTS)
+    assert codes(idx, "jfk") == ["JFK"]
+    assert codes(idx, "lon") == ["LHR", "LCY"]  # larger airport first
+    assert codes(idx, "heath") == ["LHR"]
+    assert codes(idx, "new y") == ["JFK"]
+
+
+def test_all_words_must_match_and_generic_words_are_ignored():
+    idx = SuggestIndex(AIRPORTS)
+    assert codes(idx, "lagos nigeria") == ["LOS"]
+    assert codes(idx, "london city airport") == ["LCY"]
+    assert codes(idx, "airport") == []
+    assert codes(idx, "zzz") == []
+
+
+def test_closed_airports_are_skipped():
+    assert "XXX" not in codes(SuggestIndex(AIRPORTS), "lagos")
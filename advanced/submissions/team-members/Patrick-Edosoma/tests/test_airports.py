@@ -0,0 +1,13 @@
+def test_unresolved_city_is_none_not_the_raw_input(sample_airports):
+    assert sample_airports.get_iata_for_city("Lagos") == "LOS"
+    assert sample_airports.normalize_to_iata("lhr") == "LHR"
+    assert sample_airports.get_iata_for_city("Atlantis") is None
+    assert sample_airports.normalize_to_iata("  ") is None
+    assert sample_airports.resolve_airport("Atlantis") is None
+
+
+def test_airports_serving_lists_the_metro_largest_first(sample_airports):
+    assert sample_airports.airports_serving("lcy") == ["LCY", "LGW", "LHR"]
+    assert sample_airports.airports_serving("LHR", max_airports=2) == ["LHR", "LGW"]
+    assert sample_airports.airports_serving("JFK") == ["JFK"]
+    assert sample_airports.airports_serving("ZZZ") == ["ZZZ"]
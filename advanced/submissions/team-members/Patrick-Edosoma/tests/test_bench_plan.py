@@ -0,0 +1,17 @@
+from pydantic import ConfigDict
+
+from app.schemas import PlanRequest
+from loadtest.bench_plan import DEFAULT_MIX, make_payloads
+
+
+class StrictPlanRequest(PlanRequest):
+    # PlanRequest ignores unknown fields; a misnamed one would silently fall back to a default.
+    model_config = ConfigDict(extra="forbid")
+
+
+def test_payloads_are_valid_plan_requests():
+    payloads = make_payloads(DEFAULT_MIX, 200, seed=7)
+    reqs = [StrictPlanRequest.model_validate(p) for p in payloads]
+    assert all(r.end_date > r.start_date for r in reqs)
+    assert {r.budget_per_night for r in reqs} == set(DEFAULT_MIX["budgets"])
+    assert make_payloads(DEFAULT_MIX, 200, seed=7) == payloads
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise ConnectionError("provider down")
+
+
+def test_opens_after_failures_and_rejects_fast():
+    b = CircuitBreaker("test", window=10, min_calls=4, failure_ratio=0.5, open_s=60)
+    for _ in range(4):
+        with pytest.raises(ConnectionError):
+            b.call(_fail)
+    assert b.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        b.call(lambda: "never called")
+    assert b.snapshot()["rejected"] == 1
+
+
+def test_slow_calls_count_as_bad():
+    b = CircuitBreaker("test", min_calls=2, failure_ratio=0.5, slow_call_s=0.0)
+    b.record(True, 0.5)
+    b.record(True, 0.5)
+    assert b.state == OPEN
+
+
+def test_probe_closes_after_recovery():
+    b = CircuitBreaker("test", min_calls=1, failure_ratio=0.5, open_s=0.01, half_open_probes=1)
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+    assert b.state == OPEN
+    time.sleep(0.02)
+    assert b.allow() is True
+    assert b.state == HALF_OPEN
+    assert b.allow() is False  # only one probe at a time
+    b.record(True, 0.01)
+    assert b.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    b = CircuitBreaker("test", min_calls=1, failure_ratio=0.5, open_s=0.01)
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+    time.sleep(0.02)
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+    assert b.state == OPEN
+
+
+def test_non_failures_do_not_open():
+    b = CircuitBreaker("test", min_calls=1, failure_ratio=0.5)
+    with pytest.raises(ValueError):
+        b.call(lambda: (_ for _ in ()).throw(ValueError("bad request")), is_failure=lambda e: False)
+    assert b.state == CLOSED
+
+
+def test_ignored_errors_and_cancellation_record_nothing():
+    b = CircuitBreaker("test", min_calls=1, failure_ratio=0.5)
+    with pytest.raises(TimeoutError):
+        b.call(lambda: (_ for _ in ()).throw(TimeoutError()), ignore=lambda e: isinstance(e, TimeoutError))
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(b.call_async(cancelled))
+    assert b.state == CLOSED
+    assert b.snapshot()["recent_calls"] == 0
+
+
+def test_cancelled_probe_frees_its_slot():
+    b = CircuitBreaker("test", min_calls=1, failure_ratio=0.5, open_s=0.01, half_open_probes=1)
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+    time.sleep(0.02)
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(b.call_async(cancelled))
+    assert b.state == HALF_OPEN
+    assert b.allow() is True
@@ -0,0 +1,34 @@
+from utils.city_index import CityIndex, fold
+
+ENTRIES = [
+    ("London", "United Kingdom", "LHR", "large_airport", 0),
+    ("Lagos", "Nigeria", "LOS", "large_airport", 1),
+    ("London", "Canada", "YXU", "medium_airport", 2),
+    ("New York", "United States", "JFK", "large_airport", 3),
+    ("Zürich", "Switzerland", "ZRH", "large_airport", 4),
+    ("St. Louis", "United States", "STL", "large_airport", 5),
+]
+
+
+def test_fold_strips_accents_and_abbreviations():
+    assert fold("  Zürich ") == "zurich"
+    assert fold("St. Louis") == fold("Saint Louis") == "saint louis"
+
+
+def test_exact_prefix_alias_and_country():
+    idx = CityIndex(ENTRIES)
+    assert idx.best("london") == "LHR"
+    assert idx.best("London", country_hint="Canada") == "YXU"
+    assert idx.best("london canada") == "YXU"
+    assert idx.best("Lagos, Nigeria") == "LOS"
+    assert idx.best("NYC") == "JFK"
+    assert idx.best("Zuri") == "ZRH"
+    assert [m.iata for m in idx.search("London")] == ["LHR", "YXU"]
+
+
+def test_typos_match_and_garbage_does_not():
+    idx = CityIndex(ENTRIES)
+    assert idx.best("lagso") == "LOS"
+    assert idx.best("Lodnon") == "LHR"
+    assert idx.best("Zurch") == "ZRH"
+    assert idx.best("Atlantis") is None
@@ -0,0 +1,33 @@
+import time
+
+from utils.deadline import Deadline
+
+
+def test_unbounded_deadline_uses_provider_cap():
+    d = Deadline()
+    assert d.remaining() is None
+    assert not d.expired
+    assert d.timeout(25) == 25
+
+
+def test_timeout_is_clipped_to_remaining_budget():
+    d = Deadline(0.5)
+    assert d.timeout(25) <= 0.5
+    assert d.timeout(0.1) == 0.1
+
+
+def test_child_takes_a_share_and_shares_notes():
+    parent = Deadline(1.0)
+    child = parent.child(0.5, reserve_s=0.2)
+    assert child.remaining() <= 0.41
+    child.note_degraded("hotels", "timed out; used cached results")
+    parent.note_degraded("hotels", "timed out; used cached results")  # e.g. a second airport pair
+    assert parent.degraded == ["hotels (timed out; used cached results)"]
+
+
+def test_expired_deadline():
+    d = Deadline(0.01)
+    time.sleep(0.02)
+    assert d.expired
+    assert d.remaining() == 0.0
+    assert d.timeout(25) > 0
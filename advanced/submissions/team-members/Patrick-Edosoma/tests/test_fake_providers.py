@@ -0,0 +1,45 @@
+import copy
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import loadtest.fake_providers as fake
+from utils.search_providers import _parse_flights, _parse_hotels, _parse_pois
+
+START, END = date(2025, 10, 10), date(2025, 10, 13)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    settings = copy.deepcopy(fake.SETTINGS)
+    for cfg in settings.values():
+        cfg["latency_ms"] = 0.0
+    monkeypatch.setattr(fake, "SETTINGS", settings)
+    fake.STATS.clear()
+    return TestClient(fake.app)
+
+
+def test_fake_payloads_parse_with_the_real_parsers():
+    flights = _parse_flights(fake.flight_offers("LOS", "LHR", 4), "LOS", "LHR", START, END)
+    assert len(flights) == 4 and all(f.price_usd > 0 and f.duration_minutes > 0 for f in flights)
+    hotels = _parse_hotels(fake.hotel_properties("London, United Kingdom", 3), "LHR", START, END)
+    assert len(hotels) == 3 and all(h.nightly_rate_usd > 0 for h in hotels)
+    assert _parse_pois(fake.poi_results("things to do in London", 2), ["museum"])
+    # Same query, same payload: cached and live answers agree across runs.
+    assert fake.flight_offers("LOS", "LHR", 4) == fake.flight_offers("LOS", "LHR", 4)
+
+
+def test_injected_errors_and_live_config(client):
+    client.post("/_fake/config", json={"amadeus": {"error_rate": 1}})
+    params = {"originLocationCode": "LOS", "destinationLocationCode": "LHR"}
+    assert client.get("/v2/shopping/flight-offers", params=params).status_code == 500
+
+    client.post("/_fake/config", json={"amadeus": {"error_rate": 0, "rate_limit_rate": 1}})
+    limited = client.get("/v2/shopping/flight-offers", params=params)
+    assert limited.status_code == 429 and limited.headers["Retry-After"] == "1"
+
+    client.post("/_fake/config", json={"amadeus": {"rate_limit_rate": 0, "items": 3}})
+    assert len(client.get("/v2/shopping/flight-offers", params=params).json()["data"]) == 3
+    assert client.post("/v1/security/oauth2/token").json()["access_token"] == "fake-token"
+    assert client.get("/_fake/stats").json() == {"amadeus.ok": 2}  # counts since the last config change
@@ -0,0 +1,84 @@
+import threading
+from datetime import date
+
+import pytest
+
+import utils.search_providers as sp
+from models import FlightOption
+from utils.option_table import FlightTable
+
+START, END = date(2025, 10, 10), date(2025, 10, 13)
+
+
+def _offer(origin, destination, airline, price):
+    return FlightOption(origin=origin, destination=destination, depart_date=START, return_date=END,
+                        airline=airline, price_usd=price, duration_minutes=420)
+
+
+def test_airport_pairs_expand_both_cities(sample_airports):
+    assert sp._airport_pairs("LHR", "LOS", False) == [("LHR", "LOS")]
+    assert sp._airport_pairs("LOS", "LHR", True) == [("LOS", "LHR"), ("LOS", "LGW"), ("LOS", "LCY")]
+    # Same-city trips never pair an airport with itself.
+    pairs = sp._airport_pairs("LHR", "LCY", True)
+    assert len(pairs) == 6 and all(o != d for o, d in pairs)
+
+
+@pytest.fixture
+def amadeus(monkeypatch):
+    monkeypatch.setenv("AMADEUS_API_KEY", "key")
+    monkeypatch.setenv("AMADEUS_API_SECRET", "secret")
+
+
+def test_multi_airport_offers_are_merged_deduped_and_ranked(sample_airports, amadeus, monkeypatch):
+    def options(origin, destination, start, end, deadline):
+        base = {"LHR": 500.0, "LGW": 450.0, "LCY": 600.0}[destination]
+        # The second offer is the first repriced within the dedupe band.
+        return FlightTable([_offer(origin, destination, "BA", base), _offer(origin, destination, "BA", base + 3),
+                            _offer(origin, destination, "VS", base + 50)])
+
+    monkeypatch.setattr(sp, "_flight_options", options)
+    flights = sp.flight_search("LOS", "LHR", START, END, multi_airport=True, limit=None)
+
+    assert [(f.destination, f.airline, f.price_usd) for f in flights] == [
+        ("LGW", "BA", 450.0), ("LHR", "BA", 500.0), ("LGW", "VS", 500.0), ("LHR", "VS", 550.0),
+        ("LCY", "BA", 600.0), ("LCY", "VS", 650.0),
+    ]
+
+
+def test_concurrent_searches_each_query_their_pairs_at_once(sample_airports, amadeus, monkeypatch):
+    # Two searches of three pairs: all six queries must be in flight together.
+    together = threading.Barrier(6, timeout=5)
+
+    def options(origin, destination, start, end, deadline):
+        together.wait()
+        return FlightTable([_offer(origin, destination, "BA", 500.0)])
+
+    monkeypatch.setattr(sp, "_flight_options", options)
+    results = []
+    searches = [
+        threading.Thread(target=lambda: results.append(sp.flight_search("LOS", "LHR", START, END, multi_airport=True)))
+        for _ in range(2)
+    ]
+    for t in searches:
+        t.start()
+    for t in searches:
+        t.join()
+    assert len(results) == 2 and not together.broken
+
+
+def test_each_search_keeps_its_own_concurrency_bound(sample_airports, amadeus, monkeypatch):
+    monkeypatch.setattr(sp, "MULTI_AIRPORT_CONCURRENCY", 2)
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def options(origin, destination, start, end, deadline):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+        return FlightTable([_offer(origin, destination, "BA", 500.0)])
+
+    monkeypatch.setattr(sp, "_flight_options", options)
+    flights = sp.flight_search("LHR", "LCY", START, END, multi_airport=True, limit=None)
+    assert peak[0] == 2 and {(f.origin, f.destination) for f in flights} == set(sp._airport_pairs("LHR", "LCY", True))
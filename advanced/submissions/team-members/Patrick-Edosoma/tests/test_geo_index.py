@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+
+from utils.geo_index import EARTH_RADIUS_KM, GeoIndex
+
+
+def _brute(lat, lon, qa, qo, k):
+    p, q = math.radians(qa), math.radians(qo)
+    la, lo = np.radians(lat), np.radians(lon)
+    h = np.sin((la - p) / 2) ** 2 + math.cos(p) * np.cos(la) * np.sin((lo - q) / 2) ** 2
+    d = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+    return [int(i) for i in np.argsort(d)[:k]]
+
+
+def test_matches_brute_force_including_dateline_and_poles():
+    rng = np.random.default_rng(1)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 2000)))
+    lon = rng.uniform(-180, 180, 2000)
+    idx = GeoIndex(lat, lon)
+    for qa, qo in [(6.5, 3.3), (51.5, -0.1), (0.0, 179.95), (-12.0, -179.9), (89.9, 10.0), (-89.0, 0.0)]:
+        assert [i for i, _ in idx.nearest(qa, qo, k=5)] == _brute(lat, lon, qa, qo, 5)
+
+
+def test_radius_mask_and_missing_coordinates():
+    lat = np.array([6.58, 6.60, np.nan, 9.01, 51.47])
+    lon = np.array([3.32, 3.40, 0.0, 7.26, -0.46])
+    idx = GeoIndex(lat, lon)
+    assert len(idx) == 4
+    near = idx.nearest(6.5, 3.35, k=5, radius_km=100)
+    assert [i for i, _ in near] == [0, 1]
+    assert 0 < near[0][1] < near[1][1] < 100
+    mask = np.array([False, True, True, True, True])
+    assert idx.nearest(6.5, 3.35, k=1, mask=mask)[0][0] == 1
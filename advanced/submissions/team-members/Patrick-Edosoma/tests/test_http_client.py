@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import requests
+
+from utils import http_client
+
+
+async def _client():
+    return http_client.get_async_client()
+
+
+def test_one_client_per_loop_and_close_closes_all():
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        theirs = asyncio.run_coroutine_threadsafe(_client(), other).result(timeout=5)
+
+        async def scenario():
+            ours = http_client.get_async_client()
+            assert http_client.get_async_client() is ours and ours is not theirs
+            await http_client.aclose_async_client()
+            return ours
+
+        ours = asyncio.run(scenario())
+        assert ours.is_closed and theirs.is_closed
+        assert not http_client._async_clients
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(timeout=5)
+        other.close()
+
+
+def test_new_loop_gets_a_fresh_client():
+    first = asyncio.run(_client())
+    second = asyncio.run(_client())
+    assert second is not first and not second.is_closed
+    asyncio.run(http_client.aclose_async_client())
+
+
+def test_session_is_shared_until_closed():
+    http_client.close_session()
+    s = http_client.get_session()
+    assert http_client.get_session() is s
+    adapter = s.get_adapter("https://test.api.amadeus.com")
+    assert adapter._pool_maxsize == http_client.POOL_SIZE
+    assert adapter._pool_connections == http_client.POOL_HOSTS
+
+    http_client.close_session()
+    http_client.close_session()  # safe twice
+    assert http_client.get_session() is not s
+    http_client.close_session()
+
+
+def test_provider_calls_reuse_the_shared_session(monkeypatch):
+    from utils import search_providers
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"results": [{"title": "Museum", "url": "https://example.com"}]}
+
+    sessions = []
+    monkeypatch.setattr(requests.Session, "request", lambda self, **req: sessions.append(self) or Response())
+    for _ in range(2):
+        assert search_providers._fetch_pois("LHR", ["museum"])[0].title == "Museum"
+    assert len(sessions) == 2 and sessions[0] is sessions[1] is http_client.get_session()
+    http_client.close_session()
@@ -0,0 +1,43 @@
+import random
+from datetime import date
+
+from models import FlightOption, HotelOption
+from utils.option_table import FlightTable, HotelTable
+
+D1, D2 = date(2025, 10, 10), date(2025, 10, 14)
+
+
+def _flights(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        FlightOption(
+            origin=rng.choice(["LHR", "LGW"]), destination="JFK", depart_date=D1, return_date=D2,
+            airline=rng.choice(["BA", "VS", "AA"]), price_usd=rng.choice([0.0, 301.0, 304.0, 312.5, 450.0]),
+            duration_minutes=rng.choice([0, 420, 480]),
+        )
+        for _ in range(n)
+    ]
+
+
+def test_flight_dedupe_and_rank_match_python_loops():
+    flights = _flights(300)
+    seen, expected = set(), []
+    for f in flights:
+        key = (f.origin, f.destination, f.airline, round(f.price_usd / 10) * 10, f.duration_minutes)
+        if key not in seen:
+            seen.add(key)
+            expected.append(f)
+    expected = sorted(expected, key=lambda x: (x.price_usd or 9e9, x.duration_minutes or 9e9))[:5]
+    assert FlightTable(flights).dedupe(10.0).rank(5).models() == expected
+
+
+def test_hotels_filter_rank_and_convert_only_kept_rows():
+    rows = [
+        {"name": f"H{i}", "check_in": "2025-10-10", "check_out": "2025-10-14",
+         "nightly_rate_usd": float(80 + (i * 37) % 200), "rating": (i % 5) + 0.5}
+        for i in range(50)
+    ]
+    kept = HotelTable(rows).within(120).rank(3).models()
+    assert all(isinstance(h, HotelOption) and h.check_in == D1 for h in kept)
+    assert [h.nightly_rate_usd for h in kept] == sorted(r["nightly_rate_usd"] for r in rows if r["nightly_rate_usd"] <= 150)[:3]
+    assert len(HotelTable([]).within(100).rank(5).models()) == 0
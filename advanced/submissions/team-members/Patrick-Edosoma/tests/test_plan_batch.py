@@ -0,0 +1,48 @@
+import asyncio
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from controller.planner import Planner
+
+START, END = date(2025, 10, 10), date(2025, 10, 13)
+
+
+def _trip(origin, destination, budget=120.0, interests=("museum", "food")):
+    return dict(origin=origin, destination=destination, start_date=START, end_date=END,
+                budget_per_night=budget, interests=list(interests))
+
+
+def test_batch_runs_each_distinct_search_once(providers):
+    trips = [_trip("LOS", "LHR"), _trip("ABV", "LHR"), _trip("LOS", "CDG"), _trip("LOS", "LHR", budget=60.0)]
+    its = asyncio.run(Planner().plan_batch_async(trips))
+
+    assert [it.destination for it in its] == ["LHR", "LHR", "CDG", "LHR"]
+    # Three routes, but hotels and POIs only per destination.
+    assert providers.calls == {"flights": 3, "hotels": 2, "pois": 2}
+    # The shared hotel search is filtered by each trip's own budget.
+    assert max(h.nightly_rate_usd for h in its[0].hotels) == 120.0
+    assert max(h.nightly_rate_usd for h in its[3].hotels) == 60.0
+
+
+def test_failed_search_degrades_only_the_trips_using_it(providers):
+    providers.failing.add("CDG")
+    its = asyncio.run(Planner().plan_batch_async([_trip("LOS", "LHR"), _trip("LOS", "CDG")]))
+
+    assert "Degraded" not in its[0].rationale
+    assert "pois (agent error" in its[1].rationale
+    assert its[1].flights and its[1].daily_plan[0].activities  # sample POIs filled in
+
+
+def test_batch_endpoint_dedupes_and_keeps_order(providers):
+    body = {"requests": [
+        {"origin": "LOS", "destination": "LHR", "start_date": "2025-10-10", "end_date": "2025-10-13"},
+        {"origin": "LOS", "destination": "CDG", "start_date": "2025-10-10", "end_date": "2025-10-13"},
+        {"origin": "LOS", "destination": "LHR", "start_date": "2025-10-10", "end_date": "2025-10-13"},
+    ]}
+    r = TestClient(app).post("/plan/batch", json=body)
+
+    assert r.status_code == 200
+    assert [p["destination"] for p in r.json()] == ["LHR", "CDG", "LHR"]
+    assert providers.calls == {"flights": 2, "hotels": 2, "pois": 2}
@@ -0,0 +1,30 @@
+import time
+from datetime import date
+
+from utils.plan_cache import PlanCache, plan_key
+
+
+def test_plan_key_normalizes_request():
+    a = plan_key("los", " LHR", date(2025, 10, 10), date(2025, 10, 14), 120.4, ["Food", "museum", "food"])
+    b = plan_key("LOS", "LHR", date(2025, 10, 10), date(2025, 10, 14), 119.6, ["museum", "food"])
+    assert a == b
+    assert a != plan_key("LOS", "LHR", date(2025, 10, 10), date(2025, 10, 15), 120, ["museum", "food"])
+
+
+def test_lru_eviction_and_hit_counting():
+    c = PlanCache(maxsize=2, ttl_s=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "b" is now least recently used
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert c.stats()["hits"] == 3 and c.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    c = PlanCache(maxsize=4, ttl_s=0.01)
+    c.set("a", 1)
+    time.sleep(0.02)
+    assert c.get("a") is None
+    assert len(c) == 0
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import jobs, main
+from app.jobs import PlanJobs
+from utils.admission import AdmissionControl
+
+REQUEST = {"origin": "LOS", "destination": "LHR", "start_date": "2025-10-10", "end_date": "2025-10-13"}
+
+
+@pytest.fixture
+def client(providers, monkeypatch):
+    """Test client with fresh admission control and job queue (one worker, one waiting job)."""
+    admission = AdmissionControl(max_inflight=1, max_queue=0)
+    monkeypatch.setattr(main, "PLAN_ADMISSION", admission)
+    monkeypatch.setattr(main, "PLAN_JOBS", PlanJobs(workers=1, max_queue=1, admission=admission))
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _wait(client, job_id, status):
+    for _ in range(100):
+        view = client.get(f"/plan/jobs/{job_id}").json()
+        if view["status"] == status:
+            return view
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is still {view['status']}")
+
+
+def test_submit_and_poll_until_done(client):
+    r = client.post("/plan/jobs", json=REQUEST)
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    assert r.headers["Location"] == f"/plan/jobs/{job_id}"
+
+    view = _wait(client, job_id, "done")
+    assert view["progress"] == 1.0 and view["parts_done"][-1] == "itinerary"
+    assert view["result"]["destination"] == "LHR" and view["error"] is None
+
+
+def test_failed_plan_is_reported(client, monkeypatch):
+    async def broken(**params):
+        raise ValueError("planner exploded")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(jobs, "plan_itinerary_events", broken)
+    job_id = client.post("/plan/jobs", json=REQUEST).json()["id"]
+
+    view = _wait(client, job_id, "failed")
+    assert view["error"] == "planner exploded" and view["result"] is None
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/plan/jobs/nope").status_code == 404
+
+
+def test_running_jobs_hold_admission_slots_and_full_queue_gets_429(client, providers):
+    providers.delay["flights"] = 0.3
+    first = client.post("/plan/jobs", json=REQUEST).json()["id"]
+    _wait(client, first, "running")
+
+    # The running job holds the only /plan slot.
+    assert main.PLAN_ADMISSION.inflight == 1
+    assert client.post("/plan", json=REQUEST).status_code == 429
+
+    assert client.post("/plan/jobs", json=REQUEST).status_code == 202  # waits in the queue
+    full = client.post("/plan/jobs", json=REQUEST)
+    assert full.status_code == 429 and int(full.headers["Retry-After"]) >= 1
+
+    _wait(client, first, "done")
+
+
+def test_job_waiting_for_a_slot_is_not_counted_as_rejected(client, providers, monkeypatch):
+    monkeypatch.setattr(main, "PLAN_JOBS", PlanJobs(workers=2, max_queue=2, admission=main.PLAN_ADMISSION))
+    providers.delay["flights"] = 0.3
+    first = client.post("/plan/jobs", json=REQUEST).json()["id"]
+    _wait(client, first, "running")
+    second = client.post("/plan/jobs", json=REQUEST).json()["id"]
+    time.sleep(0.1)
+
+    # The second worker waits for the slot the first job holds.
+    assert client.get(f"/plan/jobs/{second}").json()["status"] == "queued"
+    snap = main.PLAN_ADMISSION.snapshot()
+    assert snap["queued"] == 0
+    assert snap["rejected_queue_full_total"] == 0 and snap["rejected_queue_timeout_total"] == 0
+
+    _wait(client, first, "done")
+    _wait(client, second, "done")
+    assert main.PLAN_ADMISSION.snapshot()["rejected_queue_full_total"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.schemas import PlanRequest
+from controller.planner import Planner
+
+START, END = date(2025, 10, 10), date(2025, 10, 13)
+REQUEST = {"origin": "LOS", "destination": "LHR", "start_date": "2025-10-10", "end_date": "2025-10-13"}
+
+
+def _parse(body: str):
+    events = []
+    for frame in body.split("\n\n")[:-1]:
+        head, data = frame.split("\n")
+        assert head.startswith("event: ") and data.startswith("data: ")
+        events.append((head[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_parts_arrive_in_completion_order(providers):
+    providers.delay.update(flights=0.05, pois=0.02)
+
+    async def collect():
+        return [part async for part, _ in Planner().plan_trip_events("LOS", "LHR", START, END, 120.0, ["museum"])]
+
+    assert asyncio.run(collect()) == ["hotels", "pois", "flights", "itinerary"]
+
+
+def test_stopping_early_cancels_pending_agents(providers):
+    providers.delay.update(flights=5, pois=5)
+
+    async def first_part():
+        events = Planner().plan_trip_events("LOS", "LHR", START, END, 120.0, ["museum"])
+        part, _ = await events.__anext__()
+        await events.aclose()
+        await asyncio.sleep(0.01)
+        return part
+
+    assert asyncio.run(first_part()) == "hotels"
+    assert providers.cancelled == {"flights": 1, "pois": 1}
+
+
+def test_stream_endpoint_frames_each_part(providers):
+    r = TestClient(main.app).post("/plan/stream", json=REQUEST)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _parse(r.text)
+    assert sorted(e for e, _ in events[:3]) == ["flights", "hotels", "pois"]
+    assert events[-1][0] == "itinerary" and len(events) == 4
+    parts = dict(events)
+    assert parts["itinerary"]["destination"] == "LHR"
+    assert parts["itinerary"]["flights"] == parts["flights"]  # same ranked options as the early event
+    assert main.PLAN_ADMISSION.inflight == 0
+
+
+def test_disconnect_cancels_agents_and_frees_the_slot(providers):
+    providers.delay.update(flights=5, pois=5)
+
+    async def disconnect_after_first_event():
+        resp = await main.plan_stream(PlanRequest(**REQUEST))
+        assert main.PLAN_ADMISSION.inflight == 1
+        body = resp.body_iterator
+        first = await body.__anext__()
+        await body.aclose()  # what the server does when the client goes away
+        await asyncio.sleep(0.01)
+        return first
+
+    assert asyncio.run(disconnect_after_first_event()).startswith(b"event: hotels\n")
+    assert providers.cancelled == {"flights": 1, "pois": 1}
+    assert main.PLAN_ADMISSION.inflight == 0
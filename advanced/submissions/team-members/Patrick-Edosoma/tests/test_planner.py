@@ -0,0 +1,84 @@
+import asyncio
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from agents import flight_agent, poi_agent
+from controller.planner import Planner
+from models import POI, FareCell, FlightOption
+from utils.search_providers import _from_rows, mock_flight_search, mock_poi_search
+
+START, END = date(2025, 10, 10), date(2025, 10, 13)
+
+
+def _plan(**kwargs):
+    return asyncio.run(Planner().plan_trip_async("LOS", "LHR", START, END, 120.0, ["museum"], **kwargs))
+
+
+def test_agents_run_concurrently(providers):
+    providers.delay.update(flights=0.2, hotels=0.2, pois=0.2)
+    it = _plan()
+    # Every search started before any of them finished.
+    assert max(start for _, start, _ in providers.spans) < min(end for _, _, end in providers.spans)
+    assert providers.calls == {"flights": 1, "hotels": 1, "pois": 1}
+    assert it.flights and it.hotels and "Degraded" not in it.rationale
+
+
+def test_slow_or_failing_agent_falls_back_to_sample_data(providers):
+    providers.delay["pois"] = 5
+    it = _plan(agent_timeout=0.05)
+    assert providers.cancelled == {"pois": 1}
+    assert "pois (timed out" in it.rationale
+    assert it.daily_plan[0].activities  # sample POIs instead
+
+    providers.delay.clear()
+    providers.failing.add("LHR")
+    assert "pois (agent error" in _plan().rationale
+
+
+def test_agent_models_reach_the_itinerary_without_revalidation(providers, monkeypatch):
+    flights = mock_flight_search("LOS", "LHR", START, END)
+    pois = mock_poi_search("LHR", ["museum"])
+
+    async def fixed_flights(*args, **kwargs):
+        return flights
+
+    async def fixed_pois(*args, **kwargs):
+        return pois
+
+    monkeypatch.setattr(flight_agent, "flight_search_async", fixed_flights)
+    monkeypatch.setattr(poi_agent, "poi_search_async", fixed_pois)
+    validated = []
+    for model in (FlightOption, POI):
+        monkeypatch.setattr(model, "model_validate", classmethod(lambda cls, *a, **k: validated.append(cls)))
+
+    it = _plan()
+    assert it.flights and all(any(f is g for g in flights) for f in it.flights)
+    assert all(any(p is q for q in pois) for day in it.daily_plan for p in day.activities)
+    assert not validated
+
+
+def test_only_rows_from_the_cache_are_validated():
+    row = mock_flight_search("LOS", "LHR", START, END)[0].model_dump()
+    assert _from_rows(FlightOption, [row], trusted=True)[0] == FlightOption(**row)
+
+    bad = dict(row, price_usd="not a price")
+    assert _from_rows(FlightOption, [bad], trusted=True)[0].price_usd == "not a price"  # no validation
+    with pytest.raises(ValidationError):
+        _from_rows(FlightOption, [bad], trusted=False)
+
+
+def test_free_fare_ranks_as_the_cheapest_date(monkeypatch):
+    def cell(day, price):
+        return FareCell(depart_date=date(2025, 10, day), return_date=date(2025, 10, day + 3), nights=3,
+                        price_usd=price, airline="XX", duration_minutes=400)
+
+    planner = Planner()
+
+    async def grid(*args, **kwargs):
+        return [cell(10, 250.0), cell(11, 0.0), cell(12, 180.0)]
+
+    monkeypatch.setattr(planner.flight_agent, "fare_grid_async", grid)
+    _, best = asyncio.run(planner.cheapest_dates_async("LOS", "LHR", START, END, flex_days=2))
+    assert best.price_usd == 0.0 and best.depart_date == date(2025, 10, 11)
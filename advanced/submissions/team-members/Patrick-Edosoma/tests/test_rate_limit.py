@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limit import RateLimited, TokenBucket
+
+
+def test_bucket_paces_calls_and_refuses_long_waits():
+    b = TokenBucket("test", rate=10, burst=2)
+    assert b.reserve() == 0.0
+    assert b.reserve() == 0.0
+    assert b.reserve() == pytest.approx(0.1, abs=0.01)
+    assert b.reserve() == pytest.approx(0.2, abs=0.01)  # queued behind the previous caller
+    with pytest.raises(RateLimited):
+        b.reserve(max_wait_s=0.05)
+    assert b.snapshot()["waited"] == 2 and b.snapshot()["rejected"] == 1
+
+
+def test_zero_rate_disables_the_limit():
+    b = TokenBucket("test", rate=0)
+    assert all(b.reserve(max_wait_s=0) == 0.0 for _ in range(100))
+
+
+def test_open_breaker_leaves_rate_limit_untouched(monkeypatch):
+    from utils import search_providers as sp
+    from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+    breaker = CircuitBreaker("amadeus", min_calls=1, failure_ratio=0.5, open_s=60)
+    breaker.record(False, 0.1)
+    bucket = TokenBucket("amadeus", rate=1, burst=1)
+    monkeypatch.setitem(sp.BREAKERS, "amadeus", breaker)
+    monkeypatch.setitem(sp.RATE_LIMITS, "amadeus", bucket)
+    fetched = []
+
+    async def fetch():
+        fetched.append(1)
+        return []
+
+    with pytest.raises(CircuitOpenError):
+        sp._guarded("flights", lambda: fetched.append(1) or [])
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(sp._guarded_async("flights", fetch))
+    assert not fetched
+    assert bucket.reserve(max_wait_s=0) == 0.0  # the one token is still there
@@ -0,0 +1,51 @@
+import time
+
+from utils.response_cache import ResponseCache, make_key
+
+
+def test_key_ignores_param_order():
+    assert make_key("hotels", {"a": 1, "b": "x"}) == make_key("hotels", {"b": "x", "a": 1})
+    assert make_key("hotels", {"a": 1}) != make_key("pois", {"a": 1})
+
+
+def test_fresh_entry_round_trips(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"))
+    key = make_key("hotels", {"city": "LOS"})
+    cache.set(key, "hotels", [{"name": "H1"}], ttl_s=60)
+    assert cache.get(key) == ([{"name": "H1"}], True)
+
+
+def test_revalidate_replaces_stale_entry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"))
+    key = make_key("flights", {"o": "ABV"})
+    cache.set(key, "flights", ["old"], ttl_s=-1, stale_s=60)
+    assert cache.get(key) == (["old"], False)
+
+    cache.revalidate(key, "flights", lambda: ["new"], ttl_s=60, stale_s=60)
+    for _ in range(50):
+        hit = cache.get(key)
+        if hit and hit[0] == ["new"]:
+            break
+        time.sleep(0.01)
+    assert cache.get(key) == (["new"], True)
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"))
+    key = make_key("pois", {"city": "LOS"})
+    cache.set(key, "pois", ["x"], ttl_s=-1, stale_s=0)
+    assert cache.get(key) is None
+    assert cache.purge_expired() == 1
+
+
+def test_writes_trigger_background_purge(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), purge_every=2)
+    old = make_key("pois", {"city": "LOS"})
+    cache.set(old, "pois", ["x"], ttl_s=-1, stale_s=0)
+    assert cache.get(old, allow_expired=True) is not None
+    cache.set(make_key("pois", {"city": "ABV"}), "pois", ["y"], ttl_s=60)
+    for _ in range(50):
+        if cache.get(old, allow_expired=True) is None:
+            break
+        time.sleep(0.01)
+    assert cache.get(old, allow_expired=True) is None
@@ -0,0 +1,25 @@
+import json
+from datetime import date
+
+from app.responses import JSON, MSGPACK, itinerary_bytes, itinerary_response, msgpack, wants_msgpack
+from models import DayPlan, Itinerary, POI
+
+IT = Itinerary(
+    origin="LOS", destination="LHR", start_date=date(2025, 10, 10), end_date=date(2025, 10, 11),
+    daily_plan=[DayPlan(date=date(2025, 10, 10), activities=[POI(title="Museum", category="museum", duration_minutes=90)])],
+)
+
+
+def test_json_bytes_match_model_dump():
+    assert json.loads(itinerary_bytes(IT)) == IT.model_dump(mode="json")
+    assert itinerary_response(IT).media_type == JSON
+
+
+def test_msgpack_is_negotiated_from_accept():
+    assert not wants_msgpack(None) and not wants_msgpack("application/json, */*")
+    assert not wants_msgpack(f"{MSGPACK};q=0")
+    if msgpack is not None:
+        assert wants_msgpack(f"application/json;q=0.5, {MSGPACK}")
+        resp = itinerary_response(IT, MSGPACK)
+        assert resp.media_type == MSGPACK
+        assert msgpack.unpackb(resp.body) == IT.model_dump(mode="json")
@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    sf = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def fn():
+        calls.append(1)
+        gate.wait(1)
+        return ["hotel"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sf.do("LOS", fn))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == [["hotel"]] * 6
+    assert len(calls) == 1
+    assert sf.coalesced == 5
+    assert sf.in_flight() == 0
+
+
+def test_error_is_shared_and_not_remembered():
+    sf = SingleFlight()
+
+    def boom():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        sf.do("k", boom)
+    assert sf.do("k", lambda: 1) == 1
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from utils.token_cache import TokenCache
+
+
+def test_token_reused_until_expiry():
+    calls = []
+
+    def fetch(timeout=None):
+        calls.append(1)
+        return f"tok{len(calls)}", 3600
+
+    cache = TokenCache(fetch, refresh_margin_s=60)
+    assert cache.get() == "tok1"
+    assert cache.get() == "tok1"
+    assert len(calls) == 1
+
+
+def test_concurrent_callers_share_one_refresh():
+    calls = []
+
+    def fetch(timeout=None):
+        calls.append(1)
+        time.sleep(0.05)
+        return "tok", 3600
+
+    cache = TokenCache(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["tok"] * 8
+    assert len(calls) == 1
+
+
+def test_background_refresh_inside_margin():
+    calls = []
+    refreshed = threading.Event()
+
+    def fetch(timeout=None):
+        calls.append(1)
+        if len(calls) > 1:
+            refreshed.set()
+        return f"tok{len(calls)}", 0.2
+
+    # The 60 s margin is clamped to half the 0.2 s lifetime.
+    cache = TokenCache(fetch, refresh_margin_s=60)
+    assert cache.get() == "tok1"
+    assert cache.get() == "tok1" and len(calls) == 1
+    time.sleep(0.12)
+    # Still valid but inside the margin: served immediately while renewing.
+    assert cache.get() == "tok1"
+    assert refreshed.wait(1)
+    time.sleep(0.01)
+    assert cache.get() == "tok2"
+
+
+def test_short_lived_token_is_not_refreshed_on_every_call():
+    calls = []
+
+    def fetch(timeout=None):
+        calls.append(1)
+        return f"tok{len(calls)}", 30
+
+    cache = TokenCache(fetch, refresh_margin_s=60)
+    for _ in range(5):
+        assert cache.get() == "tok1"
+        time.sleep(0.01)
+    assert len(calls) == 1
+
+
+def test_fetch_error_propagates():
+    def fetch(timeout=None):
+        raise ConnectionError("down")
+
+    cache = TokenCache(fetch)
+    with pytest.raises(ConnectionError):
+        cache.get()
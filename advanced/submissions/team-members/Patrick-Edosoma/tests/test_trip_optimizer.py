@@ -0,0 +1,94 @@
+import itertools
+import random
+import time
+from datetime import date
+
+import numpy as np
+
+from models import POI, FlightOption, HotelOption
+from utils.option_table import FlightTable, HotelTable
+from utils.trip_optimizer import RATING_VALUE_USD, VALUE_OF_TIME_USD_H, _Knapsack, optimize_trip, poi_values
+
+D1, D2 = date(2025, 10, 10), date(2025, 10, 13)
+
+
+def _options(n_flights, n_hotels, n_pois, seed=0):
+    rng = random.Random(seed)
+    flights = [
+        FlightOption(origin="LOS", destination="JFK", depart_date=D1, return_date=D2, airline=rng.choice(["BA", "DL"]),
+                     price_usd=float(rng.randint(300, 900)), duration_minutes=rng.randint(600, 1200))
+        for _ in range(n_flights)
+    ]
+    hotels = [
+        HotelOption(name=f"H{i}", check_in=D1, check_out=D2, nightly_rate_usd=float(rng.randint(60, 300)),
+                    rating=round(rng.uniform(2.5, 5.0), 1))
+        for i in range(n_hotels)
+    ]
+    pois = [
+        POI(title=f"P{i}", category=rng.choice(["museum", "food", "nature"]), duration_minutes=90,
+            price_estimate_usd=float(rng.choice([0, 15, 35, 50, 80])))
+        for i in range(n_pois)
+    ]
+    return flights, hotels, pois
+
+
+def test_matches_brute_force_and_stays_within_budget():
+    flights, hotels, pois = _options(6, 5, 7)
+    interests, nights, slots, budget = ["museum"], 3, 4, 1400.0
+    values = poi_values(pois, interests)
+
+    def surplus(f, h, ps):
+        cost = f.price_usd + h.nightly_rate_usd * nights + sum(pois[i].price_estimate_usd for i in ps)
+        value = (-VALUE_OF_TIME_USD_H * f.duration_minutes / 60 + RATING_VALUE_USD * h.rating * nights
+                 + sum(values[i] for i in ps))
+        return cost, value - cost
+
+    best = max(
+        s for f in flights for h in hotels for r in range(slots + 1) for ps in itertools.combinations(range(len(pois)), r)
+        for cost, s in [surplus(f, h, ps)] if cost <= budget
+    )
+    picks = optimize_trip(FlightTable(flights), HotelTable(hotels), pois, nights, slots, budget, interests, k=3)
+    assert picks[0].within_budget and abs(picks[0].score - best) < 0.01
+    assert all(p.cost <= budget and len(p.pois) <= slots for p in picks)
+    assert len({p.hotel for p in picks}) == len(picks)
+
+
+def test_hundreds_of_options_and_over_budget_fallback():
+    flights, hotels, pois = _options(400, 300, 200, seed=1)
+    t = time.perf_counter()
+    picks = optimize_trip(FlightTable(flights), HotelTable(hotels), pois, 7, 14, 3000.0, ["food"], k=3)
+    assert time.perf_counter() - t < 2.0
+    assert len(picks) == 3 and picks[0].score >= picks[1].score >= picks[2].score
+
+    cheap = optimize_trip(FlightTable(flights), HotelTable(hotels), pois, 7, 14, 100.0, ["food"], k=1)[0]
+    assert not cheap.within_budget
+    assert all(pois[i].price_estimate_usd == 0 for i in cheap.pois)
+
+
+def test_knapsack_choice_replayed_from_checkpoints_matches_its_value():
+    rng = np.random.default_rng(2)
+    prices = rng.choice([0.0, 10.0, 25.0, 40.0, 70.0], size=60)
+    knap = _Knapsack(prices, rng.uniform(20, 90, size=60), slots=6, budget=200.0)
+    assert len(knap.checkpoints) > 1  # choices span several replayed stretches
+    for money in (0.0, 35.0, 120.0, 200.0):
+        step = int(knap.steps_for(np.array([money]))[0])
+        chosen = knap.choose(step)
+        gains = {int(i): g for i, g in zip(knap.items, knap.gains)}
+        assert len(chosen) <= 6 and prices[list(chosen)].sum() <= money
+        assert abs(sum(gains[i] for i in chosen) - float(knap.value(np.array([step]))[0])) < 1e-9
+
+
+def test_unknown_flight_duration_scores_as_worst():
+    flights = [
+        FlightOption(origin="LOS", destination="JFK", depart_date=D1, return_date=D2, airline=a,
+                     price_usd=500.0, duration_minutes=d)
+        for a, d in (("XX", 0), ("BA", 900), ("DL", 600))
+    ]
+    hotels = [HotelOption(name="H", check_in=D1, check_out=D2, nightly_rate_usd=100.0, rating=4.0)]
+    pick = optimize_trip(FlightTable(flights), HotelTable(hotels), [], 3, 0, 2000.0, k=1)[0]
+    assert flights[pick.flight].airline == "DL"
+
+    flights[1] = flights[1].model_copy(update={"duration_minutes": 0})
+    flights[2] = flights[2].model_copy(update={"duration_minutes": 1200})
+    pick = optimize_trip(FlightTable(flights), HotelTable(hotels), [], 3, 0, 2000.0, k=1)[0]
+    assert flights[pick.flight].airline == "DL"  # the only flight with a known duration
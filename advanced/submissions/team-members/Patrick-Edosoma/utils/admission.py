@@ -0,0 +1,127 @@
+from __future__ import annotations
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+# Per worker process; each uvicorn worker admits its own PLAN_MAX_INFLIGHT plans.
+PLAN_MAX_INFLIGHT = int(os.getenv("PLAN_MAX_INFLIGHT", "32"))
+PLAN_MAX_QUEUE = int(os.getenv("PLAN_MAX_QUEUE", "64"))
+PLAN_QUEUE_TIMEOUT_S = float(os.getenv("PLAN_QUEUE_TIMEOUT_S", "5"))
+
+
+class Overloaded(RuntimeError):
+    """Raised instead of admitting a request; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, status_code: int, retry_after_s: int, reason: str) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionControl:
+    """Concurrency limit with a bounded wait queue for async request handlers.
+
+    Args:
+        max_inflight: Requests served at once.
+        max_queue: Requests allowed to wait for a slot; more are rejected with 429.
+        queue_timeout_s: Longest wait for a slot before giving up with 503.
+
+    Notes:
+        Rejections happen before any work is done, so an overloaded server answers
+        in microseconds instead of letting latency grow without bound. Retry-After
+        is estimated from the average service time and the current backlog.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = PLAN_MAX_INFLIGHT,
+        max_queue: int = PLAN_MAX_QUEUE,
+        queue_timeout_s: float = PLAN_QUEUE_TIMEOUT_S,
+    ) -> None:
+        self.max_inflight = max(max_inflight, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout_s = queue_timeout_s
+        self._sem = asyncio.Semaphore(self.max_inflight)
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._service_ewma: Optional[float] = None
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot (at least 1)."""
+        per_slot = self._service_ewma or 1.0
+        return max(1, math.ceil(per_slot * (self.queued + 1) / self.max_inflight))
+
+    async def acquire(self, background: bool = False) -> Callable[[], None]:
+        """Wait for a slot and return the function that gives it back.
+
+        The returned release function may be called more than once (only the first
+        call counts), so it can be wired to several cleanup paths of a streamed response.
+
+        Args:
+            background: Wait as long as it takes, without taking a place in the wait
+                queue or counting as a rejection (for work already accepted elsewhere,
+                e.g. queued plan jobs).
+
+        Raises:
+            Overloaded: 429 when the wait queue is full, 503 when no slot freed up in time.
+        """
+        if background:
+            await self._sem.acquire()
+        elif self._sem.locked():
+            if self.queued >= self.max_queue:
+                self.rejected_full += 1
+                raise Overloaded(429, self.retry_after(), "too many queued requests")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Overloaded(503, self.retry_after(), "timed out waiting for a slot") from None
+            finally:
+                self.queued -= 1
+        else:
+            await self._sem.acquire()
+
+        self.inflight += 1
+        self.admitted += 1
+        start = time.monotonic()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            took = time.monotonic() - start
+            self._service_ewma = took if self._service_ewma is None else 0.8 * self._service_ewma + 0.2 * took
+            self.inflight -= 1
+            self._sem.release()
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block (see :meth:`acquire`)."""
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted,
+            "rejected_queue_full_total": self.rejected_full,
+            "rejected_queue_timeout_total": self.rejected_timeout,
+            "service_seconds_avg": round(self._service_ewma or 0.0, 4),
+        }
@@ -0,0 +1,259 @@
+"""Compact binary airport index, memory-mapped for lookups.
+
+Layout (little-endian), version 2:
+
+    header   magic "TSAI", version, airport count, city count, source size/mtime
+    airports fixed-size records sorted by IATA code; string fields point into the blob,
+             followed by float32 latitude/longitude (NaN when unknown)
+    cities   fixed-size records sorted by "city, country" key (UTF-8 bytes) -> IATA
+    strings  UTF-8 blob shared by both tables
+
+Lookups binary-search the mapped tables in place, so nothing is parsed at import,
+and worker processes share the file through the page cache instead of each
+holding its own dicts. Build it ahead of time with ``python -m utils.airport_index``.
+It is also (re)built on first use whenever the CSV size or mtime no longer match.
+"""
+from __future__ import annotations
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TSAI"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHHIIQQ")     # magic, version, pad, n_airports, n_cities, src_size, src_mtime_ns
+_AIRPORT = struct.Struct("<3sx4I4H2f")   # iata, (city, country, name, type) offsets, then lengths, lat, lon
+# numpy view of the same records, for column access without unpacking (see columns()).
+AIRPORT_DTYPE = [("iata", "S3"), ("_pad", "V1"), ("off", "<u4", (4,)), ("len", "<u2", (4,)), ("lat", "<f4"), ("lon", "<f4")]
+_CITY = struct.Struct("<IIH3sx")         # key offset, first-seen rank, key length, iata
+
+Loaded = Tuple[Dict[str, dict], Dict[str, str]]
+
+_FIELDS = ("city", "country", "name", "type")
+
+
+def source_stamp(csv_path: str) -> Tuple[int, int]:
+    """``(size, mtime_ns)`` of the CSV, or ``(0, 0)`` if it does not exist."""
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return 0, 0
+    return st.st_size, st.st_mtime_ns
+
+
+def encode_index(by_iata: Dict[str, dict], city_to_iata: Dict[str, str], stamp: Tuple[int, int] = (0, 0)) -> bytes:
+    """Serialize ``load_airports``-style dicts into the binary index format.
+
+    Args:
+        by_iata: ``{IATA: {"city", "country", "name", "type", "lat", "lon"}}``.
+        city_to_iata: ``{"city, country" (lower-case): IATA}`` in preference order;
+            insertion order is kept as the rank the city index breaks ties with.
+        stamp: ``(size, mtime_ns)`` of the source CSV, used to detect changes.
+
+    Returns:
+        bytes: The encoded index.
+    """
+    blob = bytearray()
+    seen: Dict[bytes, int] = {}
+
+    def intern(s: str) -> Tuple[int, int]:
+        b = (s or "").encode("utf-8")[:0xFFFF]
+        off = seen.get(b)
+        if off is None:
+            off = seen[b] = len(blob)
+            blob.extend(b)
+        return off, len(b)
+
+    airports = bytearray()
+    for iata in sorted(by_iata):
+        info = by_iata[iata]
+        refs = [intern(info.get(f) or "") for f in _FIELDS]
+        lat, lon = info.get("lat"), info.get("lon")
+        airports += _AIRPORT.pack(
+            iata.encode("ascii"), *(o for o, _ in refs), *(n for _, n in refs),
+            float("nan") if lat is None else lat, float("nan") if lon is None else lon,
+        )
+
+    cities = bytearray()
+    ranked = [(k.encode("utf-8"), rank, code) for rank, (k, code) in enumerate(city_to_iata.items())]
+    for key, rank, code in sorted(ranked):
+        off, n = intern(key.decode("utf-8"))
+        cities += _CITY.pack(off, rank, n, code.encode("ascii"))
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(by_iata), len(city_to_iata), *stamp)
+    return bytes(header + airports + cities + blob)
+
+
+def write_index(path: str, data: bytes) -> None:
+    """Atomically replace ``path`` with ``data``."""
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".airports-", dir=d)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class AirportIndex:
+    """Read-only view over an encoded index (an mmap or in-memory bytes)."""
+
+    def __init__(self, buf) -> None:
+        magic, version, _, n_air, n_city, size, mtime = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a current airport index")
+        self._buf = buf
+        self.n_airports = n_air
+        self.n_cities = n_city
+        self.stamp = (size, mtime)
+        self._air_at = _HEADER.size
+        self._city_at = self._air_at + n_air * _AIRPORT.size
+        self._str_at = self._city_at + n_city * _CITY.size
+
+    @classmethod
+    def open(cls, path: str) -> "AirportIndex":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return self.n_airports
+
+    def _str(self, off: int, n: int) -> str:
+        p = self._str_at + off
+        return bytes(self._buf[p:p + n]).decode("utf-8")
+
+    def _iata_at(self, i: int) -> bytes:
+        p = self._air_at + i * _AIRPORT.size
+        return bytes(self._buf[p:p + 3])
+
+    def lookup(self, iata: str) -> Optional[dict]:
+        """Return ``{"iata", "city", "country", "name", "type", "lat", "lon"}`` for a code, else None."""
+        try:
+            target = (iata or "").upper().encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        lo, hi = 0, self.n_airports
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._iata_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.n_airports or self._iata_at(lo) != target:
+            return None
+        return self.record_at(lo)
+
+    def record_at(self, i: int) -> dict:
+        """Airport record at row ``i`` (IATA order), as :meth:`lookup` returns it."""
+        rec = _AIRPORT.unpack_from(self._buf, self._air_at + i * _AIRPORT.size)
+        out = {"iata": rec[0].decode("ascii")}
+        for j, f in enumerate(_FIELDS):
+            out[f] = self._str(rec[1 + j], rec[5 + j])
+        out["lat"], out["lon"] = rec[9], rec[10]
+        return out
+
+    def iter_airports(self) -> Iterator[dict]:
+        """Yield every airport record (as :meth:`lookup` returns it), in IATA order."""
+        for i in range(self.n_airports):
+            yield self.record_at(i)
+
+    def columns(self):
+        """Zero-copy numpy view of the airport records (fields as in ``AIRPORT_DTYPE``)."""
+        import numpy as np
+
+        return np.frombuffer(self._buf, dtype=np.dtype(AIRPORT_DTYPE), count=self.n_airports, offset=self._air_at)
+
+    def string_at(self, off: int, n: int) -> str:
+        """Decode a string field given its blob offset and length (as in :meth:`columns`)."""
+        return self._str(int(off), int(n))
+
+    def _city(self, i: int) -> Tuple[bytes, int, str]:
+        off, rank, n, code = _CITY.unpack_from(self._buf, self._city_at + i * _CITY.size)
+        p = self._str_at + off
+        return bytes(self._buf[p:p + n]), rank, code.decode("ascii")
+
+    def _city_lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.n_cities
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._city(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_cities(self) -> Iterator[Tuple[str, int, str]]:
+        """Yield ``(key, first_seen_rank, iata)`` for every city key, in key order."""
+        for i in range(self.n_cities):
+            key, rank, code = self._city(i)
+            yield key.decode("utf-8"), rank, code
+
+    def city_iata(self, key: str) -> Optional[str]:
+        """Exact ``"city, country"`` (lower-case) lookup."""
+        k = key.encode("utf-8")
+        i = self._city_lower_bound(k)
+        if i < self.n_cities:
+            ck, _, code = self._city(i)
+            if ck == k:
+                return code
+        return None
+
+
+def open_index(csv_path: str, index_path: str, load: Callable[[str], Loaded]) -> AirportIndex:
+    """Open ``index_path``, rebuilding it from ``csv_path`` if missing or out of date.
+
+    Args:
+        csv_path: Source airports CSV.
+        index_path: Where the compiled index lives.
+        load: Parses the CSV into ``(by_iata, city_to_iata)`` (``utils.airports.load_airports``).
+
+    Returns:
+        AirportIndex: Memory-mapped index; in-memory if the index file can't be written.
+    """
+    stamp = source_stamp(csv_path)
+    if stamp == (0, 0):
+        return AirportIndex(encode_index({}, {}))
+    try:
+        idx = AirportIndex.open(index_path)
+        if idx.stamp == stamp:
+            return idx
+    except (OSError, ValueError, struct.error):
+        pass
+
+    data = encode_index(*load(csv_path), stamp=stamp)
+    try:
+        write_index(index_path, data)
+        logger.info("Built airport index %s from %s", index_path, csv_path)
+        return AirportIndex.open(index_path)
+    except OSError as e:
+        logger.warning("Could not write airport index %s (%s); using an in-memory index.", index_path, e)
+        return AirportIndex(data)
+
+
+def main() -> None:
+    import argparse
+    from utils.airports import DATA_PATH, INDEX_PATH, load_airports
+
+    ap = argparse.ArgumentParser(description="Compile data/airports.csv into the binary airport index.")
+    ap.add_argument("--csv", default=DATA_PATH)
+    ap.add_argument("--out", default=INDEX_PATH)
+    args = ap.parse_args()
+    data = encode_index(*load_airports(args.csv), stamp=source_stamp(args.csv))
+    write_index(args.out, data)
+    idx = AirportIndex(data)
+    print(f"wrote {args.out}: {idx.n_airports} airports, {idx.n_cities} cities, {len(data)} bytes")
+
+
+if __name__ == "__main__":
+    main()
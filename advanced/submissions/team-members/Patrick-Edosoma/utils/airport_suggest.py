@@ -0,0 +1,126 @@
+from __future__ import annotations
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from utils.city_index import fold
+
+# Same preference load_airports uses when several airports share a city.
+_TYPE_BONUS = {"large_airport": 9, "medium_airport": 5, "small_airport": 1}
+_SKIP_TYPES = {"closed"}
+_SCAN_CAP = 2000
+# Words in most airport names; indexing them would make every airport a candidate.
+_STOPWORDS = {"airport", "international", "intl", "regional", "airfield", "aerodrome", "air", "field", "municipal"}
+_SHORT_PREFIX = 2
+_SHORT_KEEP = 20
+
+
+class Suggestion(NamedTuple):
+    iata: str
+    name: str
+    city: str
+    country: str
+    type: str
+    score: float
+
+
+class _Airport(NamedTuple):
+    iata: str        # lower-case code
+    name: str        # folded
+    city: str        # folded
+    tokens: Set[str]  # code, name, city and country words
+    bonus: int
+    out: Tuple[str, str, str, str, str]
+
+
+class SuggestIndex:
+    """Autocomplete over IATA codes, airport names and municipalities.
+
+    Args:
+        airports: Airport dicts as returned by ``AirportIndex.iter_airports``.
+        memo_size: Distinct ``(query, limit)`` answers kept in an LRU memo.
+
+    Notes:
+        Every word of the query (ignoring generic words like "airport") must prefix
+        some word of the airport's code, name, city or country ("lagos nigeria").
+        Candidates come from code, name and city words via a bisect over one sorted
+        token array; one- and two-letter prefixes use precomputed top lists.
+        Scores favour an exact code, then the city, then the name, plus a bonus
+        for larger airports.
+    """
+
+    def __init__(self, airports: Iterable[dict], memo_size: int = 4096) -> None:
+        self._airports: List[_Airport] = []
+        pairs: List[Tuple[str, int]] = []
+        for a in airports:
+            if a.get("type") in _SKIP_TYPES:
+                continue
+            name, city, country = fold(a.get("name", "")), fold(a.get("city", "")), fold(a.get("country", ""))
+            iata = a["iata"].lower()
+            tokens = {iata, *name.split(), *city.split()} - _STOPWORDS
+            i = len(self._airports)
+            self._airports.append(_Airport(
+                iata, name, city, tokens | set(country.split()), _TYPE_BONUS.get(a.get("type", ""), 0),
+                (a["iata"], a.get("name", ""), a.get("city", ""), a.get("country", ""), a.get("type", "")),
+            ))
+            pairs.extend((t, i) for t in tokens)
+        # Larger airports first within a token, so a capped scan keeps the best ones.
+        pairs.sort(key=lambda p: (p[0], -self._airports[p[1]].bonus, p[1]))
+        self._tokens = [t for t, _ in pairs]
+        self._ids = [i for _, i in pairs]
+
+        self._short: Dict[str, List[int]] = {}
+        for t, i in pairs:
+            for n in range(1, min(_SHORT_PREFIX, len(t)) + 1):
+                self._short.setdefault(t[:n], []).append(i)
+        for p, ids in self._short.items():
+            uniq = sorted(set(ids), key=lambda i: -self._score(i, p))
+            self._short[p] = uniq[:_SHORT_KEEP]
+
+        self.suggest = lru_cache(maxsize=memo_size)(self._suggest)
+
+    def __len__(self) -> int:
+        return len(self._airports)
+
+    def _score(self, i: int, q: str) -> float:
+        a = self._airports[i]
+        if a.iata == q:
+            s = 100.0
+        elif a.city == q:
+            s = 70.0
+        elif len(q) <= 3 and a.iata.startswith(q):
+            s = 60.0
+        elif a.city.startswith(q):
+            s = 50.0 + 10.0 * len(q) / len(a.city)
+        elif a.name.startswith(q):
+            s = 40.0 + 10.0 * len(q) / len(a.name)
+        else:
+            s = 30.0
+        return s + a.bonus
+
+    def _candidates(self, word: str) -> Iterable[int]:
+        if len(word) <= _SHORT_PREFIX:
+            return self._short.get(word, ())
+        lo = bisect_left(self._tokens, word)
+        hi = min(lo + _SCAN_CAP, len(self._tokens))
+        out = set()
+        for k in range(lo, hi):
+            if not self._tokens[k].startswith(word):
+                break
+            out.add(self._ids[k])
+        return out
+
+    def _suggest(self, query: str, limit: int = 8) -> Tuple[Suggestion, ...]:
+        q = fold(query)
+        words = [w for w in q.split() if w not in _STOPWORDS]
+        if not words:
+            return ()
+        hits = []
+        # Longest word first: it narrows candidates the most (country words have none).
+        cands = (self._candidates(w) for w in sorted(words, key=len, reverse=True))
+        for i in next((c for c in cands if c), ()):
+            tokens = self._airports[i].tokens
+            if all(any(t.startswith(w) for t in tokens) for w in words):
+                hits.append((self._score(i, q), i))
+        hits.sort(key=lambda h: (-h[0], self._airports[h[1]].iata))
+        return tuple(Suggestion(*self._airports[i].out, round(s, 1)) for s, i in hits[:limit])
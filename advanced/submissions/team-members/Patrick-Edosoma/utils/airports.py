@@ -2,9 +2,19 @@
 from __future__ import annotations
 import csv
 import os
-from typing import Dict, Tuple, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, Optional
 
-import pycountry
+import numpy as np
+
+from utils.airport_index import AirportIndex, open_index, source_stamp
+from utils.city_index import CityIndex, CityMatch, build_city_index, fold
+from utils.airport_suggest import SuggestIndex, Suggestion
+from utils.geo_index import GeoIndex
+
+try:
+    import pycountry
 
     def _country_name(alpha2: str) -> str:
         if not alpha2:
@@ -292,6 +302,11 @@ def load_airports(csv_path: str = DATA_PATH) -> Tuple[Dict[str, dict], Dict[str,
             country = _country_name(country_code)
             name = (row.get("name") or "").strip()
             atype = (row.get("type") or "").strip()
+            try:
+                lat = float(row.get("latitude_deg") or "nan")
+                lon = float(row.get("longitude_deg") or "nan")
+            except ValueError:
+                lat = lon = float("nan")
 
             by_iata[iata] = {
                 "iata": iata,
@@ -299,6 +314,8 @@ def load_airports(csv_path: str = DATA_PATH) -> Tuple[Dict[str, dict], Dict[str,
                 "country": country,
                 "name": name,
                 "type": atype,
+                "lat": lat,
+                "lon": lon,
             }
 
             if city and country:
@@ -316,13 +333,36 @@ def load_airports(csv_path: str = DATA_PATH) -> Tuple[Dict[str, dict], Dict[str,
     return by_iata, city_to_iata
 
 
-_BY_IATA, _CITY_TO_IATA = load_airports()
+# Compiled index next to the CSV; see utils/airport_index.py.
+INDEX_PATH = os.getenv("AIRPORT_INDEX_PATH") or os.path.splitext(DATA_PATH)[0] + ".idx"
+# How often (seconds) a running process re-checks the CSV for changes.
+INDEX_CHECK_S = float(os.getenv("AIRPORT_INDEX_CHECK_S", "30"))
+
+_index: Optional[AirportIndex] = None
+_index_checked = 0.0
+_index_lock = threading.Lock()
+_derived_cache: Dict[str, Tuple[AirportIndex, Any]] = {}
+
+
+def _airports() -> AirportIndex:
+    """Return the airport index, opening (or rebuilding) it on first use."""
+    global _index, _index_checked
+    now = time.monotonic()
+    idx = _index
+    if idx is not None and now - _index_checked < INDEX_CHECK_S:
+        return idx
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_checked >= INDEX_CHECK_S:
+            if _index is None or _index.stamp != source_stamp(DATA_PATH):
+                _index = open_index(DATA_PATH, INDEX_PATH, load_airports)
+            _index_checked = time.monotonic()
+        return _index
 
 
 def get_city_for_iata(iata: str) -> str:
     if not iata:
         return iata
-    info = _BY_IATA.get(iata.upper())
+    info = _airports().lookup(iata.upper())
     if not info:
         return iata.upper()
     city = info.get("city") or iata.upper()
@@ -330,26 +370,172 @@ def get_city_for_iata(iata: str) -> str:
     return f"{city}, {country}".strip(", ")
 
 
-def get_iata_for_city(city_or_code: str, country_hint: Optional[str] = None) -> str:
-    if not city_or_code:
-        return city_or_code
+def _derived(name: str, build: Callable[[AirportIndex], Any]) -> Any:
+    """Return an index derived from the airport index, rebuilt whenever that changes."""
+    index = _airports()
+    cached = _derived_cache.get(name)
+    if cached is None or cached[0] is not index:
+        with _index_lock:
+            cached = _derived_cache.get(name)
+            if cached is None or cached[0] is not index:
+                cached = _derived_cache[name] = (index, build(index))
+    return cached[1]
+
+
+def _city_index() -> CityIndex:
+    return _derived("cities", build_city_index)
+
+
+def _suggest_index() -> SuggestIndex:
+    return _derived("suggest", lambda index: SuggestIndex(index.iter_airports()))
+
+
+def search_cities(query: str, country_hint: Optional[str] = None, limit: int = 5) -> List[CityMatch]:
+    """Ranked airports for a free-text city (prefix, alias and typo tolerant)."""
+    return _city_index().search(query, country_hint, limit)
+
+
+def suggest_airports(query: str, limit: int = 8) -> List[Suggestion]:
+    """Autocomplete matches across IATA codes, airport names and cities, best first.
+
+    Falls back to the typo-tolerant city search when nothing matches as typed.
+    """
+    hits = list(_suggest_index().suggest(query, limit))
+    if hits:
+        return hits
+    out = []
+    for m in search_cities(query, limit=limit):
+        info = _airports().lookup(m.iata) or {}
+        out.append(Suggestion(m.iata, info.get("name", ""), m.city, m.country, info.get("type", ""), round(m.score * 30, 1)))
+    return out
+
+
+def resolve_airport(value: str, country_hint: Optional[str] = None) -> Optional[str]:
+    """IATA code for a known airport code or resolvable city, else None.
+
+    Without airport data every three-letter code is accepted as typed.
+    """
+    v = (value or "").strip()
+    if not v:
+        return None
+    index = _airports()
+    if len(v) == 3 and v.isalpha():
+        if len(index) == 0 or index.lookup(v):
+            return v.upper()
+        code = _city_index().best(v, country_hint)  # e.g. "NYC", "Rio"
+    else:
+        code = get_iata_for_city(v, country_hint)
+    return code if code and index.lookup(code) else None
+
+
+class NearbyAirport(NamedTuple):
+    iata: str
+    name: str
+    city: str
+    country: str
+    type: str
+    distance_km: float
+
+
+class _AirportGeo:
+    """Grid index over the compiled index's coordinate columns, plus type masks."""
+
+    def __init__(self, index: AirportIndex) -> None:
+        cols = index.columns()
+        self.index = index
+        self.grid = GeoIndex(cols["lat"], cols["lon"])
+        type_off, type_len = cols["off"][:, 3], cols["len"][:, 3]
+        # Type strings are interned in the index, so equal types share an offset.
+        offs, first = np.unique(type_off, return_index=True)
+        self._type_offsets = {index.string_at(o, type_len[i]): o for o, i in zip(offs, first)}
+        self._type_off = type_off
+        self._masks: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def mask(self, types: Optional[Tuple[str, ...]]) -> Optional[np.ndarray]:
+        if not types:
+            return None
+        m = self._masks.get(types)
+        if m is None:
+            wanted = [self._type_offsets[t] for t in types if t in self._type_offsets]
+            m = self._masks[types] = np.isin(self._type_off, wanted)
+        return m
+
+
+def nearest_airports(
+    lat: float, lon: float, k: int = 5, radius_km: Optional[float] = None,
+    types: Optional[Tuple[str, ...]] = ("large_airport", "medium_airport"),
+) -> List[NearbyAirport]:
+    """Airports closest to a coordinate, nearest first.
+
+    Args:
+        lat: Latitude in degrees.
+        lon: Longitude in degrees.
+        k: Max airports returned.
+        radius_km: Only airports within this great-circle distance; None for no limit.
+        types: Airport types to consider (None for all); defaults to airports
+            likely to have scheduled service.
+
+    Returns:
+        List[NearbyAirport]: Up to ``k`` airports with their distance in km.
+    """
+    geo: _AirportGeo = _derived("geo", _AirportGeo)
+    out = []
+    for row, dist in geo.grid.nearest(lat, lon, k, radius_km, geo.mask(tuple(types) if types else None)):
+        a = geo.index.record_at(row)
+        out.append(NearbyAirport(a["iata"], a["name"], a["city"], a["country"], a["type"], round(dist, 1)))
+    return out
+
+
+_METRO_TYPES = ("large_airport", "medium_airport")
+_METRO_RANK = {t: i for i, t in enumerate(_METRO_TYPES)}
+
+
+def _build_metros(index: AirportIndex) -> Dict[Tuple[str, str], List[str]]:
+    """``{(folded city, country): [IATA, ...]}`` for airports with likely scheduled service."""
+    metros: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+    for a in index.iter_airports():
+        rank = _METRO_RANK.get(a["type"])
+        if rank is None or not a["city"]:
+            continue
+        metros.setdefault((fold(a["city"]), a["country"]), []).append((rank, a["iata"]))
+    return {k: [code for _, code in sorted(v)] for k, v in metros.items() if len(v) > 1}
+
+
+def airports_serving(iata: str, max_airports: int = 3) -> List[str]:
+    """Airports serving the same municipality as ``iata``, starting with ``iata`` itself.
+
+    Args:
+        iata: An airport code, e.g. "LHR".
+        max_airports: Cap on the codes returned (larger airports are kept first).
+
+    Returns:
+        List[str]: e.g. ``["LHR", "LGW", "LCY"]``; just ``[iata]`` for single-airport
+        cities, small airfields or unknown codes.
+    """
+    code = (iata or "").strip().upper()
+    info = _airports().lookup(code)
+    if not info or not info["city"]:
+        return [code]
+    metro = _derived("metros", _build_metros).get((fold(info["city"]), info["country"]), [])
+    return ([code] + [c for c in metro if c != code])[:max(max_airports, 1)]
+
+
+def get_iata_for_city(city_or_code: str, country_hint: Optional[str] = None) -> Optional[str]:
+    """IATA code for a three-letter code (as typed) or a resolvable city; None otherwise."""
+    if not city_or_code or not city_or_code.strip():
+        return None
     v = city_or_code.strip()
     if len(v) == 3 and v.isalpha():
         return v.upper()
 
     if country_hint:
-        key = f"{v}, {country_hint}".lower()
-        code = _CITY_TO_IATA.get(key)
+        code = _airports().city_iata(f"{v}, {country_hint}".lower())
         if code:
             return code
 
-    city_lower = v.lower()
-    candidates = [k for k in _CITY_TO_IATA.keys() if k.startswith(city_lower + ", ")]
-    if candidates:
-        return _CITY_TO_IATA[candidates[0]]
-
-    return v[:3].upper()
+    # Unresolved: None rather than the raw input or a code invented from its first letters.
+    return _city_index().best(v, country_hint) or None
 
 
-def normalize_to_iata(value: str, country_hint: Optional[str] = None) -> str:
+def normalize_to_iata(value: str, country_hint: Optional[str] = None) -> Optional[str]:
     return get_iata_for_city(value, country_hint=country_hint)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+import os
+import threading
+import time
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Failure/latency circuit breaker for one upstream provider.
+
+    Args:
+        name: Provider name used in logs and snapshots.
+        window: Number of recent calls considered.
+        min_calls: Calls needed in the window before the breaker may open.
+        failure_ratio: Share of bad calls (errors or slow calls) that opens the breaker.
+        slow_call_s: Calls slower than this count as bad even if they succeed.
+        open_s: Seconds to stay open before letting probe requests through.
+        half_open_probes: Concurrent probe requests allowed while half-open.
+
+    Notes:
+        Closed: calls flow and outcomes are recorded. Open: calls are rejected
+        immediately so callers can use their fallback. Half-open: a few probes go
+        through; a good probe closes the breaker, a bad one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        slow_call_s: float = 8.0,
+        open_s: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_s = slow_call_s
+        self.open_s = open_s
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._latency_ewma: Optional[float] = None
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed (reserving a probe slot when half-open)."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_s:
+                self._transition(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record(self, ok: bool, latency_s: float) -> None:
+        """Record the outcome of a call admitted by :meth:`allow`."""
+        bad = (not ok) or latency_s > self.slow_call_s
+        with self._lock:
+            a = 0.2
+            self._latency_ewma = latency_s if self._latency_ewma is None else (1 - a) * self._latency_ewma + a * latency_s
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                self._transition(OPEN if bad else CLOSED)
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append(bad)
+            n = len(self._outcomes)
+            if n >= self.min_calls and sum(self._outcomes) / n >= self.failure_ratio:
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            if state == OPEN:
+                self._opened_at = time.monotonic()
+            return
+        logger.warning("circuit %s: %s -> %s", self.name, self._state, state)
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._times_opened += 1
+        elif state == CLOSED:
+            self._outcomes.clear()
+        self._probes = 0
+
+    def _forget(self) -> None:
+        """Give back the probe slot :meth:`allow` reserved for a call that records no outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+        ignore: Callable[[BaseException], bool] = lambda e: False,
+        before: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """Run ``fn`` under the breaker.
+
+        Args:
+            fn: Zero-argument callable making the upstream request.
+            is_failure: Decides whether an exception reflects provider health
+                (e.g. client-side 4xx errors should not open the breaker).
+            ignore: Exceptions that say nothing either way (e.g. a timeout the
+                caller's own deadline imposed); no outcome is recorded for them.
+            before: Runs once the breaker admits the call, before ``fn`` (e.g. to
+                take a rate-limit token only for calls that actually go out). If
+                it raises, the call is abandoned without an outcome.
+
+        Returns:
+            Any: Result of ``fn``.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            Exception: Whatever ``fn`` raised.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if before is not None:
+            try:
+                before()
+            except BaseException:
+                self._forget()
+                raise
+        t0 = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self._settle(e, is_failure, ignore, t0)
+            raise
+        except BaseException:
+            self._forget()
+            raise
+        self.record(True, time.monotonic() - t0)
+        return result
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+        ignore: Callable[[BaseException], bool] = lambda e: False,
+        before: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """Async :meth:`call` (``before`` is awaited); a cancelled call records no outcome."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if before is not None:
+            try:
+                await before()
+            except BaseException:
+                self._forget()
+                raise
+        t0 = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._settle(e, is_failure, ignore, t0)
+            raise
+        except BaseException:
+            self._forget()
+            raise
+        self.record(True, time.monotonic() - t0)
+        return result
+
+    def _settle(
+        self,
+        e: BaseException,
+        is_failure: Callable[[BaseException], bool],
+        ignore: Callable[[BaseException], bool],
+        t0: float,
+    ) -> None:
+        if ignore(e):
+            self._forget()
+        else:
+            self.record(not is_failure(e), time.monotonic() - t0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return breaker state and recent health for monitoring."""
+        with self._lock:
+            n = len(self._outcomes)
+            return {
+                "state": self._state,
+                "recent_calls": n,
+                "recent_failure_ratio": round(sum(self._outcomes) / n, 3) if n else 0.0,
+                "latency_ewma_s": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+                "rejected": self._rejected,
+                "times_opened": self._times_opened,
+                "retry_in_s": round(max(self.open_s - (time.monotonic() - self._opened_at), 0.0), 1)
+                if self._state == OPEN else 0.0,
+            }
+
+
+def _from_env(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        window=int(os.getenv("BREAKER_WINDOW", "20")),
+        min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+        failure_ratio=float(os.getenv("BREAKER_FAILURE_RATIO", "0.5")),
+        slow_call_s=float(os.getenv("BREAKER_SLOW_CALL_S", "8")),
+        open_s=float(os.getenv("BREAKER_OPEN_S", "30")),
+    )
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {name: _from_env(name) for name in ("amadeus", "serpapi", "tavily")}
+
+
+def breaker_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Return ``{provider: snapshot}`` for every provider breaker."""
+    return {name: b.snapshot() for name, b in BREAKERS.items()}
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.airport_index import AirportIndex
+
+# Common names and abbreviations that don't appear in the airports CSV.
+CITY_ALIASES: Dict[str, str] = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "dc": "washington",
+    "washington dc": "washington",
+    "rio": "rio de janeiro",
+    "bombay": "mumbai",
+    "calcutta": "kolkata",
+    "madras": "chennai",
+    "peking": "beijing",
+    "saigon": "ho chi minh city",
+    "kiev": "kyiv",
+    "constantinople": "istanbul",
+}
+
+COUNTRY_ALIASES: Dict[str, str] = {
+    "usa": "united states",
+    "us": "united states",
+    "america": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "england": "united kingdom",
+    "scotland": "united kingdom",
+    "wales": "united kingdom",
+    "britain": "united kingdom",
+    "great britain": "united kingdom",
+    "uae": "united arab emirates",
+    "russia": "russian federation",
+    "south korea": "korea republic of",
+    "korea": "korea republic of",
+    "vietnam": "viet nam",
+    "turkey": "turkiye",
+    "ivory coast": "cote d ivoire",
+    "holland": "netherlands",
+    "czech republic": "czechia",
+}
+
+# Token spellings folded to one form on both sides ("St. Louis" == "Saint Louis").
+_TOKEN_ALIASES = {"st": "saint", "ste": "sainte", "ft": "fort", "mt": "mount"}
+
+_TYPE_PREF = {"large_airport": 3, "medium_airport": 2, "small_airport": 1}
+_PREFIX_SCAN = 500
+_FUZZY_CANDIDATES = 25
+_FUZZY_MIN_SIM = 0.7
+
+
+class CityMatch(NamedTuple):
+    iata: str
+    city: str
+    country: str
+    score: float
+
+
+class _Entry(NamedTuple):
+    name: str        # folded city name
+    country: str     # folded country name
+    iata: str
+    city: str
+    country_display: str
+    pref: int
+    rank: int
+
+
+def fold(text: str) -> str:
+    """Lower-case, strip accents and punctuation, and normalize common abbreviations."""
+    s = unicodedata.normalize("NFKD", text or "")
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    s = re.sub(r"[^a-z0-9]+", " ", s).strip()
+    return " ".join(_TOKEN_ALIASES.get(t, t) for t in s.split())
+
+
+def _trigrams(s: str) -> List[str]:
+    p = f"  {s} "
+    return [p[i:i + 3] for i in range(len(p) - 2)]
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting adjacent swaps as one edit; returns limit + 1 once exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                v = min(v, before[j - 2] + 1)
+            cur.append(v)
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+class CityIndex:
+    """Ranked city -> airport search.
+
+    Args:
+        entries: ``(city, country, iata, airport_type, first_seen_rank)`` tuples.
+
+    Notes:
+        Queries are folded (case, accents, punctuation), aliases are applied and a
+        trailing country ("Lagos Nigeria", "Paris, FR"-style names) is split off.
+        Exact city names rank first, then prefixes, then trigram candidates
+        confirmed by edit distance. Ties prefer larger airports, then CSV order.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str, str, int]]) -> None:
+        items: List[_Entry] = []
+        for city, country, iata, atype, rank in entries:
+            name = fold(city)
+            if name:
+                items.append(_Entry(name, fold(country), iata, city, country, _TYPE_PREF.get(atype, 0), rank))
+        items.sort(key=lambda e: (e.name, -e.pref, e.rank))
+        self._entries = items
+        self._names = [e.name for e in items]
+        self._countries = {e.country for e in items if e.country}
+        self._grams: Optional[Dict[str, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _trigram_index(self) -> Dict[str, List[int]]:
+        if self._grams is None:
+            grams: Dict[str, List[int]] = {}
+            last = None
+            for i, name in enumerate(self._names):
+                if name == last:
+                    continue  # one slot per distinct name; _expand() recovers the rest
+                last = name
+                for g in set(_trigrams(name)):
+                    grams.setdefault(g, []).append(i)
+            self._grams = grams
+        return self._grams
+
+    def _country(self, text: str) -> Optional[str]:
+        c = COUNTRY_ALIASES.get(text, text)
+        return c if c in self._countries else None
+
+    def _interpretations(self, query: str, country_hint: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+        """Possible ``(city, country)`` readings of a query, most specific first."""
+        out: List[Tuple[str, Optional[str]]] = []
+        hint = self._country(fold(country_hint)) if country_hint else None
+        if "," in query:
+            head, _, tail = query.rpartition(",")
+            c = self._country(fold(tail))
+            if c and fold(head):
+                out.append((fold(head), c))
+        words = fold(query).split()
+        for k in (3, 2, 1):
+            if len(words) > k:
+                c = self._country(" ".join(words[-k:]))
+                if c:
+                    out.append((" ".join(words[:-k]), c))
+        out.append((fold(query), hint))
+        return [(CITY_ALIASES.get(city, city), country) for city, country in out]
+
+    def _expand(self, i: int) -> Iterable[int]:
+        name = self._names[i]
+        while i < len(self._names) and self._names[i] == name:
+            yield i
+            i += 1
+
+    def _candidates(self, city: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        lo = bisect_left(self._names, city)
+        for i in range(lo, min(lo + _PREFIX_SCAN, len(self._names))):
+            name = self._names[i]
+            if not name.startswith(city):
+                break
+            scores[i] = 1.0 if name == city else 0.8 + 0.19 * len(city) / len(name)
+        if scores or len(city) < 3:
+            return scores
+
+        counts: Counter = Counter()
+        grams = self._trigram_index()
+        for g in set(_trigrams(city)):
+            for i in grams.get(g, ()):
+                counts[i] += 1
+        limit = max(1, len(city) // 4)
+        for i, _ in counts.most_common(_FUZZY_CANDIDATES):
+            name = self._names[i]
+            d = _edit_distance(city, name, limit)
+            sim = 1.0 - d / max(len(city), len(name))
+            if d <= limit and sim >= _FUZZY_MIN_SIM:
+                for j in self._expand(i):
+                    scores[j] = 0.75 * sim
+        return scores
+
+    def search(self, query: str, country_hint: Optional[str] = None, limit: int = 5) -> List[CityMatch]:
+        """Return up to ``limit`` airports for a city query, best first.
+
+        Args:
+            query: Free-text city, e.g. "lagos", "Lagos Nigeria", "NYC", "Zurich".
+            country_hint: Optional country name or alias used to narrow results.
+            limit: Max matches returned.
+
+        Returns:
+            List[CityMatch]: Matches with a relevance score in (0, 1].
+        """
+        for city, country in self._interpretations(query or "", country_hint):
+            if not city:
+                continue
+            scores = self._candidates(city)
+            if country:
+                narrowed = {i: s for i, s in scores.items() if self._entries[i].country == country}
+                scores = narrowed or scores
+            if not scores:
+                continue
+            ranked = sorted(scores, key=lambda i: (-scores[i], -self._entries[i].pref, self._entries[i].rank))
+            out: List[CityMatch] = []
+            seen = set()
+            for i in ranked:
+                e = self._entries[i]
+                if e.iata in seen:
+                    continue
+                seen.add(e.iata)
+                out.append(CityMatch(e.iata, e.city, e.country_display, round(scores[i], 3)))
+                if len(out) >= limit:
+                    break
+            return out
+        return []
+
+    def best(self, query: str, country_hint: Optional[str] = None) -> Optional[str]:
+        """IATA code of the top match, or None."""
+        hits = self.search(query, country_hint, limit=1)
+        return hits[0].iata if hits else None
+
+
+def build_city_index(index: AirportIndex) -> CityIndex:
+    """Build a :class:`CityIndex` from the compiled airport index's city table."""
+    entries = []
+    for _, rank, iata in index.iter_cities():
+        info = index.lookup(iata)
+        if info:
+            entries.append((info["city"], info["country"], iata, info["type"], rank))
+    return CityIndex(entries)
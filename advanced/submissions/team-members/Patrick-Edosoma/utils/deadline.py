@@ -0,0 +1,65 @@
+from __future__ import annotations
+import threading
+import time
+from typing import List, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is skipped because its time budget is already spent."""
+
+
+class Deadline:
+    """Absolute time budget shared by the planner, agents and providers.
+
+    Args:
+        seconds: Budget from now; None means unbounded.
+
+    Notes:
+        Children carve a share of the remaining time out of their parent and share
+        its ``degraded`` notes, so whoever falls back to cached or sample data can
+        record it and the planner can report it in the itinerary rationale.
+    """
+
+    def __init__(self, seconds: Optional[float] = None) -> None:
+        self.expires_at: Optional[float] = None if seconds is None else time.monotonic() + max(seconds, 0.0)
+        self.degraded: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: the provider's own ``cap`` clipped to the remaining budget."""
+        left = self.remaining()
+        return cap if left is None else max(min(cap, left), 0.001)
+
+    def child(self, share: float = 1.0, reserve_s: float = 0.0) -> "Deadline":
+        """Sub-budget of ``share`` of the remaining time after holding back ``reserve_s``."""
+        d = Deadline()
+        left = self.remaining()
+        if left is not None:
+            d.expires_at = time.monotonic() + max(left - reserve_s, 0.0) * share
+        d.degraded = self.degraded
+        d._lock = self._lock
+        return d
+
+    def note_degraded(self, part: str, how: str) -> None:
+        """Record that ``part`` of the plan was served degraded (e.g. 'hotels', 'used cached results')."""
+        note = f"{part} ({how})"
+        with self._lock:
+            if note not in self.degraded:
+                self.degraded.append(note)
+
+    def merge_degraded(self, other: "Deadline") -> None:
+        """Copy ``other``'s degraded notes (e.g. of a provider call shared by several plans)."""
+        with self._lock:
+            for note in other.degraded:
+                if note not in self.degraded:
+                    self.degraded.append(note)
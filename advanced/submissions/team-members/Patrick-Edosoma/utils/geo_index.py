@@ -0,0 +1,124 @@
+from __future__ import annotations
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+_MAX_KM = math.pi * EARTH_RADIUS_KM  # half the circumference: every point is within this
+_FIRST_RING_KM = 150.0
+
+
+class GeoIndex:
+    """Nearest-neighbour search over points on the globe using a lat/lon grid.
+
+    Args:
+        lat: Latitudes in degrees (NaN rows are ignored).
+        lon: Longitudes in degrees.
+        cell_deg: Grid cell size in degrees.
+
+    Notes:
+        Points are bucketed into ``cell_deg`` cells stored CSR-style (one sorted
+        order array plus per-cell start offsets). A query only reads the cells
+        overlapping its search radius and measures exact great-circle distances for
+        those candidates with NumPy. Without a radius the search starts small and
+        doubles until ``k`` points are found.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_deg: float = 2.0) -> None:
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        ok = np.isfinite(lat) & np.isfinite(lon)
+        self.ids = np.nonzero(ok)[0]
+        self.cell_deg = cell_deg
+        self.n_lat = int(math.ceil(180.0 / cell_deg))
+        self.n_lon = int(math.ceil(360.0 / cell_deg))
+
+        la, lo = lat[ok], (lon[ok] + 180.0) % 360.0 - 180.0
+        cells = self._cell(la, lo)
+        order = np.argsort(cells, kind="stable")
+        self.ids = self.ids[order]
+        self._lat = np.radians(la[order])
+        self._lon = np.radians(lo[order])
+        self._cos_lat = np.cos(self._lat)
+        self._starts = np.searchsorted(cells[order], np.arange(self.n_lat * self.n_lon + 1))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        r = np.clip(((lat + 90.0) // self.cell_deg).astype(np.int64), 0, self.n_lat - 1)
+        c = np.clip(((lon + 180.0) // self.cell_deg).astype(np.int64), 0, self.n_lon - 1)
+        return r * self.n_lon + c
+
+    def _gather(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Positions (into the sorted arrays) of points in cells overlapping the radius."""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        r0 = max(int((lat - dlat + 90.0) // self.cell_deg), 0)
+        r1 = min(int((lat + dlat + 90.0) // self.cell_deg), self.n_lat - 1)
+        # Widest longitude span over the band of rows (pole-side edge), or the whole row.
+        edge = min(abs(lat) + dlat, 90.0)
+        cos_edge = math.cos(math.radians(edge))
+        if edge >= 89.9 or radius_km / EARTH_RADIUS_KM >= math.pi / 2 or cos_edge <= 0:
+            col_ranges = [(0, self.n_lon - 1)]
+        else:
+            dlon = math.degrees(math.asin(min(math.sin(radius_km / EARTH_RADIUS_KM) / cos_edge, 1.0)))
+            if dlon >= 180.0:
+                col_ranges = [(0, self.n_lon - 1)]
+            else:
+                c0 = int(((lon - dlon + 180.0) % 360.0) // self.cell_deg)
+                c1 = int(((lon + dlon + 180.0) % 360.0) // self.cell_deg)
+                c0, c1 = min(c0, self.n_lon - 1), min(c1, self.n_lon - 1)
+                col_ranges = [(c0, c1)] if c0 <= c1 else [(c0, self.n_lon - 1), (0, c1)]
+        parts = []
+        for r in range(r0, r1 + 1):
+            base = r * self.n_lon
+            for c0, c1 in col_ranges:
+                a, b = self._starts[base + c0], self._starts[base + c1 + 1]
+                if b > a:
+                    parts.append(np.arange(a, b))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _distances(self, pos: np.ndarray, lat: float, lon: float) -> np.ndarray:
+        p, q = math.radians(lat), math.radians(lon)
+        dphi = self._lat[pos] - p
+        dl = self._lon[pos] - q
+        h = np.sin(dphi / 2) ** 2 + math.cos(p) * self._cos_lat[pos] * np.sin(dl / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 5, radius_km: Optional[float] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(row_id, distance_km)`` pairs, nearest first.
+
+        Args:
+            lat: Query latitude in degrees.
+            lon: Query longitude in degrees.
+            k: Max results.
+            radius_km: Only return points within this distance; None for no limit.
+            mask: Optional boolean array over the original rows; False rows are skipped.
+
+        Returns:
+            List[Tuple[int, float]]: Row ids into the arrays given to the constructor.
+        """
+        if k <= 0 or not len(self.ids):
+            return []
+        lon = (lon + 180.0) % 360.0 - 180.0
+        limit = _MAX_KM if radius_km is None else min(radius_km, _MAX_KM)
+        r = min(_FIRST_RING_KM, limit) if radius_km is None else limit
+        while True:
+            pos = self._gather(lat, lon, r)
+            if mask is not None and len(pos):
+                pos = pos[mask[self.ids[pos]]]
+            d = self._distances(pos, lat, lon)
+            inside = d <= r
+            pos, d = pos[inside], d[inside]
+            if len(pos) >= k or r >= limit:
+                break
+            r = min(r * 2.0, limit)
+        if len(pos) > k:
+            top = np.argpartition(d, k - 1)[:k]
+            pos, d = pos[top], d[top]
+        order = np.argsort(d, kind="stable")
+        return [(int(self.ids[pos[i]]), float(d[i])) for i in order]
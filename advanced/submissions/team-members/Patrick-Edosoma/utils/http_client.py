@@ -0,0 +1,109 @@
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import logging
+import weakref
+from typing import List, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Per-host keep-alive pool size (connections kept open to each provider host).
+POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "20"))
+# Number of distinct host pools cached (Amadeus, SerpApi, Tavily + headroom).
+POOL_HOSTS = int(os.getenv("PROVIDER_POOL_HOSTS", "8"))
+
+# Total connections shared by async provider calls across all hosts.
+ASYNC_POOL_SIZE = int(os.getenv("PROVIDER_ASYNC_POOL_SIZE", "100"))
+
+_session: Optional[requests.Session] = None
+# One async client per event loop: httpx connections belong to the loop that opened them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _build_session(pool_size: int, pool_hosts: int) -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=False)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide provider session, creating it on first use.
+
+    Returns:
+        requests.Session: Session with a keep-alive connection pool per host.
+
+    Notes:
+        Shared by all provider calls so TCP/TLS handshakes are paid once per
+        pooled connection instead of once per request.
+    """
+    global _session
+    s = _session
+    if s is not None:
+        return s
+    with _lock:
+        if _session is None:
+            _session = _build_session(POOL_SIZE, POOL_HOSTS)
+            logger.info("Provider HTTP session created (pool_size=%d, hosts=%d)", POOL_SIZE, POOL_HOSTS)
+        return _session
+
+
+def close_session() -> None:
+    """Close pooled provider connections; safe to call more than once."""
+    global _session
+    with _lock:
+        s, _session = _session, None
+    if s is not None:
+        s.close()
+        logger.info("Provider HTTP session closed")
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the running event loop's async provider client, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: Client with a shared keep-alive pool of
+        PROVIDER_ASYNC_POOL_SIZE connections.
+
+    Notes:
+        Must be called from within a running event loop. Each loop gets its own
+        client (e.g. repeated ``asyncio.run`` in scripts, or a loop per thread);
+        :func:`aclose_async_client` closes all of them. Timeouts are passed per
+        request by the provider functions.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        c = _async_clients.get(loop)
+        if c is None or c.is_closed:
+            limits = httpx.Limits(max_connections=ASYNC_POOL_SIZE, max_keepalive_connections=ASYNC_POOL_SIZE)
+            c = _async_clients[loop] = httpx.AsyncClient(limits=limits)
+            logger.info("Provider async client created (pool_size=%d)", ASYNC_POOL_SIZE)
+        return c
+
+
+async def aclose_async_client() -> None:
+    """Close every loop's async provider client; safe to call more than once.
+
+    Clients of other running loops are closed on their own loop; those of loops
+    already closed cannot be, and are dropped with their loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients: List[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = list(_async_clients.items())
+        _async_clients.clear()
+    for owner, c in clients:
+        if owner is loop:
+            await c.aclose()
+        elif owner.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(c.aclose(), owner))
+        else:
+            logger.debug("Dropping async client of a finished event loop")
+            continue
+        logger.info("Provider async client closed")
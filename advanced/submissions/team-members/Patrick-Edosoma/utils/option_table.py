@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Any, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from models import FlightOption, HotelOption
+
+M = TypeVar("M", bound=BaseModel)
+T = TypeVar("T", bound="OptionTable")
+
+# Sort value for a missing (or zero) price/duration, as the original sort keys used.
+_MISSING = 9e9
+
+Item = Union[BaseModel, dict]
+
+
+def _get(item: Item, field: str) -> Any:
+    return item.get(field) if isinstance(item, dict) else getattr(item, field, None)
+
+
+def _codes(values: np.ndarray) -> np.ndarray:
+    """Small integer codes for a column (equal values share a code)."""
+    return np.unique(values, return_inverse=True)[1].reshape(-1)
+
+
+class OptionTable(Generic[M]):
+    """Provider results as NumPy columns, keeping the original items for the final picks.
+
+    Args:
+        items: Models, or rows dumped from models (as the response cache returns them).
+        trusted: Whether dict rows were dumped in this process from validated models
+            (rebuilt with ``model_construct``) rather than read back from the cache
+            (validated). One flag for all rows, or one per row.
+
+    Notes:
+        Filtering, dedupe and ranking only reorder and subset an index array over
+        the columns; :meth:`models` converts just the selected rows back to models.
+    """
+
+    model: Type[M]
+    columns: Tuple[str, ...] = ()
+
+    def __init__(self, items: Sequence[Item] = (), trusted: Union[bool, Sequence[bool]] = False) -> None:
+        self.items: List[Item] = list(items)
+        n = len(self.items)
+        self.trusted = np.full(n, trusted, dtype=bool) if isinstance(trusted, bool) else np.asarray(trusted, dtype=bool)
+        self._load()
+
+    def _col(self, field: str, dtype: Any, default: Any = 0) -> np.ndarray:
+        vals = (_get(it, field) for it in self.items)
+        if dtype is str:
+            return np.array([default if v is None else v for v in vals], dtype=str)
+        return np.fromiter((default if v is None else v for v in vals), dtype=dtype, count=len(self.items))
+
+    def _load(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def take(self: T, idx: np.ndarray) -> T:
+        """Rows at ``idx``, in that order."""
+        out = object.__new__(type(self))
+        out.items = [self.items[int(i)] for i in idx]
+        out.trusted = self.trusted[idx]
+        for name in self.columns:
+            setattr(out, name, getattr(self, name)[idx])
+        return out
+
+    def concat(self: T, *others: T) -> T:
+        """This table's rows followed by those of ``others``."""
+        parts = (self, *others)
+        out = object.__new__(type(self))
+        out.items = [it for t in parts for it in t.items]
+        out.trusted = np.concatenate([t.trusted for t in parts])
+        for name in self.columns:
+            setattr(out, name, np.concatenate([getattr(t, name) for t in parts]))
+        return out
+
+    def _first_of_each(self, *keys: np.ndarray) -> np.ndarray:
+        """Indices of the first row for each distinct combination of ``keys``, in row order."""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        _, first = np.unique(np.stack([_codes(k) for k in keys], axis=1), axis=0, return_index=True)
+        return np.sort(first)
+
+    def models(self) -> List[M]:
+        """Convert the rows back to models (validating cache rows, constructing trusted ones)."""
+        out: List[M] = []
+        for it, trusted in zip(self.items, self.trusted):
+            if isinstance(it, BaseModel):
+                out.append(it)
+            elif trusted:
+                out.append(self.model.model_construct(**it))
+            else:
+                out.append(self.model.model_validate(it))
+        return out
+
+
+class FlightTable(OptionTable[FlightOption]):
+    """Flight offers; ``price`` in USD and ``duration`` in minutes, plus route and airline codes."""
+
+    model = FlightOption
+    columns = ("price", "duration", "airline", "origin", "destination")
+
+    def _load(self) -> None:
+        self.price = self._col("price_usd", np.float64, 0.0)
+        self.duration = self._col("duration_minutes", np.int64, 0)
+        self.airline = self._col("airline", str, "XX")
+        self.origin = self._col("origin", str, "")
+        self.destination = self._col("destination", str, "")
+
+    def dedupe(self, band: Optional[float] = None) -> "FlightTable":
+        """Keep the first of each (route, airline, price, duration).
+
+        Args:
+            band: Compare prices in bands this wide (e.g. 10.0 USD); None compares
+                them to the cent.
+        """
+        price = np.round(self.price / band) * band if band else np.round(self.price, 2)
+        airline = np.where(self.airline == "", "XX", self.airline)
+        return self.take(self._first_of_each(self.origin, self.destination, airline, price, self.duration))
+
+    def rank(self, k: Optional[int] = None) -> "FlightTable":
+        """Cheapest first, then shortest; the first ``k`` rows."""
+        price = np.where(self.price != 0, self.price, _MISSING)
+        duration = np.where(self.duration != 0, self.duration, _MISSING)
+        order = np.lexsort((duration, price))
+        return self.take(order[:k])
+
+
+class HotelTable(OptionTable[HotelOption]):
+    """Hotel offers; ``rate`` is the nightly price in USD."""
+
+    model = HotelOption
+    columns = ("rate", "rating")
+
+    def _load(self) -> None:
+        self.rate = self._col("nightly_rate_usd", np.float64, 0.0)
+        self.rating = self._col("rating", np.float64, 0.0)
+
+    def within(self, max_rate: float, tolerance: float = 1.25) -> "HotelTable":
+        """Rows whose nightly rate is at most ``max_rate * tolerance`` (all rows if no budget)."""
+        if not max_rate:
+            return self
+        return self.take(np.nonzero(self.rate <= max_rate * tolerance)[0])
+
+    def rank(self, k: Optional[int] = None) -> "HotelTable":
+        """Cheapest first, then best rated; the first ``k`` rows."""
+        rate = np.where(self.rate != 0, self.rate, _MISSING)
+        order = np.lexsort((-self.rating, rate))
+        return self.take(order[:k])
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+# Kept below the flight response TTL so a cached plan never outlives its fares by much.
+PLAN_CACHE_TTL_S = float(os.getenv("PLAN_CACHE_TTL_S", "300"))
+PLAN_CACHE_DISABLED = os.getenv("PLAN_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+PlanKey = Tuple[str, str, str, str, int, Tuple[str, ...], bool]
+
+
+def plan_key(
+    origin: str, destination: str, start_date: date, end_date: date,
+    budget_per_night: float, interests: Optional[Iterable[str]], multi_airport: bool = False,
+) -> PlanKey:
+    """Normalized identity of a plan request.
+
+    Args:
+        origin: Origin IATA code (case and whitespace ignored).
+        destination: Destination IATA code.
+        start_date: Trip start.
+        end_date: Trip end.
+        budget_per_night: Nightly budget, rounded to whole dollars.
+        interests: Interests; case, order and duplicates are ignored.
+        multi_airport: Whether flights cover every airport serving both cities.
+
+    Returns:
+        PlanKey: Hashable key; requests with equal keys get the same plan.
+    """
+    norm = tuple(sorted({(i or "").strip().lower() for i in interests or []} - {""}))
+    return (
+        (origin or "").strip().upper(),
+        (destination or "").strip().upper(),
+        start_date.isoformat(),
+        end_date.isoformat(),
+        int(round(float(budget_per_night or 0.0))),
+        norm,
+        bool(multi_airport),
+    )
+
+
+class PlanCache(Generic[V]):
+    """Thread-safe in-memory LRU cache with a per-entry TTL.
+
+    Args:
+        maxsize: Entries kept; the least recently used entry is evicted beyond this.
+        ttl_s: Seconds an entry stays valid after it is stored.
+    """
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE, ttl_s: float = PLAN_CACHE_TTL_S) -> None:
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the live entry for ``key`` (marking it recently used), else None."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class RateLimited(RuntimeError):
+    """Raised instead of calling a provider when no request slot frees up in time."""
+
+
+class TokenBucket:
+    """Token bucket pacing the calls made to one upstream provider.
+
+    Args:
+        name: Provider name used in errors and snapshots.
+        rate: Calls per second on average; 0 or less disables the limit.
+        burst: Calls that may go out back to back after an idle period.
+
+    Notes:
+        Callers reserve a token under a lock and then wait outside it, so waiting
+        callers queue up in arrival order without holding the lock. A caller whose
+        wait would exceed ``max_wait_s`` takes no token and gets ``RateLimited``
+        (fallback data) instead of blocking past its deadline.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waited = 0
+        self._rejected = 0
+
+    def reserve(self, max_wait_s: Optional[float] = None) -> float:
+        """Take a token and return the seconds to wait before using it.
+
+        Raises:
+            RateLimited: If the wait would exceed ``max_wait_s`` (no token is taken).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(1.0 - self._tokens, 0.0) / self.rate
+            if max_wait_s is not None and wait > max_wait_s:
+                self._rejected += 1
+                raise RateLimited(f"{self.name} rate limit: next call in {wait:.2f}s")
+            self._tokens -= 1.0
+            if wait:
+                self._waited += 1
+            return wait
+
+    def acquire(self, max_wait_s: Optional[float] = None) -> None:
+        """Block until a call may go out (see :meth:`reserve`)."""
+        wait = self.reserve(max_wait_s)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait_s: Optional[float] = None) -> None:
+        """Non-blocking :meth:`acquire`."""
+        wait = self.reserve(max_wait_s)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"rate_per_s": self.rate, "burst": self.burst, "waited": self._waited, "rejected": self._rejected}
+
+
+# Amadeus self-service (test) allows 10 transactions/s, at most one per 100 ms.
+_DEFAULT_RATES = {"amadeus": ("10", "1"), "serpapi": ("0", "1"), "tavily": ("0", "1")}
+
+
+def _from_env(name: str) -> TokenBucket:
+    rate, burst = _DEFAULT_RATES[name]
+    prefix = name.upper()
+    return TokenBucket(
+        name,
+        rate=float(os.getenv(f"{prefix}_RATE_PER_S", rate)),
+        burst=int(os.getenv(f"{prefix}_RATE_BURST", burst)),
+    )
+
+
+RATE_LIMITS: Dict[str, TokenBucket] = {name: _from_env(name) for name in _DEFAULT_RATES}
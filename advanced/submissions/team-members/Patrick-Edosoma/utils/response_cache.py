@@ -0,0 +1,178 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv(
+    "PROVIDER_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "tripsmith_provider_cache.sqlite3"),
+)
+CACHE_DISABLED = os.getenv("PROVIDER_CACHE_DISABLED", "").lower() in {"1", "true", "yes"}
+# Expired entries are deleted in the background after this many writes.
+PURGE_EVERY_SETS = int(os.getenv("PROVIDER_CACHE_PURGE_EVERY", "500"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL
+)
+"""
+
+
+def make_key(provider: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key from a provider name and normalized request parameters."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{provider}:{hashlib.sha256(blob.encode('utf-8')).hexdigest()}"
+
+
+class ResponseCache:
+    """SQLite-backed TTL cache for provider responses with stale-while-revalidate.
+
+    Args:
+        path: SQLite database file.
+        revalidate_workers: Threads used to refresh stale entries in the background.
+        purge_every: Writes between background purges of expired entries (0 disables).
+
+    Notes:
+        Payloads are JSON, zlib-compressed. Every entry has a fresh window (served
+        as-is) and a stale window (served immediately while one background refresh
+        runs). Storage errors are logged and treated as cache misses so a broken
+        cache never breaks a search. Expired entries are purged on the
+        revalidation threads every ``purge_every`` writes, so the file stays
+        bounded by what was written within the TTLs.
+    """
+
+    def __init__(
+        self, path: str = CACHE_PATH, revalidate_workers: int = 2, purge_every: int = PURGE_EVERY_SETS
+    ) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=revalidate_workers, thread_name_prefix="cache-revalidate")
+        self._revalidating: Set[str] = set()
+        self._lock = threading.Lock()
+        self._purge_every = purge_every
+        self._sets = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[Tuple[Any, bool]]:
+        """Return ``(value, is_fresh)`` for a live entry, or None on miss/expiry.
+
+        ``allow_expired`` also returns entries past their stale window (not yet
+        purged), for use as a last resort when the provider cannot be reached.
+        """
+        try:
+            row = self._conn().execute(
+                "SELECT payload, fresh_until, stale_until FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("response cache read failed (%s)", e)
+            return None
+        if not row:
+            return None
+        payload, fresh_until, stale_until = row
+        now = time.time()
+        if now >= stale_until and not allow_expired:
+            return None
+        try:
+            value = json.loads(zlib.decompress(payload))
+        except (zlib.error, ValueError) as e:
+            logger.warning("response cache entry %s unreadable (%s)", key, e)
+            return None
+        return value, now < fresh_until
+
+    def set(self, key: str, provider: str, value: Any, ttl_s: float, stale_s: float = 0.0) -> None:
+        """Store a JSON-serializable value fresh for ``ttl_s`` and servable stale for ``stale_s`` more."""
+        now = time.time()
+        payload = zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, payload, now, now + ttl_s, now + ttl_s + stale_s),
+            )
+        except sqlite3.Error as e:
+            logger.warning("response cache write failed (%s)", e)
+            return
+        if self._purge_every > 0:
+            with self._lock:
+                self._sets += 1
+                due = self._sets % self._purge_every == 0
+            if due:
+                self._pool.submit(self.purge_expired)
+
+    def revalidate(self, key: str, provider: str, fetch: Callable[[], Any], ttl_s: float, stale_s: float) -> None:
+        """Refresh ``key`` in a background thread unless a refresh is already running."""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def job() -> None:
+            try:
+                self.set(key, provider, fetch(), ttl_s, stale_s)
+            except Exception as e:
+                logger.info("background revalidation of %s failed (%s); keeping stale entry", key, e)
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        self._pool.submit(job)
+
+    def purge_expired(self) -> int:
+        """Delete entries past their stale window; returns the number removed."""
+        try:
+            cur = self._conn().execute("DELETE FROM responses WHERE stale_until <= ?", (time.time(),))
+            return cur.rowcount
+        except sqlite3.Error as e:
+            logger.warning("response cache purge failed (%s)", e)
+            return 0
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            logger.warning("response cache clear failed (%s)", e)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None when disabled or unavailable."""
+    global _cache, _cache_failed
+    if CACHE_DISABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = ResponseCache()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("response cache unavailable (%s); caching disabled", e)
+                    _cache_failed = True
+    return _cache
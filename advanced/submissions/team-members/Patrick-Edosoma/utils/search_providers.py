@@ -1,17 +1,30 @@
 from __future__ import annotations
-from typing import List, Optional
-from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+from datetime import date, timedelta
+import asyncio
 import os
 import re
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from urllib.parse import quote_plus
+import httpx
 import requests
 from dotenv import load_dotenv
-
-from models import FlightOption, HotelOption, POI
-from utils.airports import get_city_for_iata  
-
-load_dotenv(dotenv_path=os.path.join(os.getcwd(), ".env"), override=True)
+from pydantic import BaseModel
+
+from models import POI, FareCell, FlightOption, HotelOption
+from utils.airports import airports_serving, get_city_for_iata
+from utils.http_client import get_async_client, get_session
+from utils.token_cache import TokenCache
+from utils.response_cache import get_response_cache, make_key
+from utils.singleflight import AsyncSingleFlight, SingleFlight
+from utils.circuit_breaker import BREAKERS, CircuitOpenError
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.option_table import FlightTable, HotelTable
+from utils.rate_limit import RATE_LIMITS, RateLimited
+
+# Variables already set in the environment (e.g. by loadtest/bench_plan.py) win over .env.
+load_dotenv(dotenv_path=os.path.join(os.getcwd(), ".env"), override=False)
 
 logger = logging.getLogger(__name__)
 
@@ -98,118 +111,446 @@ def mock_poi_search(city: str, interests: list[str]) -> List[POI]:
 
 
 
-_TAVILY_URL = "https://api.tavily.com/search"
+# Fresh / stale-while-revalidate windows (seconds) per provider call. Fares move
+# quickly, hotel rates less so, and POI listings hardly at all.
+_CACHE_TTLS = {
+    "flights": (float(os.getenv("FLIGHT_CACHE_TTL_S", "600")), float(os.getenv("FLIGHT_CACHE_STALE_S", "1800"))),
+    "hotels": (float(os.getenv("HOTEL_CACHE_TTL_S", "3600")), float(os.getenv("HOTEL_CACHE_STALE_S", "21600"))),
+    "pois": (float(os.getenv("POI_CACHE_TTL_S", "604800")), float(os.getenv("POI_CACHE_STALE_S", "2592000"))),
+}
+
+M = TypeVar("M", bound=BaseModel)
+R = TypeVar("R")
+
+
+_INFLIGHT = SingleFlight()
+_INFLIGHT_ASYNC = AsyncSingleFlight()
+
+_PROVIDER_FOR = {"flights": "amadeus", "hotels": "serpapi", "pois": "tavily"}
+
+
+def _is_provider_failure(e: BaseException) -> bool:
+    """Client-side 4xx errors (bad params, auth) say nothing about provider health; 429 does."""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return not (status is not None and 400 <= status < 500 and status != 429)
+
+
+def _deadline_timeouts(clipped: bool) -> Callable[[BaseException], bool]:
+    """Breaker ``ignore`` predicate: with a timeout shortened by the request deadline,
+    timing out says more about the client's budget than about the provider."""
+    return lambda e: clipped and isinstance(e, _TIMEOUT_ERRORS)
+
+
+def _guarded(
+    kind: str, fetch: Callable[[], List[M]], max_wait_s: Optional[float] = None, clipped: bool = False
+) -> List[Dict[str, Any]]:
+    """Call ``fetch`` through its provider's rate limit and circuit breaker and dump the models.
+
+    Rows keep Python types (dates stay dates) so they can be rebuilt with
+    :func:`_from_rows` in trusted mode; the response cache stores them as JSON.
+    The breaker is checked first, so an open circuit fails fast without using up a
+    rate-limit token; a call that would then wait more than ``max_wait_s`` for the
+    rate limit raises ``RateLimited``.
+    ``clipped`` marks a timeout cut short by a deadline; timing out then is not held against the provider.
+    """
+    provider = _PROVIDER_FOR[kind]
+    return BREAKERS[provider].call(
+        lambda: [m.model_dump() for m in fetch()],
+        _is_provider_failure,
+        _deadline_timeouts(clipped),
+        before=lambda: RATE_LIMITS[provider].acquire(max_wait_s),
+    )
+
+
+async def _guarded_async(
+    kind: str, fetch: Callable[[], Awaitable[List[M]]], max_wait_s: Optional[float] = None, clipped: bool = False
+) -> List[Dict[str, Any]]:
+    provider = _PROVIDER_FOR[kind]
+
+    async def run() -> List[Dict[str, Any]]:
+        return [m.model_dump() for m in await fetch()]
+
+    return await BREAKERS[provider].call_async(
+        run,
+        _is_provider_failure,
+        _deadline_timeouts(clipped),
+        before=lambda: RATE_LIMITS[provider].acquire_async(max_wait_s),
+    )
+
+
+def _from_rows(model: Type[M], rows: List[Dict[str, Any]], trusted: bool = False) -> List[M]:
+    """Rebuild models from dumped rows.
+
+    ``trusted`` rows were dumped in this process from models that had just been
+    validated, so they are assembled with ``model_construct`` (no validation).
+    Rows read back from the response cache are JSON and always validated.
+    """
+    if trusted:
+        return [model.model_construct(**r) for r in rows]
+    return [model.model_validate(r) for r in rows]
+
+
+def _models(model: Type[M]) -> Callable[[List[Dict[str, Any]], bool], List[M]]:
+    """Result builder for :func:`_cached` that returns every row as a model."""
+    return lambda rows, trusted: _from_rows(model, rows, trusted)
+
+
+# Default per-call HTTP timeouts (seconds); a request deadline can only shorten them.
+_TIMEOUTS = {"flights": 25.0, "hotels": 25.0, "pois": 20.0}
+_TIMEOUT_ERRORS = (TimeoutError, requests.Timeout, httpx.TimeoutException)
+
+
+def _cached(
+    kind: str,
+    params: Dict[str, Any],
+    fetch: Callable[[float], List[M]],
+    build: Callable[[List[Dict[str, Any]], bool], R],
+    deadline: Optional[Deadline] = None,
+) -> R:
+    """Run ``fetch(timeout)`` through the persistent response cache (if enabled).
+
+    ``build(rows, trusted)`` turns the dumped rows into the result: a list of
+    models (:func:`_models`) or an option table that converts only the rows it keeps.
+
+    Cache misses are coalesced: concurrent callers with the same normalized
+    parameters share a single upstream call, made through the provider's
+    circuit breaker (which raises CircuitOpenError while the provider is unhealthy).
+    With a deadline, the upstream timeout and the wait on a coalesced call are
+    clipped to the time left; stale entries are revalidated with the full timeout.
+    """
+    key = make_key(kind, params)
+    cache = get_response_cache()
+    ttl, stale = _CACHE_TTLS[kind]
+    cap = _TIMEOUTS[kind]
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            rows, fresh = hit
+            if not fresh:
+                cache.revalidate(key, kind, lambda: _INFLIGHT.do(key, lambda: _guarded(kind, lambda: fetch(cap))), ttl, stale)
+            return build(rows, False)
+
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f"no time left for {kind}")
+    timeout = deadline.timeout(cap) if deadline is not None else cap
+
+    def load() -> List[Dict[str, Any]]:
+        rows = _guarded(
+            kind, lambda: fetch(timeout), deadline.remaining() if deadline is not None else None, timeout < cap
+        )
+        if cache is not None:
+            cache.set(key, kind, rows, ttl, stale)
+        return rows
+
+    rows = _INFLIGHT.do(key, load, timeout=deadline.remaining() if deadline is not None else None)
+    return build(rows, True)
+
+
+async def _cached_async(
+    kind: str,
+    params: Dict[str, Any],
+    fetch: Callable[[float], Awaitable[List[M]]],
+    fetch_sync: Callable[[float], List[M]],
+    build: Callable[[List[Dict[str, Any]], bool], R],
+    deadline: Optional[Deadline] = None,
+) -> R:
+    """Async counterpart of :func:`_cached`.
+
+    Misses are coalesced per event loop; stale entries are revalidated in the
+    cache's background threads via ``fetch_sync``.
+    """
+    key = make_key(kind, params)
+    cache = get_response_cache()
+    ttl, stale = _CACHE_TTLS[kind]
+    cap = _TIMEOUTS[kind]
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            rows, fresh = hit
+            if not fresh:
+                cache.revalidate(key, kind, lambda: _INFLIGHT.do(key, lambda: _guarded(kind, lambda: fetch_sync(cap))), ttl, stale)
+            return build(rows, False)
+
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f"no time left for {kind}")
+    timeout = deadline.timeout(cap) if deadline is not None else cap
+
+    async def load() -> List[Dict[str, Any]]:
+        rows = await _guarded_async(
+            kind, lambda: fetch(timeout), deadline.remaining() if deadline is not None else None, timeout < cap
+        )
+        if cache is not None:
+            cache.set(key, kind, rows, ttl, stale)
+        return rows
+
+    rows = await asyncio.wait_for(
+        _INFLIGHT_ASYNC.do(key, load),
+        timeout=deadline.remaining() if deadline is not None else None,
+    )
+    return build(rows, True)
+
+
+def _fallback(
+    kind: str,
+    params: Dict[str, Any],
+    build: Callable[[List[Dict[str, Any]], bool], R],
+    error: BaseException,
+    deadline: Optional[Deadline],
+) -> R:
+    """Last cached result for a failed provider call (even if expired), else [].
+
+    Records the degradation on ``deadline`` so the planner can report it.
+    """
+    logger.warning("%s search failed (%s: %s); falling back.", kind, type(error).__name__, error)
+    rows: List[Dict[str, Any]] = []
+    cache = get_response_cache()
+    if cache is not None:
+        hit = cache.get(make_key(kind, params), allow_expired=True)
+        if hit is not None:
+            rows = hit[0]
+    if deadline is not None:
+        if isinstance(error, _TIMEOUT_ERRORS):
+            why = "timed out"
+        elif isinstance(error, RateLimited):
+            why = "rate limited"
+        elif isinstance(error, CircuitOpenError):
+            why = "provider unavailable"
+        else:
+            why = "provider error"
+        deadline.note_degraded(kind, f"{why}; used {'cached results' if rows else 'sample data'}")
+    return build(rows, False)
+
+
+def _send(req: Dict[str, Any]) -> Any:
+    resp = get_session().request(**req)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _send_async(req: Dict[str, Any]) -> Any:
+    resp = await get_async_client().request(**req)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _norm_interests(interests: Optional[List[str]]) -> List[str]:
+    out: List[str] = []
+    for i in interests or []:
+        v = (i or "").strip().lower()
+        if v and v not in out:
+            out.append(v)
+    return out
+
+
+# Base URLs can point at a local stand-in (see loadtest/fake_providers.py).
+_TAVILY_URL = os.getenv("TAVILY_BASE_URL", "https://api.tavily.com").rstrip("/") + "/search"
 
-def poi_search(city: str, interests: list[str]) -> List[POI]:
+def _poi_request(city: str, interests: List[str], timeout: float = 20) -> Dict[str, Any]:
+    api_key = os.getenv("TAVILY_API_KEY")
+    human_city = get_city_for_iata(city)
+    query = f"Top things to do in {human_city}: " + ", ".join(interests or ["sightseeing"])
+    return {
+        "method": "POST",
+        "url": _TAVILY_URL,
+        "headers": {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        "json": {"query": query, "max_results": 5},
+        "timeout": timeout,
+    }
+
+def _parse_pois(data: Dict[str, Any], interests: List[str]) -> List[POI]:
+    results = data.get("results") or []
+    pois: List[POI] = []
+    cat = (interests[0] if interests else "activity")
+    for r in results[:5]:
+        title = r.get("title") or "Activity"
+        url = r.get("url")
+        pois.append(POI(title=title, category=cat, duration_minutes=120, price_estimate_usd=0.0, link=url))
+    return pois
+
+def _fetch_pois(city: str, interests: List[str], timeout: float = 20) -> List[POI]:
+    """Query Tavily for POIs; raises on any transport or HTTP error."""
+    return _parse_pois(_send(_poi_request(city, interests, timeout)), interests)
+
+async def _fetch_pois_async(city: str, interests: List[str], timeout: float = 20) -> List[POI]:
+    return _parse_pois(await _send_async(_poi_request(city, interests, timeout)), interests)
+
+def _poi_cache_params(city: str, interests: List[str]) -> Dict[str, Any]:
+    return {"city": (city or "").strip().upper(), "interests": interests}
+
+def poi_search(city: str, interests: list[str], deadline: Optional[Deadline] = None) -> List[POI]:
     """
     Use Tavily if TAVILY_API_KEY set; otherwise, fall back to mocks.
     IMPORTANT: expands IATA (e.g., 'LOS') to 'Lagos, Nigeria' so Tavily doesn't think it's Los Angeles.
+    Results are cached per (city, interests). With a deadline, a call that runs out of
+    time falls back to the last cached result, then to mocks.
     """
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         logger.info("poi_search: no TAVILY_API_KEY; falling back to mocks.")
         return mock_poi_search(city, interests)
 
-    human_city = get_city_for_iata(city)
+    norm = _norm_interests(interests)
+    params = _poi_cache_params(city, norm)
+    try:
+        pois = _cached("pois", params, lambda t: _fetch_pois(city, norm, t), _models(POI), deadline)
+    except Exception as e:
+        pois = _fallback("pois", params, _models(POI), e, deadline)
+        if not pois:
+            return mock_poi_search(city, interests)
+    if not pois:
+        logger.info("poi_search: Tavily returned no results; falling back to mocks.")
+        return mock_poi_search(city, interests)
+    return pois
 
-    query = f"Top things to do in {human_city}: " + ", ".join(interests or ["sightseeing"])
+async def poi_search_async(city: str, interests: list[str], deadline: Optional[Deadline] = None) -> List[POI]:
+    """Non-blocking :func:`poi_search` sharing its cache, coalescing and mock fallback."""
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        logger.info("poi_search: no TAVILY_API_KEY; falling back to mocks.")
+        return mock_poi_search(city, interests)
+
+    norm = _norm_interests(interests)
+    params = _poi_cache_params(city, norm)
     try:
-        resp = requests.post(
-            _TAVILY_URL,
-            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-            json={"query": query, "max_results": 5},
-            timeout=20,
+        pois = await _cached_async(
+            "pois",
+            params,
+            lambda t: _fetch_pois_async(city, norm, t),
+            lambda t: _fetch_pois(city, norm, t),
+            _models(POI),
+            deadline,
         )
-        resp.raise_for_status()
-        data = resp.json()
-        results = data.get("results") or []
-        pois: List[POI] = []
-        cat = (interests[0] if interests else "activity")
-        for r in results[:5]:
-            title = r.get("title") or "Activity"
-            url = r.get("url")
-            pois.append(POI(title=title, category=cat, duration_minutes=120, price_estimate_usd=0.0, link=url))
+    except Exception as e:
+        pois = _fallback("pois", params, _models(POI), e, deadline)
         if not pois:
-            logger.info("poi_search: Tavily returned no results; falling back to mocks.")
             return mock_poi_search(city, interests)
-        return pois
-    except Exception as e:
-        logger.warning("poi_search error (%s); falling back to mocks.", e)
+    if not pois:
+        logger.info("poi_search: Tavily returned no results; falling back to mocks.")
         return mock_poi_search(city, interests)
+    return pois
+
+_AMADEUS_BASE = os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com").rstrip("/")
+_AMADEUS_AUTH = f"{_AMADEUS_BASE}/v1/security/oauth2/token"
+_AMADEUS_FLIGHTS = f"{_AMADEUS_BASE}/v2/shopping/flight-offers"
 
-_AMADEUS_AUTH = "https://test.api.amadeus.com/v1/security/oauth2/token"
-_AMADEUS_FLIGHTS = "https://test.api.amadeus.com/v2/shopping/flight-offers"
+_TOKEN_TIMEOUT_S = 20.0
 
-def _amadeus_token() -> Optional[str]:
+def _fetch_amadeus_token(timeout: Optional[float] = None) -> Tuple[str, float]:
     key = os.getenv("AMADEUS_API_KEY")
     sec = os.getenv("AMADEUS_API_SECRET")
-    if not key or not sec:
-        return None
-    r = requests.post(
+    r = get_session().post(
         _AMADEUS_AUTH,
         data={"grant_type": "client_credentials", "client_id": key, "client_secret": sec},
-        timeout=20,
+        timeout=min(timeout, _TOKEN_TIMEOUT_S) if timeout is not None else _TOKEN_TIMEOUT_S,
     )
     r.raise_for_status()
-    return r.json().get("access_token")
+    body = r.json()
+    return body.get("access_token"), float(body.get("expires_in") or 0)
 
-def _price_band(p: float, width: float = 10.0) -> float:
-    return round(float(p or 0.0) / width) * width
+_AMADEUS_TOKENS = TokenCache(
+    _fetch_amadeus_token,
+    refresh_margin_s=float(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN_S", "120")),
+)
 
-def _dedupe_flights_list(items: List[FlightOption]) -> List[FlightOption]:
-    seen = set()
-    out = []
-    for f in items:
-        key = (f.airline or "XX", _price_band(f.price_usd or 0.0), int(f.duration_minutes or 0))
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(f)
-    return out
+def _amadeus_configured() -> bool:
+    return bool(os.getenv("AMADEUS_API_KEY") and os.getenv("AMADEUS_API_SECRET"))
+
+def _amadeus_token(timeout: float = _TOKEN_TIMEOUT_S) -> Optional[str]:
+    """Return a cached Amadeus access token, or None if no credentials are configured.
+
+    ``timeout`` (the search call's own, already clipped to its deadline) caps a refresh.
+    """
+    if not _amadeus_configured():
+        return None
+    return _AMADEUS_TOKENS.get(timeout=min(timeout, _TOKEN_TIMEOUT_S))
+
+async def _amadeus_token_async(timeout: float = _TOKEN_TIMEOUT_S) -> Optional[str]:
+    """Like :func:`_amadeus_token`; only leaves the event loop when a refresh is needed."""
+    if not _amadeus_configured():
+        return None
+    return _AMADEUS_TOKENS.peek() or await asyncio.to_thread(_AMADEUS_TOKENS.get, min(timeout, _TOKEN_TIMEOUT_S))
+
+# Flight and hotel options returned per search; prices within a band count as duplicates.
+TOP_K = 5
+_PRICE_BAND_USD = 10.0
+
+def _flight_request(
+    token: Optional[str], origin: str, destination: str, start: date, end: date, timeout: float = 25
+) -> Dict[str, Any]:
+    params = {
+        "originLocationCode": origin,
+        "destinationLocationCode": destination,
+        "departureDate": start.isoformat(),
+        "returnDate": end.isoformat(),
+        "adults": 1,
+        "currencyCode": "USD",
+        "max": 20,
+    }
+    return {
+        "method": "GET",
+        "url": _AMADEUS_FLIGHTS,
+        "headers": {"Authorization": f"Bearer {token}"},
+        "params": params,
+        "timeout": timeout,
+    }
+
+def _parse_flights(data: Dict[str, Any], origin: str, destination: str, start: date, end: date) -> List[FlightOption]:
+    payload = data.get("data", [])
 
-def flight_search(origin: str, destination: str, start: date, end: date) -> List[FlightOption]:
-    """Use Amadeus if keys are set; otherwise, fall back to mocks. If real results < 5, pad with deduped mocks."""
-    token = _amadeus_token()
     options: List[FlightOption] = []
+    for fo in payload[:10]:
+        price = float(fo["price"]["grandTotal"])
+        itins = fo.get("itineraries") or []
+        dur_iso = (itins[0].get("duration") if itins else None) or "PT0M"
+        duration_minutes = _iso8601_to_minutes(dur_iso)
+        airline = (fo.get("validatingAirlineCodes") or ["XX"])[0]
+
+        options.append(
+            FlightOption(
+                origin=origin,
+                destination=destination,
+                depart_date=start,
+                return_date=end,
+                airline=airline,
+                price_usd=price,
+                duration_minutes=duration_minutes,
+                link=_google_flights_link(origin, destination, start, end, currency="USD", airline=airline),
+            )
+        )
+    return options
 
-    if token:
-        try:
-            params = {
-                "originLocationCode": origin,
-                "destinationLocationCode": destination,
-                "departureDate": start.isoformat(),
-                "returnDate": end.isoformat(),
-                "adults": 1,
-                "currencyCode": "USD",
-                "max": 20,
-            }
-            r = requests.get(_AMADEUS_FLIGHTS, headers={"Authorization": f"Bearer {token}"}, params=params, timeout=25)
-            r.raise_for_status()
-            payload = r.json().get("data", [])
-
-            for fo in payload[:10]:
-                price = float(fo["price"]["grandTotal"])
-                itins = fo.get("itineraries") or []
-                dur_iso = (itins[0].get("duration") if itins else None) or "PT0M"
-                duration_minutes = _iso8601_to_minutes(dur_iso)
-                airline = (fo.get("validatingAirlineCodes") or ["XX"])[0]
-
-                options.append(
-                    FlightOption(
-                        origin=origin,
-                        destination=destination,
-                        depart_date=start,
-                        return_date=end,
-                        airline=airline,
-                        price_usd=price,
-                        duration_minutes=duration_minutes,
-                        link=_google_flights_link(origin, destination, start, end, currency="USD", airline=airline),
-                    )
-                )
-        except Exception as e:
-            logger.warning("flight_search Amadeus error (%s); will fall back to mocks.", e)
-
-    if len(options) < 5:
+def _fetch_flights(origin: str, destination: str, start: date, end: date, timeout: float = 25) -> List[FlightOption]:
+    """Query Amadeus flight offers; raises on auth, transport or HTTP errors."""
+    token = _amadeus_token(timeout)
+    r = get_session().request(**_flight_request(token, origin, destination, start, end, timeout))
+    if r.status_code == 401:
+        _AMADEUS_TOKENS.invalidate()
+    r.raise_for_status()
+    return _parse_flights(r.json(), origin, destination, start, end)
+
+async def _fetch_flights_async(
+    origin: str, destination: str, start: date, end: date, timeout: float = 25
+) -> List[FlightOption]:
+    token = await _amadeus_token_async(timeout)
+    r = await get_async_client().request(**_flight_request(token, origin, destination, start, end, timeout))
+    if r.status_code == 401:
+        _AMADEUS_TOKENS.invalidate()
+    r.raise_for_status()
+    return _parse_flights(r.json(), origin, destination, start, end)
+
+def _flight_cache_params(origin: str, destination: str, start: date, end: date) -> Dict[str, Any]:
+    return {
+        "origin": origin.strip().upper(),
+        "destination": destination.strip().upper(),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
+
+def _pad_and_rank_flights(
+    options: FlightTable, origin: str, destination: str, start: date, end: date, limit: Optional[int] = TOP_K
+) -> List[FlightOption]:
+    """If real results < 5, pad with deduped mocks; return the ``limit`` cheapest as models (None for all)."""
+    if len(options) < TOP_K:
         mocks = mock_flight_search(origin, destination, start, end)
 
         padded = []
@@ -228,19 +569,197 @@ def flight_search(origin: str, destination: str, start: date, end: date) -> List
             padded.append(bumped)
             bump += 10
 
-        options = _dedupe_flights_list(options + padded)
+        options = options.concat(FlightTable(padded)).dedupe(_PRICE_BAND_USD)
+
+    return options.rank(limit).models()
+
+def _flight_options(
+    origin: str, destination: str, start: date, end: date, deadline: Optional[Deadline]
+) -> FlightTable:
+    """Amadeus offers for one airport pair (cached, coalesced), or the fallback on failure."""
+    params = _flight_cache_params(origin, destination, start, end)
+    try:
+        return _cached(
+            "flights",
+            params,
+            lambda t: _fetch_flights(origin, destination, start, end, t),
+            FlightTable,
+            deadline,
+        )
+    except Exception as e:
+        return _fallback("flights", params, FlightTable, e, deadline)
+
+async def _flight_options_async(
+    origin: str, destination: str, start: date, end: date, deadline: Optional[Deadline]
+) -> FlightTable:
+    params = _flight_cache_params(origin, destination, start, end)
+    try:
+        return await _cached_async(
+            "flights",
+            params,
+            lambda t: _fetch_flights_async(origin, destination, start, end, t),
+            lambda t: _fetch_flights(origin, destination, start, end, t),
+            FlightTable,
+            deadline,
+        )
+    except Exception as e:
+        return _fallback("flights", params, FlightTable, e, deadline)
+
+# Multi-airport search: airports per city, and pair queries in flight at once per search.
+MULTI_AIRPORT_MAX = int(os.getenv("MULTI_AIRPORT_MAX", "3"))
+MULTI_AIRPORT_CONCURRENCY = int(os.getenv("MULTI_AIRPORT_CONCURRENCY", "4"))
+# Threads shared by the pair queries of all synchronous multi-airport searches.
+MULTI_AIRPORT_THREADS = int(os.getenv("MULTI_AIRPORT_THREADS", "32"))
+
+def _airport_pairs(origin: str, destination: str, multi_airport: bool) -> List[Tuple[str, str]]:
+    if not multi_airport:
+        return [(origin, destination)]
+    origins = airports_serving(origin, MULTI_AIRPORT_MAX)
+    destinations = airports_serving(destination, MULTI_AIRPORT_MAX)
+    return [(o, d) for o in origins for d in destinations if o != d]
+
+_MULTI_AIRPORT_POOL = ThreadPoolExecutor(max_workers=max(MULTI_AIRPORT_THREADS, 1), thread_name_prefix="multi-airport")
 
-    
-    options = sorted(options, key=lambda x: (x.price_usd or 9e9, x.duration_minutes or 9e9))[:5]
+def _map_bounded(fn: Callable[[Any], R], items: List[Any], limit: int) -> List[R]:
+    """``fn`` over ``items`` on the shared pool with at most ``limit`` of them in flight; results in order.
+
+    Each search submits its next item only when one of its own finishes, so the
+    bound is per search (like the async path's semaphore) without parking pool threads.
+    """
+    results: List[Any] = [None] * len(items)
+    todo = iter(enumerate(items))
+    running: Dict[Future, int] = {}
+
+    def submit() -> None:
+        nxt = next(todo, None)
+        if nxt is not None:
+            running[_MULTI_AIRPORT_POOL.submit(fn, nxt[1])] = nxt[0]
+
+    for _ in range(max(limit, 1)):
+        submit()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for f in done:
+            results[running.pop(f)] = f.result()
+            submit()
+    return results
+
+def flight_search(
+    origin: str, destination: str, start: date, end: date, deadline: Optional[Deadline] = None,
+    multi_airport: bool = False, limit: Optional[int] = TOP_K,
+) -> List[FlightOption]:
+    """Use Amadeus if keys are set; otherwise, fall back to mocks. If real results < 5, pad with deduped mocks.
+
+    Amadeus results are cached per (origin, destination, dates) for FLIGHT_CACHE_TTL_S.
+    With a deadline, a call that runs out of time falls back to the last cached result.
+    With ``multi_airport``, every airport serving the origin and destination cities
+    (e.g. LHR/LGW/LCY) is searched, up to MULTI_AIRPORT_CONCURRENCY pairs at a time,
+    and the merged offers are ranked together. Returns the ``limit`` best offers; None for all of them.
+    """
+    options = FlightTable()
+
+    if _amadeus_configured():
+        pairs = _airport_pairs(origin, destination, multi_airport) or [(origin, destination)]
+        if len(pairs) == 1:
+            options = _flight_options(*pairs[0], start, end, deadline)
+        else:
+            results = _map_bounded(
+                lambda p: _flight_options(p[0], p[1], start, end, deadline), pairs, MULTI_AIRPORT_CONCURRENCY
+            )
+            options = options.concat(*results).dedupe(_PRICE_BAND_USD)
+
+    return _pad_and_rank_flights(options, origin, destination, start, end, limit)
+
+async def _search_options_async(
+    origin: str, destination: str, start: date, end: date, deadline: Optional[Deadline], multi_airport: bool
+) -> FlightTable:
+    """Provider offers for the trip (every airport pair with ``multi_airport``), unranked; empty without Amadeus."""
+    options = FlightTable()
+
+    if _amadeus_configured():
+        pairs = _airport_pairs(origin, destination, multi_airport) or [(origin, destination)]
+        if len(pairs) == 1:
+            options = await _flight_options_async(*pairs[0], start, end, deadline)
+        else:
+            limit = asyncio.Semaphore(MULTI_AIRPORT_CONCURRENCY)
+
+            async def one(o: str, d: str) -> FlightTable:
+                async with limit:
+                    return await _flight_options_async(o, d, start, end, deadline)
+
+            results = await asyncio.gather(*(one(o, d) for o, d in pairs))
+            options = options.concat(*results).dedupe(_PRICE_BAND_USD)
     return options
 
+async def flight_search_async(
+    origin: str, destination: str, start: date, end: date, deadline: Optional[Deadline] = None,
+    multi_airport: bool = False, limit: Optional[int] = TOP_K,
+) -> List[FlightOption]:
+    """Non-blocking :func:`flight_search` sharing its cache, coalescing and mock padding."""
+    options = await _search_options_async(origin, destination, start, end, deadline, multi_airport)
+    return _pad_and_rank_flights(options, origin, destination, start, end, limit)
+
+# Flexible dates: (depart, return) pairs searched at once per fare grid.
+FARE_GRID_CONCURRENCY = int(os.getenv("FARE_GRID_CONCURRENCY", "6"))
+
+def fare_dates(
+    start: date, end: date, flex_days: int, min_nights: Optional[int] = None, max_nights: Optional[int] = None,
+    earliest: Optional[date] = None,
+) -> List[Tuple[date, date]]:
+    """(depart, return) pairs departing within ``flex_days`` of ``start``.
+
+    Trip lengths run from ``min_nights`` to ``max_nights`` (both default to the
+    requested trip's length); departures before ``earliest`` are skipped.
+    """
+    nights = max((end - start).days, 1)
+    lo = max(min_nights or nights, 1)
+    hi = max(max_nights or nights, lo)
+    pairs = []
+    for shift in range(-flex_days, flex_days + 1):
+        depart = start + timedelta(days=shift)
+        if earliest is not None and depart < earliest:
+            continue
+        pairs.extend((depart, depart + timedelta(days=n)) for n in range(lo, hi + 1))
+    return pairs
+
+async def fare_grid_async(
+    origin: str, destination: str, dates: List[Tuple[date, date]], deadline: Optional[Deadline] = None,
+    multi_airport: bool = False,
+) -> List[FareCell]:
+    """Cheapest fare for each (depart, return) pair, in the order given.
+
+    Every pair is one ordinary flight search: cached and coalesced per airport pair
+    and dates, so overlapping windows, neighbouring requests and the ``/plan`` call
+    for the chosen dates reuse each other's results. At most FARE_GRID_CONCURRENCY
+    searches run at once, and upstream calls are paced by the provider's rate limit
+    (searches that cannot get a slot before the deadline use cached or sample fares).
+    Without Amadeus, cells carry the sample fares.
+    """
+    limit = asyncio.Semaphore(max(FARE_GRID_CONCURRENCY, 1))
+
+    async def cell(depart: date, ret: date) -> FareCell:
+        async with limit:
+            options = await _search_options_async(origin, destination, depart, ret, deadline, multi_airport)
+        real = len(options) > 0
+        best = (options.rank(1).models() if real else _pad_and_rank_flights(options, origin, destination, depart, ret))[0]
+        return FareCell(
+            depart_date=depart,
+            return_date=ret,
+            nights=(ret - depart).days,
+            price_usd=best.price_usd,
+            airline=best.airline,
+            duration_minutes=best.duration_minutes,
+            sample=not real,
+        )
+
+    return list(await asyncio.gather(*(cell(d, r) for d, r in dict.fromkeys(dates))))
 
 
 
-_SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+_SERPAPI_ENDPOINT = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com").rstrip("/") + "/search.json"
 _price_re = re.compile(r"(\d+[.,]?\d*)")
 
-def _parse_price(text: str, default: float) -> float:
+def _parse_price(text: str, default: Optional[float]) -> Optional[float]:
     if not text:
         return default
     m = _price_re.search(str(text).replace(",", ""))
@@ -251,97 +770,173 @@ def _parse_price(text: str, default: float) -> float:
     except ValueError:
         return default
 
-def hotel_search(city: str, check_in: date, check_out: date, max_rate: float) -> List[HotelOption]:
-    """
-    Use SerpApi Google Hotels if SERPAPI_API_KEY is set; else fall back to mocks.
-    Queries proper check-in/out dates and normalizes property results.
+def _hotel_request(city: str, check_in: date, check_out: date, timeout: float = 25) -> Dict[str, Any]:
+    params = {
+        "engine": "google_hotels",
+        "q": get_city_for_iata(city),
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "currency": "USD",
+        "api_key": os.getenv("SERPAPI_API_KEY"),
+        "hl": "en",
+    }
+    return {"method": "GET", "url": _SERPAPI_ENDPOINT, "params": params, "timeout": timeout}
+
+def _parse_hotels(data: Dict[str, Any], city: str, check_in: date, check_out: date) -> List[HotelOption]:
+    """Normalize SerpApi properties (not budget-filtered)."""
+    human_city = get_city_for_iata(city)
+    props = data.get("properties") or []
+    hotels: List[HotelOption] = []
+
+    for p in props[:15]:
+        name = p.get("name")
+        if not name:
+            continue
+
+        rating = p.get("overall_rating") or p.get("reviews_rating") or 4.0
+        try:
+            rating = float(rating)
+        except Exception:
+            rating = 4.0
+
+        pn = None
+        price_block = p.get("price_per_night") or {}
+        if isinstance(price_block, dict):
+            pn = price_block.get("lowest") or price_block.get("extracted")
+
+        if pn is None:
+            total_rate = p.get("total_rate") or {}
+            if isinstance(total_rate, dict):
+                pn = total_rate.get("extracted")
+
+        if pn is None:
+        
+            text_fields = [p.get("rate_per_night"), p.get("price"), p.get("description")]
+            val = next((t for t in text_fields if t), "")
+            if val:
+                pn = _parse_price(val, default=None)
+
+        if pn is None or float(pn) < 20.0 or float(pn) > 2000.0:
+            continue
+
+        link = (
+            p.get("link")
+            or p.get("booking_link")
+            or p.get("google_maps_url")
+            or ((p.get("links") or {}).get("booking"))
+            or ((p.get("links") or {}).get("maps"))
+        )
+        if not link:
+            query = f"{name} {human_city}"
+            link = f"https://www.google.com/maps/search/?api=1&query={quote_plus(query)}"
+
+        hotels.append(
+            HotelOption(
+                name=name,
+                check_in=check_in,
+                check_out=check_out,
+                nightly_rate_usd=float(pn),
+                rating=float(min(max(rating, 0.0), 5.0)),
+                link=link,
+            )
+        )
+    return hotels
+
+def _fetch_hotels(city: str, check_in: date, check_out: date, timeout: float = 25) -> List[HotelOption]:
+    """Query SerpApi Google Hotels; raises on transport or HTTP errors."""
+    return _parse_hotels(_send(_hotel_request(city, check_in, check_out, timeout)), city, check_in, check_out)
+
+async def _fetch_hotels_async(city: str, check_in: date, check_out: date, timeout: float = 25) -> List[HotelOption]:
+    data = await _send_async(_hotel_request(city, check_in, check_out, timeout))
+    return _parse_hotels(data, city, check_in, check_out)
+
+def _hotel_cache_params(city: str, check_in: date, check_out: date) -> Dict[str, Any]:
+    return {"city": (city or "").strip().upper(), "check_in": check_in.isoformat(), "check_out": check_out.isoformat()}
+
+def _filter_hotels(
+    candidates: HotelTable, city: str, check_in: date, check_out: date, max_rate: float,
+    limit: Optional[int] = TOP_K,
+) -> List[HotelOption]:
+    """Apply the budget tolerance and rank; mocks if nothing survives. Only kept rows become models."""
+    hotels = candidates.within(max_rate)
+    if not len(hotels):
+        logger.info("hotel_search: no properties parsed; falling back to mocks.")
+        return mock_hotel_search(get_city_for_iata(city), check_in, check_out, max_rate)
+
+    return hotels.rank(limit).models()
+
+def select_hotels(
+    candidates: Optional[HotelTable], city: str, check_in: date, check_out: date, max_rate: float,
+    limit: Optional[int] = TOP_K,
+) -> List[HotelOption]:
+    """Hotels for one budget out of :func:`hotel_candidates`; mocks when there are none."""
+    if candidates is None:
+        return mock_hotel_search(city, check_in, check_out, max_rate)
+    return _filter_hotels(candidates, city, check_in, check_out, max_rate, limit)
+
+def hotel_candidates(city: str, check_in: date, check_out: date, deadline: Optional[Deadline] = None) -> Optional[HotelTable]:
+    """Provider hotels for a stay before the budget filter; None if SerpApi is not configured.
+
+    A failed call returns the last cached result for the stay (possibly empty).
     """
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         logger.info("hotel_search: no SERPAPI_API_KEY; falling back to mocks.")
-        return mock_hotel_search(city, check_in, check_out, max_rate)
+        return None
 
-    human_city = get_city_for_iata(city)  
+    params = _hotel_cache_params(city, check_in, check_out)
     try:
-        params = {
-            "engine": "google_hotels",
-            "q": human_city,
-            "check_in_date": check_in.isoformat(),
-            "check_out_date": check_out.isoformat(),
-            "currency": "USD",
-            "api_key": api_key,
-            "hl": "en",
-        }
-        r = requests.get(_SERPAPI_ENDPOINT, params=params, timeout=25)
-        r.raise_for_status()
-        data = r.json()
-
-        props = data.get("properties") or []
-        hotels: List[HotelOption] = []
-
-        for p in props[:15]:
-            name = p.get("name")
-            if not name:
-                continue
-
-            rating = p.get("overall_rating") or p.get("reviews_rating") or 4.0
-            try:
-                rating = float(rating)
-            except Exception:
-                rating = 4.0
-
-            pn = None
-            price_block = p.get("price_per_night") or {}
-            if isinstance(price_block, dict):
-                pn = price_block.get("lowest") or price_block.get("extracted")
-
-            if pn is None:
-                total_rate = p.get("total_rate") or {}
-                if isinstance(total_rate, dict):
-                    pn = total_rate.get("extracted")
-
-            if pn is None:
-            
-                text_fields = [p.get("rate_per_night"), p.get("price"), p.get("description")]
-                val = next((t for t in text_fields if t), "")
-                if val:
-                    pn = _parse_price(val, default=max_rate or 120.0)
-
-            if pn is None or float(pn) < 20.0 or float(pn) > 2000.0:
-                continue
-
-            if max_rate and float(pn) > max_rate * 1.25:
-                continue
-
-            link = (
-                p.get("link")
-                or p.get("booking_link")
-                or p.get("google_maps_url")
-                or ((p.get("links") or {}).get("booking"))
-                or ((p.get("links") or {}).get("maps"))
-            )
-            if not link:
-                query = f"{name} {human_city}"
-                link = f"https://www.google.com/maps/search/?api=1&query={quote_plus(query)}"
-
-            hotels.append(
-                HotelOption(
-                    name=name,
-                    check_in=check_in,
-                    check_out=check_out,
-                    nightly_rate_usd=float(pn),
-                    rating=float(min(max(rating, 0.0), 5.0)),
-                    link=link,
-                )
-            )
+        return _cached(
+            "hotels",
+            params,
+            lambda t: _fetch_hotels(city, check_in, check_out, t),
+            HotelTable,
+            deadline,
+        )
+    except Exception as e:
+        return _fallback("hotels", params, HotelTable, e, deadline)
 
-        if not hotels:
-            logger.info("hotel_search: no properties parsed; falling back to mocks.")
-            return mock_hotel_search(human_city, check_in, check_out, max_rate)
-            
-        hotels.sort(key=lambda h: ((h.nightly_rate_usd or 9e9), -(h.rating or 0.0)))
-        return hotels
+async def hotel_candidates_async(
+    city: str, check_in: date, check_out: date, deadline: Optional[Deadline] = None
+) -> Optional[HotelTable]:
+    """Non-blocking :func:`hotel_candidates`."""
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        logger.info("hotel_search: no SERPAPI_API_KEY; falling back to mocks.")
+        return None
 
+    params = _hotel_cache_params(city, check_in, check_out)
+    try:
+        return await _cached_async(
+            "hotels",
+            params,
+            lambda t: _fetch_hotels_async(city, check_in, check_out, t),
+            lambda t: _fetch_hotels(city, check_in, check_out, t),
+            HotelTable,
+            deadline,
+        )
     except Exception as e:
-        logger.warning("hotel_search error (%s); falling back to mocks.", e)
-        return mock_hotel_search(human_city, check_in, check_out, max_rate)
+        return _fallback("hotels", params, HotelTable, e, deadline)
+
+def hotel_search(
+    city: str, check_in: date, check_out: date, max_rate: float, deadline: Optional[Deadline] = None,
+    limit: Optional[int] = TOP_K,
+) -> List[HotelOption]:
+    """
+    Use SerpApi Google Hotels if SERPAPI_API_KEY is set; else fall back to mocks.
+    Queries proper check-in/out dates and normalizes property results.
+    Provider results are cached per (city, dates); the budget filter is applied afterwards,
+    so different budgets for the same stay share one upstream call. With a deadline, a call
+    that runs out of time falls back to the last cached result, then to mocks.
+    Returns the ``limit`` cheapest (then best rated) hotels; None for all of them.
+    """
+    candidates = hotel_candidates(city, check_in, check_out, deadline)
+    return select_hotels(candidates, city, check_in, check_out, max_rate, limit)
+
+async def hotel_search_async(
+    city: str, check_in: date, check_out: date, max_rate: float, deadline: Optional[Deadline] = None,
+    limit: Optional[int] = TOP_K,
+) -> List[HotelOption]:
+    """Non-blocking :func:`hotel_search` sharing its cache, coalescing and mock fallback."""
+    candidates = await hotel_candidates_async(city, check_in, check_out, deadline)
+    return select_hotels(candidates, city, check_in, check_out, max_rate, limit)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    Notes:
+        The first caller for a key (the leader) runs the function; callers that
+        arrive while it is in flight wait for and share its result or exception.
+        Nothing is remembered once the call completes; caching is a separate layer.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run ``fn`` once per in-flight ``key`` and return its result.
+
+        Args:
+            key: Identity of the call (e.g. normalized request parameters).
+            fn: Zero-argument callable doing the real work.
+            timeout: Max seconds a follower waits for the leader.
+
+        Returns:
+            Any: The leader's result (shared by all callers).
+
+        Raises:
+            TimeoutError: If a follower's wait exceeds ``timeout``.
+            Exception: Whatever ``fn`` raised, re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"timed out waiting for in-flight call {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of :class:`SingleFlight`.
+
+    Notes:
+        The leader's coroutine runs as its own task, so a caller that is cancelled
+        (e.g. by ``asyncio.wait_for``) does not cancel the work other callers
+        are waiting on. Calls are scoped to the running event loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Tuple[int, str], "asyncio.Task[Any]"] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` once per in-flight ``key`` and return its result."""
+        loop = asyncio.get_running_loop()
+        k = (id(loop), key)
+        task = self._calls.get(k)
+        if task is None:
+            task = loop.create_task(fn())
+            self._calls[k] = task
+            self.executed += 1
+            task.add_done_callback(lambda t: self._done(k, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, k: Tuple[int, str], task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(k) is task:
+            del self._calls[k]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; callers see it via shield()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
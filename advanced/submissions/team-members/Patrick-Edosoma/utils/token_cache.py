@@ -0,0 +1,109 @@
+from __future__ import annotations
+import threading
+import time
+import logging
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """Thread-safe cache for an expiring bearer token.
+
+    Args:
+        fetch: Callable taking a timeout in seconds (None for its default) and
+            returning ``(token, expires_in_seconds)``.
+        refresh_margin_s: Refresh in the background once the token is this close to expiry
+            (at most half its lifetime, so short-lived tokens are not renewed on every call).
+
+    Notes:
+        A token inside its refresh margin is still served while a single background
+        thread renews it. Once it has actually expired, the first caller refreshes
+        synchronously and concurrent callers wait for that one refresh.
+    """
+
+    def __init__(self, fetch: Callable[[Optional[float]], Tuple[str, float]], refresh_margin_s: float = 60.0) -> None:
+        self._fetch = fetch
+        self._margin = refresh_margin_s
+        self._cond = threading.Condition()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._refreshing = False
+        self._error: Optional[BaseException] = None
+
+    def get(self, timeout: Optional[float] = None) -> str:
+        """Return a valid token, refreshing it if needed.
+
+        Args:
+            timeout: Max seconds to wait for a refresh, this caller's own or another's.
+
+        Returns:
+            str: The cached or freshly fetched token.
+
+        Raises:
+            Exception: Whatever ``fetch`` raised if no valid token could be obtained.
+        """
+        with self._cond:
+            token = self._peek_locked()
+            if token:
+                return token
+
+            now = time.monotonic()
+            if self._refreshing:
+                deadline = None if timeout is None else now + timeout
+                while self._refreshing:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("timed out waiting for token refresh")
+                    self._cond.wait(remaining)
+                if self._token and time.monotonic() < self._expires_at:
+                    return self._token
+                raise self._error or RuntimeError("token refresh failed")
+
+            self._refreshing = True
+
+        self._refresh(timeout)
+        with self._cond:
+            if self._token and time.monotonic() < self._expires_at:
+                return self._token
+            raise self._error or RuntimeError("token refresh failed")
+
+    def peek(self) -> Optional[str]:
+        """Return the token if still valid without ever blocking on a refresh, else None."""
+        with self._cond:
+            return self._peek_locked()
+
+    def _peek_locked(self) -> Optional[str]:
+        now = time.monotonic()
+        if self._token and now < self._expires_at:
+            if now >= self._refresh_at and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, name="token-refresh", daemon=True).start()
+            return self._token
+        return None
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the provider rejects it."""
+        with self._cond:
+            self._token = None
+            self._expires_at = 0.0
+            self._refresh_at = 0.0
+
+    def _refresh(self, timeout: Optional[float] = None) -> None:
+        try:
+            token, expires_in = self._fetch(timeout)
+            with self._cond:
+                self._token = token
+                now, lifetime = time.monotonic(), float(expires_in)
+                self._expires_at = now + lifetime
+                self._refresh_at = now + lifetime - min(self._margin, lifetime / 2)
+                self._error = None
+        except Exception as e:
+            logger.warning("Token refresh failed (%s)", e)
+            with self._cond:
+                self._error = e
+        finally:
+            with self._cond:
+                self._refreshing = False
+                self._cond.notify_all()
@@ -0,0 +1,192 @@
+"""Budget-constrained choice of flight, hotel and activities for one trip.
+
+Every option gets a value in USD (what it is worth to the traveller) next to its
+price, and a trip is scored by its surplus: value minus cost. Flights are worth
+less the longer they take, hotels more the better they are rated, and activities
+more when they match the traveller's interests. The best trip maximises the
+surplus with its total cost within the budget.
+"""
+from __future__ import annotations
+import math
+import os
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import POI
+from utils.option_table import FlightTable, HotelTable
+
+# USD values behind the scores.
+VALUE_OF_TIME_USD_H = float(os.getenv("TRIP_VALUE_OF_TIME_USD_H", "25"))
+RATING_VALUE_USD = float(os.getenv("TRIP_RATING_VALUE_USD", "20"))
+POI_VALUE_USD = float(os.getenv("TRIP_POI_VALUE_USD", "60"))
+# Value of an activity outside the stated interests, relative to a matching one.
+OFF_INTEREST_SHARE = 0.5
+# Budget steps the activity knapsack distinguishes (its resolution is budget / steps).
+KNAPSACK_STEPS = 2000
+
+
+class Selection(NamedTuple):
+    """One scored trip: row indices into the candidate tables plus chosen POI indices."""
+
+    flight: int
+    hotel: int
+    pois: Tuple[int, ...]
+    cost: float
+    score: float
+    within_budget: bool
+
+
+def poi_values(pois: Sequence[POI], interests: Iterable[str]) -> np.ndarray:
+    """USD value of each POI: full for a category in ``interests``, part otherwise."""
+    wanted = {(i or "").strip().lower() for i in interests or []}
+    matched = np.fromiter(((p.category or "").lower() in wanted for p in pois), dtype=bool, count=len(pois))
+    return np.where(matched, POI_VALUE_USD, POI_VALUE_USD * OFF_INTEREST_SHARE)
+
+
+def _priced(values: np.ndarray) -> np.ndarray:
+    """Indices of rows with a price, or every row if none has one."""
+    idx = np.nonzero(values > 0)[0]
+    return idx if len(idx) else np.arange(len(values))
+
+
+class _Knapsack:
+    """Best activity surplus for every budget up to ``budget``, with at most ``slots`` activities.
+
+    A 0/1 knapsack with two capacities (count and money) solved once for all budgets,
+    so each flight/hotel pair looks up its leftover budget instead of re-solving.
+    Prices are rounded up to the budget step, so a chosen set never exceeds its budget.
+    Instead of a take/skip flag per item and cell, the table is saved every
+    ``stride`` items and :meth:`choose` replays one stretch of items at a time.
+    """
+
+    def __init__(self, prices: np.ndarray, values: np.ndarray, slots: int, budget: float) -> None:
+        self.unit = max(budget / KNAPSACK_STEPS, 1.0)
+        steps = max(int(budget // self.unit), 0)
+        gain = values - prices
+        # Activities worth less than they cost never improve a trip.
+        self.items = np.nonzero(gain > 0)[0]
+        self.weights = np.ceil(prices[self.items] / self.unit).astype(np.int64)
+        self.gains = gain[self.items]
+        self.slots = slots
+        self.best = np.zeros((slots + 1, steps + 1))
+        # sqrt(8n) balances the saved float tables against the flags one replay holds.
+        self.stride = max(math.isqrt(8 * len(self.items)), 1)
+        self.checkpoints: List[np.ndarray] = []
+        for i in range(len(self.items)):
+            if i % self.stride == 0:
+                self.checkpoints.append(self.best.copy())
+            self._add(self.best, i)
+
+    def _add(self, best: np.ndarray, i: int) -> Optional[np.ndarray]:
+        """Fold item ``i`` into ``best`` in place; returns where it was taken (row k-1, column b-weight)."""
+        w, steps = int(self.weights[i]), best.shape[1] - 1
+        if w > steps or not self.slots:
+            return None
+        # Candidates come from the table before this item, so it is used at most once.
+        cand = best[:-1, : steps + 1 - w] + self.gains[i]
+        better = cand > best[1:, w:]
+        best[1:, w:][better] = cand[better]
+        return better
+
+    def steps_for(self, money: np.ndarray) -> np.ndarray:
+        """Budget step index for leftover ``money`` (negative means infeasible)."""
+        return np.where(money >= 0, np.minimum(np.floor(money / self.unit + 1e-9), self.best.shape[1] - 1), -1).astype(
+            np.int64
+        )
+
+    def value(self, steps: np.ndarray) -> np.ndarray:
+        return np.where(steps >= 0, self.best[self.slots][np.maximum(steps, 0)], 0.0)
+
+    def choose(self, step: int) -> Tuple[int, ...]:
+        """POI indices behind ``value(step)``, in input order."""
+        picked: List[int] = []
+        k, b = self.slots, max(step, 0)
+        for c in range(len(self.checkpoints) - 1, -1, -1):
+            if not k:
+                break
+            lo = c * self.stride
+            best = self.checkpoints[c].copy()
+            took = [self._add(best, i) for i in range(lo, min(lo + self.stride, len(self.items)))]
+            for i in range(lo + len(took) - 1, lo - 1, -1):
+                w, t = int(self.weights[i]), took[i - lo]
+                if k and t is not None and b >= w and t[k - 1, b - w]:
+                    picked.append(int(self.items[i]))
+                    k -= 1
+                    b -= w
+        return tuple(sorted(picked))
+
+
+def optimize_trip(
+    flights: FlightTable,
+    hotels: HotelTable,
+    pois: Sequence[POI],
+    nights: int,
+    slots: int,
+    budget: float,
+    interests: Optional[Iterable[str]] = None,
+    k: int = 3,
+) -> List[Selection]:
+    """Best trips within ``budget``, each with a different hotel.
+
+    Args:
+        flights: Flight candidates (rows without a price are ignored if any have one).
+        hotels: Hotel candidates, likewise.
+        pois: Activity candidates.
+        nights: Nights of hotel stay.
+        slots: Most activities that fit in the trip.
+        budget: Total budget in USD for flight, hotel and activities.
+        interests: The traveller's interests (activity categories).
+        k: Trips to return: the best, then the runners-up.
+
+    Returns:
+        List[Selection]: Highest score first. If nothing fits the budget, the
+        cheapest trips are returned instead with ``within_budget`` False.
+
+    Notes:
+        Every flight/hotel pair is scored at once as a NumPy matrix; the activities
+        for each pair's leftover budget come from one knapsack table. Runners-up
+        are the best trip for each other hotel, so alternatives differ in where you
+        stay rather than by a few dollars of airfare. Hundreds of candidates per
+        category take milliseconds.
+    """
+    if not len(flights) or not len(hotels):
+        return []
+    f_idx, h_idx = _priced(flights.price), _priced(hotels.rate)
+    f_cost = flights.price[f_idx]
+    duration = flights.duration[f_idx]
+    # A flight of unknown length counts as the longest known one, and loses the tie to it.
+    known = duration > 0
+    worst = float(duration[known].max()) if known.any() else 0.0
+    f_value = -VALUE_OF_TIME_USD_H * np.where(known, duration, worst) / 60.0 - np.where(known, 0.0, 0.01)
+    h_cost = hotels.rate[h_idx] * nights
+    h_value = RATING_VALUE_USD * hotels.rating[h_idx] * nights
+
+    cost = f_cost[:, None] + h_cost[None, :]
+    knap = _Knapsack(
+        np.fromiter((p.price_estimate_usd or 0.0 for p in pois), dtype=np.float64, count=len(pois)),
+        poi_values(pois, interests or []),
+        slots,
+        budget,
+    )
+    steps = knap.steps_for(budget - cost)
+    feasible = steps >= 0
+    score = f_value[:, None] + h_value[None, :] - cost + knap.value(steps)
+    within = bool(feasible.any())
+    # Over budget everywhere: fall back to the cheapest pairs (activities only if free).
+    rank_by = np.where(feasible, score, -np.inf) if within else -cost
+
+    best_flight = np.argmax(rank_by, axis=0)
+    per_hotel = rank_by[best_flight, np.arange(len(h_idx))]
+    hotels_order = np.argsort(-per_hotel, kind="stable")[:k]
+    hotels_order = hotels_order[np.isfinite(per_hotel[hotels_order])]
+
+    out = []
+    for h in hotels_order:
+        f = int(best_flight[h])
+        chosen = knap.choose(int(steps[f, h])) if within else knap.choose(0)
+        poi_cost = sum(float(pois[i].price_estimate_usd or 0.0) for i in chosen)
+        total = float(cost[f, h]) + poi_cost
+        value = float(f_value[f] + h_value[h]) + float(poi_values([pois[i] for i in chosen], interests or []).sum())
+        out.append(Selection(int(f_idx[f]), int(h_idx[h]), chosen, round(total, 2), round(value - total, 2), within))
+    return out